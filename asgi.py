@@ -0,0 +1,365 @@
+"""
+异步服务入口(ASGI)
+
+/fctask/get 与 /fctask/info 由原生异步处理函数提供，数据库使用asyncpg连接池，
+Firecrawl使用aiohttp异步客户端，慢速的上游调用不再占用请求线程；
+其余接口转交给Flask应用处理。
+
+用法:
+    uvicorn asgi:app --host 0.0.0.0 --port 8000 --workers 4
+"""
+import asyncio
+import json
+import time
+from datetime import datetime
+from urllib.parse import parse_qs
+
+import aiohttp
+import asyncpg
+import jwt
+from asgiref.wsgi import WsgiToAsgi
+
+from cache import TTLCache
+from database import (
+    CRAWL_BACKEND_CACHE_CONFIG,
+    DATABASE_CONFIG,
+    POOL_CONFIG,
+    TASK_LIST_FORMATS,
+    build_task_page,
+    build_task_queries,
+    parse_task_count,
+)
+from fcmanager import (
+    FIRECRAWL_CONFIG,
+    STATUS_CACHE_CONFIG,
+    TERMINAL_CRAWL_STATUSES,
+    BackendUnavailableError,
+    FirecrawlBackend,
+    FirecrawlError,
+    get_backend,
+    status_summary,
+)
+from fcapi import crawl_results_url
+from metrics import FIRECRAWL_REQUEST_DURATION, HTTP_REQUEST_DURATION, STATUS_CACHE_REQUESTS
+from server import CORS_ORIGINS, app as flask_app
+from serialization import compress, dumps
+
+
+def _to_asyncpg(query: str) -> str:
+    """将psycopg2的%s占位符转换为asyncpg的$n占位符"""
+    parts = query.split("%s")
+    return "".join(
+        part + (f"${index}" if index < len(parts) else "")
+        for index, part in enumerate(parts, start=1)
+    )
+
+
+class AsyncFirecrawlClient:
+    """Firecrawl v1 API的异步客户端，复用keep-alive连接；需在事件循环内创建"""
+
+    def __init__(self, api_url: str, api_key: str = "",
+                 connect_timeout: float = 3.05, read_timeout: float = 30.0):
+        headers = {"Content-Type": "application/json"}
+        if api_key:
+            headers["Authorization"] = f"Bearer {api_key}"
+        self.api_url = api_url.rstrip("/")
+        self.session = aiohttp.ClientSession(
+            headers=headers,
+            timeout=aiohttp.ClientTimeout(connect=connect_timeout, sock_read=read_timeout),
+            # 不限制并发连接数，慢速上游不会让请求在客户端排队
+            connector=aiohttp.TCPConnector(limit=0, keepalive_timeout=30),
+        )
+
+    async def _request(self, method: str, url: str, **kwargs) -> dict:
+        started = time.perf_counter()
+        try:
+            async with self.session.request(method, url, **kwargs) as response:
+                text = await response.text()
+        except Exception:
+            FIRECRAWL_REQUEST_DURATION.observe(time.perf_counter() - started, method, "error")
+            raise
+        FIRECRAWL_REQUEST_DURATION.observe(
+            time.perf_counter() - started, method, f"{response.status // 100}xx"
+        )
+        try:
+            body = json.loads(text)
+        except ValueError:
+            body = {}
+        if response.status >= 400:
+            message = body.get("error") or text or response.reason
+            raise FirecrawlError(response.status, message)
+        return body
+
+    async def get_crawl_status_page(self, task_id: str) -> dict:
+        """查询爬虫任务状态，只返回第一页结果，不跟随next链接"""
+        return await self._request("GET", f"{self.api_url}/v1/crawl/{task_id}")
+
+    async def close(self):
+        await self.session.close()
+
+
+class AsyncApp:
+    """
+    ASGI应用：注册的路由由异步处理函数处理，其余请求转交Flask
+
+    连接池与客户端在首次使用时创建，每个worker进程各自持有。
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+        self.fallback = WsgiToAsgi(wsgi_app)
+        self.routes = {
+            ("GET", "/fctask/get"): self.get_tasks,
+            ("GET", "/fctask/info"): self.get_task_status,
+        }
+        self._pool = None
+        self._pool_lock = None
+        self._firecrawl = {}  # 后端名称 -> AsyncFirecrawlClient
+        self._crawl_backends = TTLCache(**CRAWL_BACKEND_CACHE_CONFIG)
+        self._status_cache = TTLCache(**STATUS_CACHE_CONFIG)
+        self._status_inflight = {}  # task_id -> asyncio.Future
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+
+        handler = None
+        if scope["type"] == "http":
+            handler = self.routes.get((scope["method"], scope["path"]))
+        if handler is None:
+            return await self.fallback(scope, receive, send)
+
+        request = {
+            "args": {
+                key: values[0]
+                for key, values in parse_qs(scope["query_string"].decode()).items()
+            },
+            "headers": {
+                key.decode().lower(): value.decode() for key, value in scope["headers"]
+            },
+        }
+        started = time.perf_counter()
+        status, body, headers = await handler(request)
+        await self._send_json(send, request, status, body, headers)
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - started, scope["method"], scope["path"], status
+        )
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._pool is not None:
+                    await self._pool.close()
+                for client in self._firecrawl.values():
+                    await client.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _send_json(self, send, request, status: int, body: dict, headers: dict = None):
+        payload, encoding = compress(dumps(body), request["headers"].get("accept-encoding"))
+        response_headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+        ]
+        if encoding:
+            response_headers.append((b"content-encoding", encoding.encode()))
+        vary = ["Accept-Encoding"]
+        origin = request["headers"].get("origin")
+        if origin in CORS_ORIGINS:
+            response_headers.append((b"access-control-allow-origin", origin.encode()))
+            vary.append("Origin")
+        response_headers.append((b"vary", ", ".join(vary).encode()))
+        for key, value in (headers or {}).items():
+            response_headers.append((key.lower().encode(), str(value).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": response_headers})
+        await send({"type": "http.response.body", "body": payload})
+
+    def _authenticate(self, request) -> int:
+        """校验Authorization头中的JWT，返回用户ID；失败时抛出PermissionError"""
+        header = request["headers"].get("authorization", "")
+        if not header.startswith("Bearer "):
+            raise PermissionError("Missing Authorization Header")
+        try:
+            claims = jwt.decode(
+                header[len("Bearer "):],
+                self.wsgi_app.config["JWT_SECRET_KEY"],
+                algorithms=["HS256"],
+            )
+        except jwt.PyJWTError as error:
+            raise PermissionError(str(error))
+        if claims.get("type") != "access":
+            raise PermissionError("Only access tokens are allowed")
+        return int(claims["sub"])
+
+    async def _get_pool(self) -> asyncpg.Pool:
+        if self._pool is None:
+            if self._pool_lock is None:
+                self._pool_lock = asyncio.Lock()
+            async with self._pool_lock:
+                if self._pool is None:
+                    config = dict(DATABASE_CONFIG, port=int(DATABASE_CONFIG["port"]))
+                    self._pool = await asyncpg.create_pool(
+                        min_size=POOL_CONFIG["min_size"],
+                        max_size=POOL_CONFIG["max_size"],
+                        **config,
+                    )
+        return self._pool
+
+    def _get_firecrawl(self, backend: FirecrawlBackend) -> AsyncFirecrawlClient:
+        client = self._firecrawl.get(backend.name)
+        if client is None:
+            client = self._firecrawl[backend.name] = AsyncFirecrawlClient(
+                api_url=backend.api_url,
+                api_key=backend.api_key or FIRECRAWL_CONFIG["api_key"],
+                connect_timeout=FIRECRAWL_CONFIG["connect_timeout"],
+                read_timeout=FIRECRAWL_CONFIG["read_timeout"],
+            )
+        return client
+
+    async def _get_crawl_backend(self, fc_task_id: str) -> FirecrawlBackend:
+        """按crawl_status中记录的后端名称获取后端，语义同database.get_crawl_backend"""
+        name = self._crawl_backends.get(fc_task_id)
+        if name is None:
+            pool = await self._get_pool()
+            async with pool.acquire() as connection:
+                row = await connection.fetchrow(
+                    "SELECT backend FROM crawl_status WHERE fc_task_id = $1", fc_task_id
+                )
+            # 未记录后端的历史任务不缓存，每次按第一个后端处理
+            name = row["backend"] if row else None
+            if name is not None:
+                self._crawl_backends.set(fc_task_id, name)
+        return get_backend(name)
+
+    async def _check_crawl_status(self, fc_task_id: str) -> dict:
+        """经所在后端的熔断器查询爬虫状态"""
+        backend = await self._get_crawl_backend(fc_task_id)
+        if not backend.allow_request():
+            raise BackendUnavailableError(f"Firecrawl后端{backend.name}已熔断")
+        try:
+            status = await self._get_firecrawl(backend).get_crawl_status_page(fc_task_id)
+        except Exception as error:
+            if isinstance(error, FirecrawlError):
+                failed = error.status_code >= 500
+            else:
+                failed = isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+            if failed:
+                backend.record_failure()
+            else:
+                backend.record_success()
+            raise
+        except BaseException:
+            # 请求被取消时归还试探名额，否则半开的后端在本进程中不再放行任何请求
+            backend.release_trial()
+            raise
+        backend.record_success()
+        return status
+
+    async def get_tasks(self, request) -> tuple:
+        try:
+            user_id = self._authenticate(request)
+        except PermissionError as e:
+            return 401, {"message": str(e)}, None
+
+        args = request["args"]
+        try:
+            page = int(args.get("page", 1))
+            page_size = int(args.get("page_size", 20))
+            pagination = args.get("pagination", "offset")
+            count_mode = args.get("count", "exact")
+            task_format = args.get("format", "rows")
+            if task_format not in TASK_LIST_FORMATS:
+                raise ValueError("无效的任务列表格式")
+            # asyncpg要求时间参数为datetime对象
+            start_date = datetime.fromisoformat(args["start_date"]) if args.get("start_date") else None
+            end_date = datetime.fromisoformat(args["end_date"]) if args.get("end_date") else None
+            queries = build_task_queries(
+                user_id=user_id,
+                status=args.get("status"),
+                category=args.get("category"),
+                start_date=start_date,
+                end_date=end_date,
+                page=page,
+                page_size=page_size,
+                pagination=pagination,
+                cursor=args.get("cursor"),
+                count_mode=count_mode,
+                search=args.get("search"),
+            )
+        except ValueError as e:
+            return 400, {"success": False, "message": str(e)}, None
+
+        try:
+            pool = await self._get_pool()
+            async with pool.acquire() as connection:
+                total_count = None
+                count_query, count_params = queries["count"]
+                if count_query:
+                    total_count = parse_task_count(
+                        await connection.fetchval(_to_asyncpg(count_query), *count_params),
+                        count_mode,
+                    )
+                list_query, list_params = queries["list"]
+                rows = await connection.fetch(_to_asyncpg(list_query), *list_params)
+
+            response = build_task_page(
+                rows, total_count, page, page_size, pagination, task_format
+            )
+            return 200, {"success": True, "data": response, "message": "获取任务列表成功"}, None
+
+        except Exception as e:
+            return 500, {"success": False, "message": f"获取任务列表失败: {str(e)}"}, None
+
+    async def _fetch_status(self, fc_task_id: str) -> tuple[dict, str]:
+        """带缓存与请求合并的爬虫状态查询，语义同fcmanager.get_crawl_status_cached"""
+        status = self._status_cache.get(fc_task_id)
+        if status is not None:
+            STATUS_CACHE_REQUESTS.inc("hit")
+            return status, "hit"
+
+        future = self._status_inflight.get(fc_task_id)
+        if future is not None:
+            STATUS_CACHE_REQUESTS.inc("coalesced")
+            return await asyncio.shield(future), "coalesced"
+
+        STATUS_CACHE_REQUESTS.inc("miss")
+        future = asyncio.get_running_loop().create_future()
+        self._status_inflight[fc_task_id] = future
+        try:
+            status = status_summary(await self._check_crawl_status(fc_task_id))
+            ttl = None if status.get("status") in TERMINAL_CRAWL_STATUSES else self._status_cache.ttl
+            self._status_cache.set(fc_task_id, status, ttl=ttl)
+            future.set_result(status)
+            return status, "miss"
+        except BaseException as e:
+            # 领头请求被取消(客户端断开、服务关闭)时同样结束future，合并的等待者收到普通异常而不是一直挂起
+            if not future.done():
+                future.set_exception(e if isinstance(e, Exception) else Exception("爬虫状态查询已取消"))
+                future.exception()  # 没有其他等待者时避免"未获取的异常"警告
+            raise
+        finally:
+            if self._status_inflight.get(fc_task_id) is future:
+                del self._status_inflight[fc_task_id]
+
+    async def get_task_status(self, request) -> tuple:
+        try:
+            self._authenticate(request)
+        except PermissionError as e:
+            return 401, {"message": str(e)}, None
+
+        fc_task_id = request["args"].get("fc_task_id")
+        if not fc_task_id:
+            return 400, {"success": False, "message": "缺少任务ID参数"}, None
+
+        try:
+            status, cache_state = await self._fetch_status(fc_task_id)
+            data = {**status, "results_url": crawl_results_url(fc_task_id)}
+            return 200, {"success": True, "data": data, "cache": cache_state}, {"X-Cache": cache_state}
+        except Exception as e:
+            return 500, {"success": False, "message": f"查询爬虫任务状态失败: {str(e)}"}, None
+
+
+app = AsyncApp(flask_app)
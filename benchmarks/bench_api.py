@@ -0,0 +1,338 @@
+"""
+fctask与user接口的基准测试
+
+先用seed.py生成数据集，启动桩服务和指向该数据库的待测服务(不启动后台服务，避免提交器和调度器干扰结果):
+    python benchmarks/seed.py --database fcmanager_bench --tasks 1000000 --users 1000 --user-skew 3 --reset
+    python benchmarks/stub_firecrawl.py --latency 0.05 --pages 1
+    FCMANAGER_DATABASE=fcmanager_bench FCMANAGER_SERVICES=0 FCMANAGER_BIND=127.0.0.1:8003 gunicorn -c gunicorn.conf.py
+
+然后运行:
+    python benchmarks/bench_api.py --base-url http://127.0.0.1:8003 --database fcmanager_bench \\
+        --output results/$(git rev-parse --short HEAD).json
+
+结果为JSON，使用compare.py对比两次运行:
+    python benchmarks/compare.py results/base.json results/head.json
+
+场景:
+    get[...]         /fctask/get 的每种过滤条件组合(状态、类别、时间范围)
+    get_count[...]   /fctask/get 的各种总数统计方式
+    get_offset_deep  偏移分页的深页(用户任务列表的90%位置)
+    get_cursor_walk  游标分页逐页翻到与get_offset_deep相同的深度，按页统计延迟
+    stats            /fctask/stats 读取用户自己的任务统计
+    search[...]      /fctask/search 的全文关键词、前缀与URL子串搜索
+    create           普通用户创建任务(待审核，不调用Firecrawl)
+    audit            管理员审核待审核任务，结束后恢复为待审核
+    info_miss        /fctask/info 每个请求查询不同的爬虫任务，均未命中缓存
+    info_hit         /fctask/info 反复查询同一批爬虫任务，命中缓存
+    login            /user/login，耗时主要在bcrypt
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+import aiohttp
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_serving import make_token, run  # noqa: E402
+from database import DATABASE_CONFIG  # noqa: E402
+from fcmanager import FIRECRAWL_CONFIG, FirecrawlClient  # noqa: E402
+from seed import BENCH_PASSWORD  # noqa: E402
+
+SCENARIOS = ("get", "get_count", "get_offset_deep", "get_cursor_walk", "stats", "search",
+             "create",
+             "audit", "info_miss", "info_hit", "login")
+
+# 本次运行创建的任务以此为名称前缀，结束后删除
+CREATED_TASK_PREFIX = "bench-run "
+
+
+def describe_dataset(cursor) -> dict:
+    """读取数据集概况与基准测试使用的样本"""
+    cursor.execute("SELECT COUNT(*) FROM task")
+    tasks = cursor.fetchone()[0]
+    cursor.execute("SELECT role, COUNT(*) FROM account GROUP BY role")
+    accounts = dict(cursor.fetchall())
+
+    # 任务最多的用户，深分页场景以其任务列表为准
+    cursor.execute(
+        """
+        SELECT a.id, a.username, COUNT(*) AS tasks
+        FROM task t JOIN account a ON a.id = t.applicant_id
+        WHERE a.role = 'user'
+        GROUP BY a.id, a.username
+        ORDER BY tasks DESC
+        LIMIT 1
+    """
+    )
+    user = cursor.fetchone()
+    cursor.execute("SELECT id, username FROM account WHERE role = 'admin' ORDER BY id LIMIT 1")
+    admin = cursor.fetchone()
+    if user is None or admin is None:
+        raise SystemExit("数据集中缺少用户或管理员，请先运行seed.py")
+
+    cursor.execute(
+        """
+        SELECT category FROM task WHERE applicant_id = %s AND category IS NOT NULL
+        GROUP BY category ORDER BY COUNT(*) DESC LIMIT 1
+    """,
+        (user[0],),
+    )
+    category = cursor.fetchone()[0]
+    cursor.execute(
+        "SELECT username FROM account WHERE role = 'user' AND username LIKE %s ORDER BY id LIMIT 100",
+        ("bench_user_%",),
+    )
+    usernames = [row[0] for row in cursor.fetchall()]
+
+    return {
+        "tasks": tasks,
+        "accounts": accounts,
+        "user_id": user[0],
+        "user_tasks": user[2],
+        "admin_id": admin[0],
+        "category": category,
+        "usernames": usernames,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def get_scenarios(dataset: dict, page_size: int) -> list[tuple]:
+    """/fctask/get 的各场景: (名称, 查询参数)"""
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=30)
+    filters = {
+        "status": {"status": "approved"},
+        "category": {"category": dataset["category"]},
+        "date": {
+            "start_date": start_date.strftime("%Y-%m-%d %H:%M:%S"),
+            "end_date": end_date.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+    }
+
+    scenarios = []
+    for size in range(len(filters) + 1):
+        for names in itertools.combinations(filters, size):
+            params = {"page": 1, "page_size": page_size}
+            for name in names:
+                params.update(filters[name])
+            scenarios.append((f"get[{'+'.join(names) or 'none'}]", params))
+    return scenarios
+
+
+async def cursor_walk(base_url: str, token: str, pages: int, page_size: int) -> dict:
+    """沿next_cursor顺序翻页，每页的请求依赖上一页的响应，只能串行执行"""
+    latencies = []
+    errors = 0
+    cursor = None
+    async with aiohttp.ClientSession(
+        base_url,
+        headers={"Authorization": f"Bearer {token}"},
+        timeout=aiohttp.ClientTimeout(total=60),
+    ) as session:
+        started = time.perf_counter()
+        for _ in range(pages):
+            params = {"pagination": "cursor", "page_size": page_size, "count": "none"}
+            if cursor:
+                params["cursor"] = cursor
+            request_started = time.perf_counter()
+            async with session.get("/fctask/get", params=params) as response:
+                body = await response.json(content_type=None)
+            latencies.append(time.perf_counter() - request_started)
+            if response.status != 200:
+                errors += 1
+                break
+            cursor = body["data"].get("next_cursor")
+            if not cursor:
+                break
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "name": "get_cursor_walk",
+        "requests": len(latencies),
+        "concurrency": 1,
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000, 3),
+        "p99_ms": round(latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://127.0.0.1:5000")
+    parser.add_argument("--database", default="fcmanager_bench", help="待测服务使用的数据库")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="只运行指定场景，可重复指定，默认全部")
+    parser.add_argument("--requests", type=int, default=500, help="每个场景的请求数")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--login-requests", type=int, default=100, help="login场景的请求数")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--output", help="结果写入的JSON文件，默认只输出到标准输出")
+    args = parser.parse_args()
+    scenarios = args.scenario or SCENARIOS
+
+    config = {**DATABASE_CONFIG, "database": args.database}
+    connection = psycopg2.connect(**config)
+    connection.autocommit = True
+    cursor = connection.cursor()
+    dataset = describe_dataset(cursor)
+    user_token = make_token(dataset["user_id"])
+    admin_token = make_token(dataset["admin_id"])
+
+    def bench(name, make_request, token, total=args.requests, method="GET"):
+        result = asyncio.run(
+            run(name, args.base_url, make_request, total, args.concurrency, token, method)
+        )
+        print(json.dumps(result, ensure_ascii=False), file=sys.stderr)
+        results.append(result)
+
+    results = []
+    deep_page = max(int(dataset["user_tasks"] / args.page_size * 0.9), 1)
+
+    if "get" in scenarios:
+        for name, params in get_scenarios(dataset, args.page_size):
+            bench(name, lambda index, params=params: ("/fctask/get", params), user_token)
+
+    if "get_count" in scenarios:
+        for mode in ("exact", "estimate", "capped", "none"):
+            params = {"page": 1, "page_size": args.page_size, "count": mode}
+            bench(f"get_count[{mode}]", lambda index, params=params: ("/fctask/get", params), user_token)
+
+    if "get_offset_deep" in scenarios:
+        params = {"page": deep_page, "page_size": args.page_size, "count": "none"}
+        bench("get_offset_deep", lambda index: ("/fctask/get", params), user_token)
+
+    if "get_cursor_walk" in scenarios:
+        result = asyncio.run(cursor_walk(args.base_url, user_token, deep_page, args.page_size))
+        print(json.dumps(result, ensure_ascii=False), file=sys.stderr)
+        results.append(result)
+
+    if "stats" in scenarios:
+        bench("stats", lambda index: ("/fctask/stats", None), user_token)
+
+    if "search" in scenarios:
+        # 种子数据的名称形如"bench task N"、URL形如 https://siteN.example.com/N
+        for name, keyword in (("word", "task 4242"), ("prefix", "12345"), ("url", "site4242")):
+            params = {"q": keyword, "page_size": args.page_size}
+            bench(f"search[{name}]", lambda index, params=params: ("/fctask/search", params), user_token)
+
+    if "create" in scenarios:
+        bench(
+            "create",
+            lambda index: ("/fctask/create", {
+                "name": f"{CREATED_TASK_PREFIX}{index}",
+                "category": dataset["category"],
+                "site_url": f"https://bench.example.com/{index}",
+            }),
+            user_token,
+            method="POST",
+        )
+
+    if "audit" in scenarios:
+        cursor.execute(
+            "SELECT id FROM task WHERE status = 'pending' ORDER BY id LIMIT %s", (args.requests,)
+        )
+        task_ids = [row[0] for row in cursor.fetchall()]
+        if task_ids:
+            try:
+                bench(
+                    "audit",
+                    lambda index: ("/fctask/audit", {"task_id": task_ids[index], "is_approved": "1"}),
+                    admin_token,
+                    total=len(task_ids),
+                    method="POST",
+                )
+            finally:
+                # 恢复数据集，下次运行审核的是同一批任务
+                cursor.execute("DELETE FROM crawl_outbox WHERE task_id = ANY(%s)", (task_ids,))
+                cursor.execute(
+                    """
+                    UPDATE task SET status = 'pending', reviewer_id = NULL, approved_at = NULL
+                    WHERE id = ANY(%s)
+                """,
+                    (task_ids,),
+                )
+
+    if "info_miss" in scenarios or "info_hit" in scenarios:
+        firecrawl = FirecrawlClient(FIRECRAWL_CONFIG["api_url"])
+        crawl_ids = [
+            firecrawl.async_crawl_url(f"http://example.com/{index}")["id"]
+            for index in range(args.requests)
+        ]
+        firecrawl.close()
+        if "info_miss" in scenarios:
+            bench("info_miss", lambda index: ("/fctask/info", {"fc_task_id": crawl_ids[index]}), user_token)
+        if "info_hit" in scenarios:
+            # 先查询一遍写入缓存，预热的结果不计入
+            hot = crawl_ids[:10]
+            asyncio.run(run(
+                "info_hit_warmup", args.base_url,
+                lambda index: ("/fctask/info", {"fc_task_id": hot[index]}),
+                len(hot), 1, user_token,
+            ))
+            bench("info_hit", lambda index: ("/fctask/info", {"fc_task_id": hot[index % len(hot)]}),
+                  user_token)
+
+    if "login" in scenarios:
+        usernames = dataset["usernames"]
+        bench(
+            "login",
+            lambda index: ("/user/login", {
+                "username": usernames[index % len(usernames)],
+                "password": BENCH_PASSWORD,
+            }),
+            None,
+            total=args.login_requests,
+            method="POST",
+        )
+
+    cursor.execute("DELETE FROM task WHERE name LIKE %s", (CREATED_TASK_PREFIX + "%",))
+    connection.close()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "base_url": args.base_url,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "page_size": args.page_size,
+            "dataset": {key: value for key, value in dataset.items() if key != "usernames"},
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as file:
+            file.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+对比每次调用新建客户端与复用keep-alive客户端的Firecrawl调用延迟和吞吐
+
+用法:
+    python benchmarks/bench_firecrawl_client.py --requests 2000 --concurrency 8
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fcmanager import FirecrawlClient, close_firecrawl_clients, get_firecrawl_client  # noqa: E402
+from stub_firecrawl import serve  # noqa: E402
+
+
+def run(label: str, call, total: int, concurrency: int) -> dict:
+    latencies = []
+
+    def one(_):
+        started = time.perf_counter()
+        call()
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "name": label,
+        "requests": total,
+        "concurrency": concurrency,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99) - 1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=3902)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    server = serve(port=args.port, pages=1)
+    api_url = f"http://127.0.0.1:{args.port}"
+    crawl_id = FirecrawlClient(api_url).async_crawl_url("http://example.com")["id"]
+
+    def per_call_client():
+        # 与原先get_firecrawl_app()一样，每次调用都新建客户端和连接
+        client = FirecrawlClient(api_url)
+        try:
+            client.get_crawl_status_page(crawl_id)
+        finally:
+            client.close()
+
+    def shared_client():
+        get_firecrawl_client(api_url=api_url).get_crawl_status_page(crawl_id)
+
+    results = [
+        run("per_call_client", per_call_client, args.requests, args.concurrency),
+        run("shared_client", shared_client, args.requests, args.concurrency),
+    ]
+    close_firecrawl_clients()
+    server.shutdown()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+不同bcrypt cost和进程数下的登录(密码校验)吞吐
+
+用法:
+    python benchmarks/bench_password_hashing.py --costs 10 12 --workers 0 1 2 4 --logins 64
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import passwords  # noqa: E402
+
+
+def run(cost: int, workers: int, logins: int, concurrency: int) -> dict:
+    passwords.shutdown_password_pool()
+    passwords.PASSWORD_CONFIG["workers"] = workers
+    hashed = passwords._hashpw(b"benchmark123", cost)
+    passwords.verify_password("benchmark123", hashed)  # 预热进程池
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(
+            executor.map(
+                lambda _: passwords.verify_password("benchmark123", hashed), range(logins)
+            )
+        )
+    elapsed = time.perf_counter() - started
+    assert all(results)
+
+    return {
+        "name": "verify_password",
+        "cost": cost,
+        "workers": workers,
+        "concurrency": concurrency,
+        "logins": logins,
+        "logins_per_second": round(logins / elapsed, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--costs", type=int, nargs="+", default=[10, 12])
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16, help="模拟的并发请求线程数")
+    args = parser.parse_args()
+
+    results = [
+        run(cost, workers, args.logins, args.concurrency)
+        for cost in args.costs
+        for workers in args.workers
+    ]
+    passwords.shutdown_password_pool()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+任务列表响应的序列化耗时：原有路径(strftime + Flask jsonify)与快速路径(isoformat + orjson、columnar格式)
+
+不需要数据库，使用与列表查询结构相同的合成结果行。
+
+用法:
+    python benchmarks/bench_serialization.py --page-sizes 20 500 2000 --repeat 50
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask import json as flask_json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serialization  # noqa: E402
+from database import build_task_page  # noqa: E402
+
+
+def make_rows(count: int) -> list:
+    """构造与_TASK_LIST_COLUMNS列顺序一致的结果行，约一半任务带爬虫进度"""
+    rng = random.Random(count)
+    base = datetime(2025, 1, 1)
+    rows = []
+    for index in range(count):
+        created_at = base + timedelta(seconds=rng.randrange(30_000_000), microseconds=rng.randrange(10**6))
+        crawled = rng.random() < 0.5
+        rows.append((
+            index + 1,
+            f"任务 {index}",
+            f"synthetic task description {index}",
+            f"category_{rng.randrange(20)}",
+            f"https://site{index}.example.com/{index}",
+            None,
+            "approved" if crawled else "pending",
+            created_at,
+            created_at + timedelta(hours=1) if crawled else None,
+            f"fc-{index}" if crawled else None,
+            f"user_{rng.randrange(1000)}",
+            "admin_1" if crawled else None,
+            "completed" if crawled else None,
+            10 if crawled else None,
+            10 if crawled else None,
+            created_at + timedelta(hours=2) if crawled else None,
+        ))
+    return rows
+
+
+def legacy_row_to_dict(row) -> dict:
+    """改造前的逐行转换，保留用于对比"""
+    return {
+        "id": row[0],
+        "name": row[1],
+        "description": row[2],
+        "category": row[3],
+        "site_url": row[4],
+        "schedule": row[5],
+        "status": row[6],
+        "created_at": row[7].strftime("%Y-%m-%d %H:%M:%S"),
+        "approved_at": row[8].strftime("%Y-%m-%d %H:%M:%S") if row[8] else None,
+        "fc_task_id": row[9],
+        "applicant_name": row[10],
+        "reviewer_name": row[11],
+        "crawl": {
+            "status": row[12],
+            "completed": row[13],
+            "total": row[14],
+            "updated_at": row[15].strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        if row[12]
+        else None,
+    }
+
+
+def measure(func, repeat: int) -> float:
+    """返回单次调用的中位耗时(毫秒)"""
+    func()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def run(page_size: int, repeat: int, app: Flask) -> list:
+    rows = make_rows(page_size)
+
+    def envelope(tasks) -> dict:
+        data = {"total": 100000, "total_pages": 100000 // page_size, "current_page": 1, "tasks": tasks}
+        return {"success": True, "data": data, "message": "获取任务列表成功"}
+
+    def legacy() -> bytes:
+        # jsonify使用Flask应用的JSON设置(ensure_ascii、sort_keys)
+        with app.app_context():
+            return flask_json.dumps(envelope([legacy_row_to_dict(row) for row in rows])).encode()
+
+    def fast(task_format: str, backend: str):
+        def serialize() -> bytes:
+            serialization.SERIALIZATION_CONFIG["backend"] = backend
+            page = build_task_page(rows, 100000, 1, page_size, "offset", task_format)
+            return serialization.dumps({"success": True, "data": page, "message": "获取任务列表成功"})
+        return serialize
+
+    paths = {"legacy": legacy}
+    for backend in ("json", "orjson"):
+        if backend == "json" or serialization.orjson is not None:
+            paths[f"rows+{backend}"] = fast("rows", backend)
+            paths[f"columnar+{backend}"] = fast("columnar", backend)
+
+    legacy_tasks = json.loads(legacy())["data"]["tasks"]
+    results = []
+    for name, func in paths.items():
+        payload = func()
+        if name.startswith("rows"):
+            assert json.loads(payload)["data"]["tasks"] == legacy_tasks, f"{name} 输出与原有路径不一致"
+        gzip_ms = measure(lambda: serialization.compress(payload, "gzip"), repeat)
+        results.append({
+            "name": name,
+            "page_size": page_size,
+            "serialize_ms": round(measure(func, repeat), 3),
+            "bytes": len(payload),
+            "gzip_ms": round(gzip_ms, 3),
+            "gzip_bytes": len(serialization.compress(payload, "gzip")[0]),
+        })
+    serialization.SERIALIZATION_CONFIG["backend"] = "auto"
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[20, 500, 2000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    results = [result for page_size in args.page_sizes for result in run(page_size, args.repeat, app)]
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""
+对比不同服务模式(Flask开发服务器、gunicorn、ASGI)的吞吐和尾延迟
+
+先启动带延迟的桩服务(端口与FIRECRAWL_CONFIG["api_url"]一致)，再分别启动待测服务:
+    python benchmarks/stub_firecrawl.py --latency 0.2 --pages 1
+    python -c "from server import app; app.run(port=8001, threaded=True)"
+    FCMANAGER_BIND=127.0.0.1:8003 FCMANAGER_SERVICES=0 gunicorn -c gunicorn.conf.py
+    uvicorn asgi:app --port 8002
+
+然后运行:
+    python benchmarks/bench_serving.py --target flask=http://127.0.0.1:8001 \\
+        --target gunicorn=http://127.0.0.1:8003 --target async=http://127.0.0.1:8002 \\
+        --requests 1000 --concurrency 100 --crawls 1000
+
+默认压测/fctask/info，每个请求查询不同的爬虫任务ID，避免命中状态缓存，
+测得的是上游I/O占用请求的情况；--endpoint get压测/fctask/get的数据库查询。
+压测客户端使用aiohttp，httpx的连接池在上百并发时自身会成为瓶颈。
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+import uuid
+
+import aiohttp
+import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fcmanager import FIRECRAWL_CONFIG, FirecrawlClient  # noqa: E402
+from server import app  # noqa: E402
+
+
+def make_token(user_id: int) -> str:
+    """生成与flask_jwt_extended兼容的访问令牌"""
+    now = int(time.time())
+    claims = {
+        "sub": str(user_id),
+        "type": "access",
+        "fresh": False,
+        "jti": str(uuid.uuid4()),
+        "iat": now,
+        "nbf": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(claims, app.config["JWT_SECRET_KEY"], algorithm="HS256")
+
+
+async def run(name: str, base_url: str, make_request, total: int,
+              concurrency: int, token: str, method: str = "GET") -> dict:
+    """
+    以固定并发发送total个请求
+
+    Args:
+        make_request: 根据请求序号返回(path, params)，GET请求作为查询参数，其余方法作为表单提交
+        token: 访问令牌，为None时不带Authorization头
+        method: HTTP方法
+
+    Returns:
+        dict: 吞吐、错误数与延迟分位数
+    """
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async with aiohttp.ClientSession(
+        base_url,
+        headers={"Authorization": f"Bearer {token}"} if token else None,
+        timeout=aiohttp.ClientTimeout(total=60),
+        connector=aiohttp.TCPConnector(limit=concurrency),
+    ) as session:
+
+        async def worker():
+            nonlocal errors
+            for index in counter:
+                started = time.perf_counter()
+                try:
+                    path, params = make_request(index)
+                    if method == "GET":
+                        request = session.get(path, params=params)
+                    else:
+                        request = session.request(method, path, data=params)
+                    async with request as response:
+                        await response.read()
+                        if response.status != 200:
+                            errors += 1
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "name": name,
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": errors,
+        "rps": round(total / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 3),
+        "p95_ms": round(latencies[max(int(len(latencies) * 0.95) - 1, 0)] * 1000, 3),
+        "p99_ms": round(latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--target", action="append", required=True, metavar="NAME=URL",
+        help="待测服务，可重复指定",
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument(
+        "--endpoint", choices=["info", "get"], default="info",
+        help="info: 查询爬虫状态(上游I/O)；get: 任务列表(数据库查询)",
+    )
+    parser.add_argument("--crawls", type=int, default=2000, help="预先创建的爬虫任务数")
+    parser.add_argument("--user-id", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.endpoint == "info":
+        firecrawl = FirecrawlClient(FIRECRAWL_CONFIG["api_url"])
+        crawl_ids = [
+            firecrawl.async_crawl_url(f"http://example.com/{index}")["id"]
+            for index in range(args.crawls)
+        ]
+        firecrawl.close()
+
+        def make_request(index):
+            return "/fctask/info", {"fc_task_id": crawl_ids[index % len(crawl_ids)]}
+    else:
+        def make_request(index):
+            return "/fctask/get", {"page": index % 10 + 1, "page_size": 20}
+
+    token = make_token(args.user_id)
+    results = []
+    for target in args.target:
+        name, base_url = target.split("=", 1)
+        results.append(
+            asyncio.run(
+                run(name, base_url, make_request, args.requests, args.concurrency, token)
+            )
+        )
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+task分区的转换与维护检查
+
+在单独的数据库中生成跨多个月的任务，在线转换为分区表后依次检查:
+    1. 转换后行数、统计与外键级联删除与转换前一致；
+    2. 超出已建分区范围的任务写入默认分区后，维护任务仍能创建该月分区并把这些行移入；
+    3. 维护任务停机期间缺少的月份被补建，某个月份失败不影响其余分区与归档；
+    4. 归档与恢复分区时task_stats与task_id_map随之增减；
+    5. task_id_map保证分区表上的任务ID唯一，按id修改单个任务时只访问所在分区。
+
+用法:
+    python benchmarks/check_partitioning.py --database fcmanager_partition_check
+
+每次运行都会删除并重建目标数据库。全部检查通过时退出码为0。
+"""
+import argparse
+import os
+import sys
+from datetime import date
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database  # noqa: E402
+import partitioning  # noqa: E402
+from migrate import migrate  # noqa: E402
+from partitioning import (  # noqa: E402
+    DEFAULT_PARTITION,
+    PARTITION_CONFIG,
+    add_months,
+    archive_partitions,
+    convert_task_table,
+    ensure_future_partitions,
+    is_partitioned,
+    maintain_partitions,
+    partition_name,
+    restore_partition,
+)
+from seed import seed_accounts  # noqa: E402
+
+_failures = []
+
+
+def check(condition: bool, message: str):
+    print(f"{'通过' if condition else '失败'}: {message}")
+    if not condition:
+        _failures.append(message)
+
+
+def recreate_database(config: dict):
+    connection = psycopg2.connect(**{**config, "database": "postgres"})
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP DATABASE IF EXISTS "{config["database"]}" WITH (FORCE)')
+            cursor.execute(f'CREATE DATABASE "{config["database"]}"')
+    finally:
+        connection.close()
+
+
+def seed(cursor, tasks: int, months: int) -> list[int]:
+    """生成创建时间分布在最近months个月内的任务，部分已审核的任务带爬虫进度与outbox记录"""
+    user_ids = seed_accounts(cursor, "partition_user_", 5, "user", "x")
+    cursor.execute(
+        """
+        INSERT INTO task (applicant_id, created_at, name, category, site_url, status, fc_task_id)
+        SELECT
+            (%(users)s::int[])[1 + n %% 5],
+            date_trunc('month', LOCALTIMESTAMP) - (n %% %(months)s) * INTERVAL '1 month' + INTERVAL '1 hour',
+            'partition task ' || n,
+            'category_' || (n %% 3),
+            'https://site' || n || '.example.com',
+            CASE WHEN n %% 4 = 0 THEN 'approved' ELSE 'rejected' END,
+            CASE WHEN n %% 4 = 0 THEN 'partition-' || n END
+        FROM generate_series(1, %(tasks)s) AS n
+        """,
+        {"users": user_ids, "months": months, "tasks": tasks},
+    )
+    cursor.execute(
+        """
+        INSERT INTO crawl_status (fc_task_id, task_id, status, completed, total)
+        SELECT fc_task_id, id, 'completed', 1, 1 FROM task WHERE fc_task_id IS NOT NULL
+        """
+    )
+    cursor.execute(
+        """
+        INSERT INTO crawl_outbox (task_id, site_url, status)
+        SELECT id, site_url, 'done' FROM task WHERE fc_task_id IS NOT NULL
+        """
+    )
+    return user_ids
+
+
+def count(cursor, query: str, params=()) -> int:
+    cursor.execute(query, params)
+    return cursor.fetchone()[0]
+
+
+def insert_task(cursor, user_id: int, created_at: date, name: str) -> int:
+    cursor.execute(
+        """
+        INSERT INTO task (applicant_id, created_at, name, category, site_url, status)
+        VALUES (%s, %s, %s, 'category_0', 'https://late.example.com', 'rejected')
+        RETURNING id
+        """,
+        (user_id, created_at, name),
+    )
+    return cursor.fetchone()[0]
+
+
+def partition_of(cursor, task_id: int) -> str:
+    return count(cursor, "SELECT tableoid::regclass::text FROM task WHERE id = %s", (task_id,))
+
+
+def map_consistent(cursor) -> bool:
+    """task_id_map与task一一对应"""
+    return count(cursor, "SELECT COUNT(*) FROM task") == count(
+        cursor, "SELECT COUNT(*) FROM task t JOIN task_id_map m ON m.id = t.id AND m.created_at = t.created_at"
+    ) == count(cursor, "SELECT COUNT(*) FROM task_id_map")
+
+
+def scanned_partitions(cursor, query: str, params) -> list[str]:
+    """实际执行了扫描的task分区"""
+    cursor.execute("BEGIN")
+    cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}", params)
+    plan = cursor.fetchone()[0][0]["Plan"]
+    cursor.execute("ROLLBACK")
+    scanned = []
+    nodes = [plan]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get("Plans", []))
+        name = node.get("Relation Name", "")
+        if (name.startswith("task_p") or name == DEFAULT_PARTITION) and node.get("Actual Loops", 0) > 0:
+            scanned.append(name)
+    return scanned
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database", default="fcmanager_partition_check", help="检查用的数据库，每次运行都会重建")
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--months", type=int, default=6, help="任务创建时间分布的月数，至少为3")
+    args = parser.parse_args()
+
+    if args.database == "fcmanager":
+        parser.error("不能使用默认数据库")
+    if args.months < 3:
+        parser.error("--months至少为3")
+
+    # maintain_partitions与统计函数经连接池访问DATABASE_CONFIG指向的数据库
+    database.DATABASE_CONFIG["database"] = args.database
+    config = dict(database.DATABASE_CONFIG)
+    recreate_database(config)
+    migrate(config)
+
+    connection = psycopg2.connect(**config)
+    # 分区函数在各自的事务中执行DDL，检查使用自动提交的连接，不持有妨碍DDL的锁
+    maintenance = psycopg2.connect(**config)
+    try:
+        with connection.cursor() as cursor:
+            user_ids = seed(cursor, args.tasks, args.months)
+            connection.commit()
+            connection.autocommit = True
+            total = count(cursor, "SELECT COUNT(*) FROM task")
+            stats_before = database.get_task_stats()
+
+            convert_task_table(config, batch_size=max(args.tasks // 7, 1), progress=lambda message: None)
+            check(is_partitioned(cursor), "task已转换为分区表")
+            check(count(cursor, "SELECT COUNT(*) FROM task") == total, "转换后行数不变")
+            check(count(cursor, f"SELECT COUNT(*) FROM {DEFAULT_PARTITION}") == 0, "转换后默认分区为空")
+            database.fold_task_stats()
+            check(database.get_task_stats() == stats_before, "转换后统计不变")
+            check(database.reconcile_task_stats() == 0, "转换后统计无需校正")
+            check(map_consistent(cursor), "转换后task_id_map与task一致")
+
+            cursor.execute("SELECT id, created_at FROM task ORDER BY id LIMIT 1")
+            task_id, created_at = cursor.fetchone()
+            try:
+                cursor.execute(
+                    "INSERT INTO task (id, created_at, name) VALUES (%s, %s, 'duplicate')",
+                    (task_id, add_months(created_at.date().replace(day=1), 1)),
+                )
+                duplicated = True
+            except psycopg2.errors.UniqueViolation:
+                duplicated = False
+            check(not duplicated, "分区表上不能插入重复的任务ID")
+            scanned = scanned_partitions(
+                cursor,
+                f"UPDATE task SET name = name WHERE {database._TASK_BY_ID}",
+                (task_id, database._task_created_at(cursor, task_id)),
+            )
+            check(scanned == [partition_name(created_at.date().replace(day=1))], "按id修改任务时只访问所在分区")
+
+            task_id = count(cursor, "SELECT id FROM task WHERE fc_task_id IS NOT NULL LIMIT 1")
+            cursor.execute("DELETE FROM task WHERE id = %s", (task_id,))
+            check(
+                count(cursor, "SELECT COUNT(*) FROM crawl_outbox WHERE task_id = %s", (task_id,)) == 0
+                and count(cursor, "SELECT COUNT(*) FROM crawl_status WHERE task_id = %s", (task_id,)) == 0,
+                "删除任务时级联删除outbox与爬虫进度",
+            )
+            total -= 1
+
+            # 超出已建范围的月份: 任务先进入默认分区，创建分区时移入
+            current = partitioning._current_month(cursor)
+            late_month = add_months(current, PARTITION_CONFIG["premake_months"] + 2)
+            late_id = insert_task(cursor, user_ids[0], late_month, "late task")
+            check(partition_of(cursor, late_id) == DEFAULT_PARTITION, "超出范围的任务写入默认分区")
+            created = ensure_future_partitions(maintenance, PARTITION_CONFIG["premake_months"] + 2)
+            check(partition_name(late_month) in created, "默认分区中有该月任务时仍能创建分区")
+            check(partition_of(cursor, late_id) == partition_name(late_month), "默认分区中的任务移入新分区")
+            check(count(cursor, f"SELECT COUNT(*) FROM {DEFAULT_PARTITION}") == 0, "移动后默认分区为空")
+
+            # 维护任务停机: 删除最近的分区后补录该月任务，下次维护时补建
+            cursor.execute("DELETE FROM task WHERE id = %s", (late_id,))
+            cursor.execute(f"DROP TABLE {partition_name(late_month)}")
+            gap_month = add_months(current, 1)
+            cursor.execute(f"DROP TABLE {partition_name(gap_month)}")
+            cursor.execute(f"DROP TABLE {partition_name(add_months(current, 2))}")
+            gap_id = insert_task(cursor, user_ids[1], gap_month, "gap task")
+            # 更早的、从未建过分区的月份留在默认分区
+            old_id = insert_task(cursor, user_ids[1], add_months(current, -args.months - 12), "old task")
+            total += 2
+
+            PARTITION_CONFIG["retention_months"] = args.months - 2
+            try:
+                result = maintain_partitions()
+            finally:
+                PARTITION_CONFIG["retention_months"] = None
+            check(partition_name(gap_month) in result["created"], "补建维护停机期间缺少的分区")
+            check(partition_of(cursor, gap_id) == partition_name(gap_month), "补录的任务移入补建的分区")
+            check(partition_of(cursor, old_id) == DEFAULT_PARTITION, "没有对应分区的旧任务留在默认分区")
+            oldest = add_months(current, -(args.months - 1))
+            check(result["archived"] == [partition_name(oldest)], "维护任务归档过期分区")
+
+            archived = count(
+                cursor,
+                f"SELECT COUNT(*) FROM {PARTITION_CONFIG['archive_schema']}.{partition_name(oldest)}",
+            )
+            database.fold_task_stats()
+            check(
+                database.get_task_stats()["total"] == total - archived,
+                "归档的任务从统计中扣除",
+            )
+            check(map_consistent(cursor), "归档后task_id_map与task一致")
+            restore_partition(maintenance, partition_name(oldest))
+            database.fold_task_stats()
+            check(database.get_task_stats()["total"] == total, "恢复分区后统计还原")
+            check(count(cursor, "SELECT COUNT(*) FROM task") == total, "恢复分区后行数一致")
+            check(database.reconcile_task_stats() == 0, "维护与归档后统计无需校正")
+            check(map_consistent(cursor), "维护、归档与恢复后task_id_map与task一致")
+
+            results = archive_partitions(maintenance, add_months(current, 1), dry_run=True)
+            check(
+                all(not item["archived"] for item in results),
+                "dry run不归档任何分区",
+            )
+    finally:
+        maintenance.close()
+        connection.close()
+        database.close_connection_pool()
+
+    if _failures:
+        print(f"{len(_failures)} 项检查失败")
+        sys.exit(1)
+    print("全部检查通过")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+对比两次bench_api.py的结果
+
+用法:
+    python benchmarks/compare.py results/base.json results/head.json --threshold 10
+
+按场景名称对齐，吞吐下降或p99上升超过阈值(百分比)的场景标记为退化，存在退化时退出码为1。
+"""
+import argparse
+import json
+import sys
+
+
+def load(path: str) -> tuple[dict, dict]:
+    with open(path, encoding="utf-8") as file:
+        report = json.load(file)
+    return report.get("meta", {}), {result["name"]: result for result in report["results"]}
+
+
+def change(base: float, head: float) -> float:
+    """相对变化百分比"""
+    if not base:
+        return 0.0
+    return (head - base) / base * 100
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("base")
+    parser.add_argument("head")
+    parser.add_argument("--threshold", type=float, default=10.0, help="判定为退化的变化百分比")
+    args = parser.parse_args()
+
+    base_meta, base = load(args.base)
+    head_meta, head = load(args.head)
+    if base_meta.get("dataset", {}).get("tasks") != head_meta.get("dataset", {}).get("tasks"):
+        print("警告: 两次运行的数据集任务数不同，结果不可直接比较")
+
+    print(f"base: {base_meta.get('commit', '?')}  head: {head_meta.get('commit', '?')}")
+    print(f"{'场景':<32}{'rps':>20}{'变化':>9}{'p99(ms)':>24}{'变化':>9}")
+    regressions = []
+    for name in list(base) + [name for name in head if name not in base]:
+        if name not in base or name not in head:
+            print(f"{name:<32}  仅在{'head' if name in head else 'base'}中存在")
+            continue
+        old, new = base[name], head[name]
+        rps_change = change(old["rps"], new["rps"])
+        p99_change = change(old["p99_ms"], new["p99_ms"])
+        regressed = (
+            rps_change < -args.threshold
+            or p99_change > args.threshold
+            or new.get("errors", 0) > old.get("errors", 0)
+        )
+        if regressed:
+            regressions.append(name)
+        print(
+            f"{name:<32}{old['rps']:>9} -> {new['rps']:<8}{rps_change:>+8.1f}%"
+            f"{old['p99_ms']:>11} -> {new['p99_ms']:<10}{p99_change:>+8.1f}%"
+            + ("  退化" if regressed else "")
+        )
+
+    if regressions:
+        print(f"\n{len(regressions)} 个场景退化超过 {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
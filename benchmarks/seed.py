@@ -0,0 +1,229 @@
+"""
+生成基准测试数据集
+
+在单独的数据库中创建用户、管理员和任务，任务在数据库内由generate_series分批生成，
+千万级数据量也不需要经过Python。相同参数与--seed生成相同的数据。
+
+用法:
+    python benchmarks/seed.py --database fcmanager_bench --tasks 1000000 --users 1000 --reset
+    FCMANAGER_DATABASE=fcmanager_bench gunicorn -c gunicorn.conf.py
+
+用户与类别的分布由--user-skew/--category-skew控制: 1为均匀分布，
+取值越大任务越集中在排名靠前的少数用户(类别)上，如3时前10%的用户约占一半任务。
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import psycopg2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import DATABASE_CONFIG  # noqa: E402
+from migrate import migrate  # noqa: E402
+from passwords import hash_password  # noqa: E402
+
+# 基准测试用户的密码，所有用户共用同一哈希，避免生成数据时逐个计算bcrypt
+BENCH_PASSWORD = "bench1234"
+
+
+def parse_status_mix(value: str) -> dict[str, float]:
+    """解析 pending=0.2,approved=0.7,rejected=0.1 形式的状态比例"""
+    mix = {}
+    for item in value.split(","):
+        status, _, weight = item.partition("=")
+        if status not in ("pending", "approved", "rejected"):
+            raise argparse.ArgumentTypeError(f"无效的任务状态: {status}")
+        mix[status] = float(weight)
+    total = sum(mix.values())
+    if total <= 0:
+        raise argparse.ArgumentTypeError("状态比例之和必须大于0")
+    return {status: weight / total for status, weight in mix.items()}
+
+
+def ensure_database(config: dict):
+    """目标数据库不存在时创建"""
+    connection = psycopg2.connect(**{**config, "database": "postgres"})
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", (config["database"],))
+            if cursor.fetchone() is None:
+                cursor.execute(f'CREATE DATABASE "{config["database"]}"')
+                print(f"已创建数据库: {config['database']}")
+    finally:
+        connection.close()
+
+
+def seed_accounts(cursor, prefix: str, count: int, role: str, password_hash: str) -> list[int]:
+    cursor.execute(
+        """
+        INSERT INTO account (username, password, status, role, approved_at)
+        SELECT %s || n, %s, 'approved', %s, CURRENT_TIMESTAMP
+        FROM generate_series(1, %s) AS n
+        ON CONFLICT (username) DO NOTHING
+    """,
+        (prefix, password_hash, role, count),
+    )
+    # 按用户名序号排列，分布中的排名与用户名序号一致
+    cursor.execute(
+        """
+        SELECT id FROM account
+        WHERE username LIKE %s AND role = %s
+        ORDER BY substring(username FROM %s)::int
+        LIMIT %s
+    """,
+        (prefix + "%", role, len(prefix) + 1, count),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def seed_tasks(cursor, start: int, count: int, user_ids: list[int], admin_ids: list[int],
+               args, status_mix: dict[str, float]):
+    pending = status_mix.get("pending", 0)
+    approved = pending + status_mix.get("approved", 0)
+    # 先在子查询中取一次随机数，保证同一行的各列使用同一状态；
+    # 带fc_task_id的任务同时写入已完成的本地爬虫进度，同步器不会轮询它们
+    cursor.execute(
+        """
+        WITH inserted AS (
+        INSERT INTO task (
+            applicant_id, reviewer_id, created_at, approved_at, name, description,
+            category, site_url, status, fc_task_id
+        )
+        SELECT
+            (%(users)s::int[])[1 + floor(power(r.user_rank, %(user_skew)s) * %(user_count)s)::int],
+            CASE WHEN r.state >= %(pending)s
+                 THEN (%(admins)s::int[])[1 + floor(r.admin * %(admin_count)s)::int] END,
+            r.created_at,
+            CASE WHEN r.state >= %(pending)s
+                 THEN r.created_at + r.review_delay * INTERVAL '1 day' END,
+            'bench task ' || r.n,
+            'synthetic task ' || r.n,
+            'category_' || (1 + floor(power(r.category_rank, %(category_skew)s) * %(categories)s)::int),
+            'https://site' || (r.n %% 100000) || '.example.com/' || r.n,
+            CASE WHEN r.state < %(pending)s THEN 'pending'
+                 WHEN r.state < %(approved)s THEN 'approved'
+                 ELSE 'rejected' END,
+            CASE WHEN r.state >= %(pending)s AND r.state < %(approved)s
+                      AND r.crawl < %(crawl_ratio)s
+                 THEN 'bench-' || r.n END
+        FROM (
+            SELECT
+                n,
+                random() AS user_rank,
+                random() AS category_rank,
+                random() AS state,
+                random() AS admin,
+                random() AS crawl,
+                random() AS review_delay,
+                CURRENT_TIMESTAMP - random() * %(days)s * INTERVAL '1 day' AS created_at
+            FROM generate_series(%(start)s, %(stop)s) AS n
+        ) AS r
+        RETURNING id, fc_task_id, approved_at
+        )
+        INSERT INTO crawl_status (fc_task_id, task_id, status, completed, total, created_at, updated_at)
+        SELECT fc_task_id, id, 'completed', 10, 10, approved_at, approved_at
+        FROM inserted
+        WHERE fc_task_id IS NOT NULL
+    """,
+        {
+            "users": user_ids,
+            "user_count": len(user_ids),
+            "user_skew": args.user_skew,
+            "admins": admin_ids,
+            "admin_count": len(admin_ids),
+            "categories": args.categories,
+            "category_skew": args.category_skew,
+            "pending": pending,
+            "approved": approved,
+            "crawl_ratio": args.crawl_ratio,
+            "days": args.days,
+            "start": start,
+            "stop": start + count - 1,
+        },
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database", default="fcmanager_bench", help="目标数据库，不存在时自动创建")
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--admins", type=int, default=2)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--user-skew", type=float, default=1.0, help="1为均匀分布，越大越集中")
+    parser.add_argument("--category-skew", type=float, default=1.0, help="1为均匀分布，越大越集中")
+    parser.add_argument(
+        "--status-mix", type=parse_status_mix,
+        default="pending=0.2,approved=0.7,rejected=0.1",
+    )
+    parser.add_argument("--crawl-ratio", type=float, default=0.5, help="已审核任务中带爬虫进度的比例")
+    parser.add_argument("--days", type=float, default=365, help="创建时间分布在最近多少天内")
+    parser.add_argument("--batch-size", type=int, default=200000)
+    parser.add_argument("--seed", type=float, default=0.42, help="随机种子，取值-1到1")
+    parser.add_argument("--reset", action="store_true", help="清空目标数据库中的已有数据")
+    args = parser.parse_args()
+
+    if args.database == "fcmanager" and args.reset:
+        parser.error("不能清空默认数据库，请使用单独的基准测试数据库")
+
+    config = {**DATABASE_CONFIG, "database": args.database}
+    ensure_database(config)
+    migrate(config)
+
+    started = time.perf_counter()
+    connection = psycopg2.connect(**config)
+    try:
+        with connection.cursor() as cursor:
+            if args.reset:
+                cursor.execute(
+                    # TRUNCATE不触发行级触发器，task_stats_delta与task_id_map需要一并清空
+                    "TRUNCATE crawl_result, crawl_result_staging, crawl_status, crawl_outbox, task,"
+                    " task_stats, task_stats_delta, task_id_map, profile, account RESTART IDENTITY CASCADE"
+                )
+
+            password_hash = hash_password(BENCH_PASSWORD)
+            user_ids = seed_accounts(cursor, "bench_user_", args.users, "user", password_hash)
+            admin_ids = seed_accounts(cursor, "bench_admin_", args.admins, "admin", password_hash)
+            connection.commit()
+
+            cursor.execute("SELECT setseed(%s)", (args.seed,))
+            cursor.execute("SELECT COALESCE(MAX(id), 0) FROM task")
+            offset = cursor.fetchone()[0]
+            for start in range(1, args.tasks + 1, args.batch_size):
+                count = min(args.batch_size, args.tasks - start + 1)
+                seed_tasks(
+                    cursor, offset + start, count, user_ids, admin_ids, args, args.status_mix
+                )
+                connection.commit()
+                print(f"已生成任务 {start + count - 1}/{args.tasks}")
+
+        # 更新统计信息，基准测试的执行计划与生产环境的大表一致
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    finally:
+        connection.close()
+
+    summary = {
+        "database": args.database,
+        "tasks": args.tasks,
+        "users": args.users,
+        "admins": args.admins,
+        "categories": args.categories,
+        "user_skew": args.user_skew,
+        "category_skew": args.category_skew,
+        "status_mix": {status: round(weight, 4) for status, weight in args.status_mix.items()},
+        "crawl_ratio": args.crawl_ratio,
+        "seed": args.seed,
+        "elapsed_s": round(time.perf_counter() - started, 1),
+    }
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
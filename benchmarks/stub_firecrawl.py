@@ -0,0 +1,167 @@
+"""
+本地Firecrawl桩服务，实现基准测试用到的v1接口:
+
+    POST   /v1/crawl        提交爬虫任务
+    GET    /v1/crawl/<id>   查询状态，结果按页返回并带next链接
+    DELETE /v1/crawl/<id>   取消任务
+    GET    /health          健康检查
+
+用法:
+    python benchmarks/stub_firecrawl.py --port 3002 --latency 0.02 --pages 100
+"""
+import argparse
+import json
+import socket
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class StubState:
+    def __init__(self, latency: float, pages: int, page_size: int, crawl_seconds: float):
+        self.latency = latency
+        self.pages = pages
+        self.page_size = page_size
+        self.crawl_seconds = crawl_seconds
+        self.crawls = {}
+        self.lock = threading.Lock()
+
+    def progress(self, crawl: dict) -> tuple[str, int]:
+        if crawl["status"] == "cancelled":
+            return "cancelled", crawl["completed"]
+        elapsed = time.monotonic() - crawl["started"]
+        if self.crawl_seconds <= 0 or elapsed >= self.crawl_seconds:
+            return "completed", self.pages
+        return "scraping", int(self.pages * elapsed / self.crawl_seconds)
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # 支持keep-alive
+
+        def setup(self):
+            super().setup()
+            # 头和正文分两次写出，关闭Nagle避免keep-alive连接上的延迟确认等待
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: dict):
+            if state.latency:
+                time.sleep(state.latency)
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _read_json(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_POST(self):
+            if self.path != "/v1/crawl":
+                return self._send(404, {"success": False, "error": "not found"})
+            body = self._read_json()
+            crawl_id = str(uuid.uuid4())
+            with state.lock:
+                state.crawls[crawl_id] = {
+                    "url": body.get("url"),
+                    "status": "scraping",
+                    "completed": 0,
+                    "started": time.monotonic(),
+                }
+            host = self.headers.get("Host")
+            self._send(200, {"success": True, "id": crawl_id, "url": f"http://{host}/v1/crawl/{crawl_id}"})
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if parsed.path == "/health":
+                return self._send(200, {"success": True})
+            if not parsed.path.startswith("/v1/crawl/"):
+                return self._send(404, {"success": False, "error": "not found"})
+
+            crawl_id = parsed.path.rsplit("/", 1)[-1]
+            crawl = state.crawls.get(crawl_id)
+            if crawl is None:
+                return self._send(404, {"success": False, "error": "crawl not found"})
+
+            status, completed = state.progress(crawl)
+            skip = int(parse_qs(parsed.query).get("skip", ["0"])[0])
+            end = min(completed, skip + state.page_size)
+            data = [
+                {
+                    "markdown": f"# Page {i}\n\n" + "lorem ipsum " * 50,
+                    "metadata": {"sourceURL": f"{crawl['url']}/page/{i}", "statusCode": 200},
+                }
+                for i in range(skip, end)
+            ]
+            host = self.headers.get("Host")
+            next_url = (
+                f"http://{host}/v1/crawl/{crawl_id}?skip={end}" if end < completed else None
+            )
+            self._send(
+                200,
+                {
+                    "success": True,
+                    "status": status,
+                    "total": state.pages,
+                    "completed": completed,
+                    "creditsUsed": completed,
+                    "expiresAt": "2099-01-01T00:00:00.000Z",
+                    "next": next_url,
+                    "data": data,
+                },
+            )
+
+        def do_DELETE(self):
+            crawl_id = urlparse(self.path).path.rsplit("/", 1)[-1]
+            crawl = state.crawls.get(crawl_id)
+            if crawl is None:
+                return self._send(404, {"success": False, "error": "crawl not found"})
+            crawl["completed"] = state.progress(crawl)[1]
+            crawl["status"] = "cancelled"
+            self._send(200, {"status": "cancelled"})
+
+    return Handler
+
+
+def serve(
+    port: int = 3002,
+    latency: float = 0.0,
+    pages: int = 10,
+    page_size: int = 100,
+    crawl_seconds: float = 0.0,
+    host: str = "127.0.0.1",
+) -> ThreadingHTTPServer:
+    """在后台线程启动桩服务并返回server对象，调用server.shutdown()停止"""
+    state = StubState(latency, pages, page_size, crawl_seconds)
+    # 默认的listen队列长度为5，高并发建连时会因SYN重传产生秒级延迟
+    ThreadingHTTPServer.request_queue_size = 1024
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地Firecrawl桩服务")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=3002)
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的额外延迟(秒)")
+    parser.add_argument("--pages", type=int, default=10, help="每个爬虫任务的结果页数")
+    parser.add_argument("--page-size", type=int, default=100, help="每次响应返回的结果数")
+    parser.add_argument("--crawl-seconds", type=float, default=0.0, help="爬虫任务完成所需时间(秒)")
+    args = parser.parse_args()
+
+    server = serve(args.port, args.latency, args.pages, args.page_size, args.crawl_seconds, args.host)
+    print(f"Firecrawl桩服务已启动: http://{args.host}:{args.port}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,137 @@
+from datetime import datetime, timedelta
+
+
+_MONTH_NAMES = {
+    name: index
+    for index, name in enumerate(
+        ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"],
+        start=1,
+    )
+}
+_WEEKDAY_NAMES = {
+    name: index
+    for index, name in enumerate(["sun", "mon", "tue", "wed", "thu", "fri", "sat"])
+}
+
+_ALIASES = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+# 查找下一次触发时间时最多向后搜索的年数，超过则认为表达式永远不会触发(如2月30日)
+_MAX_SEARCH_YEARS = 5
+
+
+def _parse_value(value: str, names: dict) -> int:
+    value = value.lower()
+    if value in names:
+        return names[value]
+    return int(value)
+
+
+def _parse_field(field: str, low: int, high: int, names: dict = None) -> frozenset:
+    names = names or {}
+    values = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step <= 0:
+                raise ValueError(f"无效的步长: {step_text}")
+
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = _parse_value(start_text, names), _parse_value(end_text, names)
+        else:
+            start = _parse_value(part, names)
+            end = high if step > 1 else start
+
+        if start < low or end > high or start > end:
+            raise ValueError(f"取值超出范围[{low}-{high}]: {part}")
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronExpression:
+    """
+    五段式cron表达式: 分 时 日 月 周
+
+    支持 * , - / 、月份和星期的英文缩写以及@daily等别名；
+    日和周同时受限时按标准cron语义满足其一即可。
+
+    Raises:
+        ValueError: 表达式无效时抛出
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        text = _ALIASES.get(expression.strip().lower(), expression)
+        fields = text.split()
+        if len(fields) != 5:
+            raise ValueError(f"cron表达式必须包含5个字段: {expression}")
+
+        try:
+            self.minutes = _parse_field(fields[0], 0, 59)
+            self.hours = _parse_field(fields[1], 0, 23)
+            self.days = _parse_field(fields[2], 1, 31)
+            self.months = _parse_field(fields[3], 1, 12, _MONTH_NAMES)
+            weekdays = _parse_field(fields[4], 0, 7, _WEEKDAY_NAMES)
+        except ValueError as error:
+            raise ValueError(f"无效的cron表达式 {expression}: {error}")
+
+        # 7与0都表示星期日
+        self.weekdays = frozenset(day % 7 for day in weekdays)
+        # 与Vixie cron一致，以*开头的字段(包括*/2)视为不受限，日和周只有一个受限时按该字段匹配
+        self._any_day = fields[2].startswith("*")
+        self._any_weekday = fields[4].startswith("*")
+
+    def _day_matches(self, moment: datetime) -> bool:
+        day_ok = moment.day in self.days
+        # Python的weekday()以周一为0，cron以周日为0
+        weekday_ok = (moment.weekday() + 1) % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        计算严格晚于moment的下一次触发时间
+
+        Raises:
+            ValueError: 表达式在可搜索范围内不会触发时抛出
+        """
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment.year + _MAX_SEARCH_YEARS
+
+        while candidate.year <= limit:
+            if candidate.month not in self.months:
+                year = candidate.year + (candidate.month == 12)
+                month = candidate.month % 12 + 1
+                candidate = candidate.replace(
+                    year=year, month=month, day=1, hour=0, minute=0
+                )
+                continue
+
+            if not self._day_matches(candidate):
+                candidate = candidate.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+
+            if candidate.hour not in self.hours:
+                candidate = candidate.replace(minute=0) + timedelta(hours=1)
+                continue
+
+            if candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+                continue
+
+            return candidate
+
+        raise ValueError(f"cron表达式不会触发: {self.expression}")
@@ -1,9 +1,20 @@
-from psycopg2 import Error, connect
+from psycopg2 import Error, OperationalError
+from psycopg2.extras import execute_values
 from datetime import datetime, timedelta
-import bcrypt
+import base64
+import io
+import json
+import os
+import re
+import threading
+import uuid
 import schedule
 import time
-from fcmanager import create_crawl_task
+from cache import TTLCache
+from dbpool import ConnectionPool
+from metrics import register_collector, timed_query
+from migrate import migrate
+from passwords import hash_password, needs_rehash, verify_password
 
 
 class DatabaseError(Exception):
@@ -11,102 +22,213 @@ class DatabaseError(Exception):
     pass
 
 
+DATABASE_CONFIG = {
+    "user": "postgres",
+    "password": "P@ssword0",
+    "host": "127.0.0.1",
+    "port": "5432",
+    "database": os.environ.get("FCMANAGER_DATABASE", "fcmanager"),  # 基准测试时指向单独的数据库
+}
+
+# 连接池配置
+POOL_CONFIG = {
+    "min_size": 2,
+    "max_size": 20,
+    "timeout": 5.0,  # 借出连接的等待超时(秒)
+    "health_check": True,
+    "max_idle": 30.0,  # 空闲超过该秒数的连接在借出时执行SELECT 1探测
+}
+
+# 用户角色缓存配置
+ROLE_CACHE_CONFIG = {
+    "max_size": 10000,
+    "ttl": 60.0,  # 秒，其他进程修改角色后最多在该时间内仍读到旧值
+}
+
+# 用户档案缓存配置
+PROFILE_CACHE_CONFIG = {
+    "max_size": 10000,
+    "ttl": 300.0,  # 秒，其他进程修改档案后最多在该时间内仍读到旧值
+}
+
+# 爬虫任务所在后端的缓存配置；任务提交后不会更换后端，只受容量限制
+CRAWL_BACKEND_CACHE_CONFIG = {
+    "max_size": 10000,
+    "ttl": None,
+}
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+# fork前创建的连接池，子进程中保持引用而不关闭也不回收，
+# 避免其连接析构时在与父进程共享的socket上发送Terminate
+_inherited_pools = []
+_role_cache = TTLCache(**ROLE_CACHE_CONFIG)
+_profile_cache = TTLCache(**PROFILE_CACHE_CONFIG)
+_crawl_backend_cache = TTLCache(**CRAWL_BACKEND_CACHE_CONFIG)
+_NOT_CACHED = object()
+
+
+def get_connection_pool() -> ConnectionPool:
+    """获取进程内共享的连接池，首次调用或fork后在子进程中首次调用时创建"""
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                if _pool is not None:
+                    _inherited_pools.append(_pool)
+                _pool = ConnectionPool(DATABASE_CONFIG, **POOL_CONFIG)
+                _pool_pid = os.getpid()
+    return _pool
+
+
+def close_connection_pool():
+    """关闭连接池，下次获取连接时会重新创建"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            if _pool_pid == os.getpid():
+                _pool.close()
+            else:
+                _inherited_pools.append(_pool)
+        _pool = None
+
+
+def get_pool_stats() -> dict:
+    """
+    获取连接池统计信息
+
+    Returns:
+        dict: 使用中连接数、等待时间、借出失败次数等
+    """
+    if _pool is None:
+        return {"size": 0, "in_use": 0, "idle": 0}
+    return _pool.stats()
+
+
+def _collect_pool_metrics() -> list[tuple]:
+    stats = get_pool_stats()
+    return [
+        ("fcmanager_db_pool_size", "gauge", "连接池中的连接数", stats["size"]),
+        ("fcmanager_db_pool_max_size", "gauge", "连接池最大连接数", stats.get("max_size", 0)),
+        ("fcmanager_db_pool_in_use", "gauge", "使用中的连接数", stats["in_use"]),
+        ("fcmanager_db_pool_idle", "gauge", "空闲连接数", stats["idle"]),
+        ("fcmanager_db_pool_checkouts_total", "counter", "借出连接次数", stats.get("checkouts", 0)),
+        ("fcmanager_db_pool_checkout_failures_total", "counter", "借出连接失败次数",
+         stats.get("checkout_failures", 0)),
+        ("fcmanager_db_pool_timeouts_total", "counter", "等待连接超时次数", stats.get("timeouts", 0)),
+        ("fcmanager_db_pool_wait_seconds_total", "counter", "等待连接的总时间",
+         stats.get("wait_time_total", 0.0)),
+        ("fcmanager_db_pool_wait_seconds_max", "gauge", "单次等待连接的最长时间",
+         stats.get("wait_time_max", 0.0)),
+    ]
+
+
+register_collector(_collect_pool_metrics)
+
+
 def get_database_connection():
-    try:
-        connection = connect(
-            user="postgres",
-            password="P@ssword0",
-            host="127.0.0.1",
-            port="5432",
-            database="fcmanager",
-        )
-        return connection
-    except Exception as error:
-        print("连接PostgreSQL时发生错误:", error)
-        return None
+    """
+    从连接池借出连接，用法: with get_database_connection() as connection
+
+    退出with块时正常结束则提交、异常则回滚，随后连接归还连接池。
+
+    Raises:
+        PoolError: 连接池耗尽超时或无法建立连接时抛出
+    """
+    return get_connection_pool().connection()
 
 
 def init_database():
-    # 连接到PostgreSQL数据库
-    with get_database_connection() as connection:
-        if connection is None:
-            print("无法连接到数据库")
-            exit(-1)
-
-        # 创建cursor以执行数据库操作
-        cursor = connection.cursor()
-
-        # 创建account表
-        create_account_table = """
-            CREATE TABLE IF NOT EXISTS account (
-                id SERIAL PRIMARY KEY,
-                username VARCHAR(50) UNIQUE NOT NULL,
-                password VARCHAR(100) NOT NULL,
-                status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- pending, approved, rejected
-                role VARCHAR(20) NOT NULL DEFAULT 'user',  -- user, admin
-                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                approved_at TIMESTAMP,
-                approved_by INTEGER REFERENCES account(id),
-                CONSTRAINT valid_status CHECK (status IN ('pending', 'approved', 'rejected')),
-                CONSTRAINT valid_role CHECK (role IN ('user', 'admin'))
-            );
-        """
+    """执行migrations/目录下未应用的迁移，数据库已是最新版本时直接返回"""
+    try:
+        migrate(DATABASE_CONFIG)
+    except OperationalError as error:
+        print("无法连接到数据库:", error)
+        exit(-1)
 
-        # 创建profile表
-        create_profile_table = """
-            CREATE TABLE IF NOT EXISTS profile (
-                user_id INTEGER REFERENCES account(id) PRIMARY KEY,
-                nickname VARCHAR(50),
-                name VARCHAR(50),
-                department VARCHAR(100),
-                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-        """
+    print("数据库初始化成功")
 
-        # 创建task表
-        create_task_table = """
-            CREATE TABLE IF NOT EXISTS task (
-                id SERIAL PRIMARY KEY,
-                applicant_id INTEGER REFERENCES account(id),
-                reviewer_id INTEGER REFERENCES account(id),
-                created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
-                approved_at TIMESTAMP,
-                name VARCHAR(100) NOT NULL,
-                description TEXT,
-                category VARCHAR(100),
-                site_url VARCHAR(200),
-                schedule VARCHAR(100),
-                status VARCHAR(20) NOT NULL DEFAULT 'pending',
-                fc_task_id VARCHAR(100),
-                CONSTRAINT valid_task_status CHECK (status IN ('pending', 'approved', 'rejected'))
-            );
-        """
 
-        # 创建task相关的索引
-        create_task_applicant_index = """
-            CREATE INDEX IF NOT EXISTS idx_task_applicant 
-            ON task(applicant_id);
-        """
+def _find_seq_scans(plan: dict, relations: set) -> list[dict]:
+    """在EXPLAIN计划树中查找对指定表(及其分区)的顺序扫描节点"""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in relations:
+        found.append(plan)
+    for child in plan.get("Plans", []):
+        found.extend(_find_seq_scans(child, relations))
+    return found
 
-        create_task_reviewer_index = """
-            CREATE INDEX IF NOT EXISTS idx_task_reviewer
-            ON task(reviewer_id);
-        """
 
-        # 执行创建表的SQL语句
-        cursor.execute(create_account_table)
-        cursor.execute(create_profile_table)
-        cursor.execute(create_task_table)
-        cursor.execute(create_task_applicant_index)
-        cursor.execute(create_task_reviewer_index)
+def check_task_indexes() -> list[dict]:
+    """
+    对get_tasks的所有过滤条件组合执行EXPLAIN，报告仍使用顺序扫描的组合
+
+    过滤值取自task表中的现有数据；表很小时规划器本就倾向于顺序扫描，结果以大表为准。
+
+    Returns:
+        list[dict]: 每个组合的 {'filters': 过滤条件列表, 'seq_scan': 是否顺序扫描, 'total_cost': 估算代价}
+    """
+    filter_names = ["user_id", "status", "category", "date_range"]
+
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT applicant_id, category
+                    FROM task
+                    WHERE applicant_id IS NOT NULL AND category IS NOT NULL
+                    LIMIT 1
+                """
+                )
+                sample = cursor.fetchone() or (1, "default")
+                # task转换为分区表后，计划中的扫描节点为各个分区
+                cursor.execute(
+                    "SELECT inhrelid::regclass::text FROM pg_inherits WHERE inhparent = 'task'::regclass"
+                )
+                relations = {"task"} | {row[0] for row in cursor.fetchall()}
+                end_date = datetime.now()
+                start_date = end_date - timedelta(days=30)
+
+                report = []
+                for mask in range(1 << len(filter_names)):
+                    enabled = [
+                        name for bit, name in enumerate(filter_names) if mask & (1 << bit)
+                    ]
+                    where, params = _build_task_filters(
+                        user_id=sample[0] if "user_id" in enabled else None,
+                        status="pending" if "status" in enabled else None,
+                        category=sample[1] if "category" in enabled else None,
+                        start_date=start_date if "date_range" in enabled else None,
+                        end_date=end_date if "date_range" in enabled else None,
+                    )
+                    cursor.execute(
+                        "EXPLAIN (FORMAT JSON) "
+                        + _TASK_LIST_COLUMNS
+                        + where
+                        + " ORDER BY t.created_at DESC, t.id DESC LIMIT 20",
+                        params,
+                    )
+                    plan = cursor.fetchone()[0]
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    root = plan[0]["Plan"]
+                    report.append(
+                        {
+                            "filters": enabled,
+                            "seq_scan": bool(_find_seq_scans(root, relations)),
+                            "total_cost": root.get("Total Cost"),
+                        }
+                    )
+                return report
 
-        # 提交事务
-        connection.commit()
-        print("数据库初始化成功")
+    except Exception as error:
+        raise DatabaseError(f"检查任务索引时发生错误: {str(error)}")
 
 
 # region 用户管理
+@timed_query
 def create_user(username: str, password: str) -> str:
     """
     创建新用户
@@ -138,28 +260,24 @@ def create_user(username: str, password: str) -> str:
     if not len(password) >= 8:
         raise ValueError("密码长度必须大于八位")
 
+    # 哈希在进程池中计算，期间不占用数据库连接
+    hashed_password = hash_password(password)
+
     try:
         with get_database_connection() as connection:
             with connection.cursor() as cursor:
-                # 检查用户名是否已存在
-                cursor.execute(
-                    "SELECT id FROM account WHERE username = %s", (username,)
-                )
-                if cursor.fetchone():
-                    raise ValueError("用户名已存在")
-
-                # 使用bcrypt加密密码
-                salt = bcrypt.gensalt()
-                hashed_password = bcrypt.hashpw(password.encode(), salt)
-
-                # 插入新用户
+                # 插入新用户，用户名已存在时不插入
                 cursor.execute(
                     """
                     INSERT INTO account (username, password)
                     VALUES (%s, %s)
+                    ON CONFLICT (username) DO NOTHING
+                    RETURNING id
                     """,
-                    (username, hashed_password.decode()),
+                    (username, hashed_password),
                 )
+                if not cursor.fetchone():
+                    raise ValueError("用户名已存在")
 
                 connection.commit()
                 return "用户创建成功"
@@ -168,26 +286,13 @@ def create_user(username: str, password: str) -> str:
         raise DatabaseError(f"创建用户时发生错误: {str(error)}")
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """
-    验证密码是否正确
-
-    Args:
-        plain_password: 明文密码
-        hashed_password: 数据库中存储的哈希密码
-
-    Returns:
-        bool: 密码是否匹配
-    """
-    return bcrypt.checkpw(
-        plain_password.encode("utf-8"), hashed_password.encode("utf-8")
-    )
-
-
+@timed_query
 def login(username: str, password: str) -> tuple[int, str]:
     """
     用户登录
 
+    查询完成后立即归还连接再校验密码；存储的哈希cost与配置不同时顺带重新计算。
+
     Returns:
         tuple[int, str]: (用户ID, 消息)
     """
@@ -199,84 +304,189 @@ def login(username: str, password: str) -> tuple[int, str]:
                 )
                 result = cursor.fetchone()
 
-                if not result:
-                    raise ValueError("用户名不存在")
+        if not result:
+            raise ValueError("用户名不存在")
 
-                user_id, hashed_password = result
+        user_id, hashed_password = result
 
-                if verify_password(password, hashed_password):
-                    return user_id, "登录成功"
-                else:
-                    raise ValueError("密码错误")
+        if not verify_password(password, hashed_password):
+            raise ValueError("密码错误")
+
+        if needs_rehash(hashed_password):
+            try:
+                rehash_password(user_id, hashed_password, hash_password(password))
+            except Exception as error:
+                # 升级哈希失败不影响本次登录
+                print(f"更新密码哈希时发生错误: {error}")
+
+        return user_id, "登录成功"
 
     except (Exception, Error) as error:
         raise DatabaseError(f"登录时发生错误: {str(error)}")
 
 
-def cleanup_pending_accounts(days: int = 7) -> int:
+@timed_query
+def rehash_password(user_id: int, old_hash: str, new_hash: str) -> bool:
     """
-    清理指定天数内未审核的账户及其关联数据
+    替换存储的密码哈希，仅当存储值仍为old_hash时才写入，避免覆盖并发修改
+
+    Returns:
+        bool: 是否写入
+    """
+    with get_database_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE account SET password = %s WHERE id = %s AND password = %s",
+                (new_hash, user_id, old_hash),
+            )
+            updated = cursor.rowcount == 1
+            connection.commit()
+            return updated
+
+
+@timed_query
+def purge_pending_accounts(
+    days: int = 7, batch_size: int = 500, dry_run: bool = False, progress=None
+) -> dict:
+    """
+    分批清理超过指定天数仍未审核的账户及其profile和task
+
+    每批用一条语句删除一组过期账户及关联数据并单独提交，锁只持有一个批次的时间；
+    被其他事务锁定的账户跳过，留待下次清理。
 
     Args:
         days: 待清理账户的天数阈值（默认7天）
+        batch_size: 每批删除的账户数
+        dry_run: 为True时只统计将被删除的数量，不删除
+        progress: 每批提交后以统计信息字典调用的回调，可选
 
     Returns:
-        int: 清理的账户数量
+        dict: {'accounts', 'profiles', 'tasks', 'batches', 'elapsed', 'accounts_per_second', 'dry_run'}
+
+    Raises:
+        DatabaseError: 数据库操作错误时抛出
     """
+    stats = {
+        "accounts": 0,
+        "profiles": 0,
+        "tasks": 0,
+        "batches": 0,
+        "elapsed": 0.0,
+        "accounts_per_second": 0.0,
+        "dry_run": dry_run,
+    }
     if days < 0:
-        return 0
-
-    try:
-        with get_database_connection() as connection:
-            with connection.cursor() as cursor:
-                # 计算指定天数前的时间
-                threshold_date = datetime.now() - timedelta(days=days)
-
-                # 开始事务
-                cursor.execute("BEGIN")
-
-                # 获取需要清理的账户ID
-                cursor.execute(
-                    """
-                    SELECT id FROM account 
-                    WHERE status = 'pending' 
-                    AND created_at < %s
-                """,
-                    (threshold_date,),
-                )
+        return stats
 
-                pending_accounts = cursor.fetchall()
+    threshold_date = datetime.now() - timedelta(days=days)
+    started = time.monotonic()
 
-                for (account_id,) in pending_accounts:
-                    # 删除关联的profile记录
+    try:
+        if dry_run:
+            with get_database_connection() as connection:
+                with connection.cursor() as cursor:
                     cursor.execute(
-                        "DELETE FROM profile WHERE user_id = %s", (account_id,)
+                        """
+                        WITH stale AS (
+                            SELECT id FROM account
+                            WHERE status = 'pending' AND created_at < %s
+                        )
+                        SELECT
+                            (SELECT COUNT(*) FROM stale),
+                            (SELECT COUNT(*) FROM profile p
+                             WHERE p.user_id IN (SELECT id FROM stale)),
+                            (SELECT COUNT(*) FROM task t
+                             WHERE t.applicant_id IN (SELECT id FROM stale)
+                             OR t.reviewer_id IN (SELECT id FROM stale))
+                    """,
+                        (threshold_date,),
                     )
+                    stats["accounts"], stats["profiles"], stats["tasks"] = cursor.fetchone()
+                    stats["elapsed"] = round(time.monotonic() - started, 3)
+                    return stats
 
-                    # 删除关联的task记录
+        while True:
+            with get_database_connection() as connection:
+                with connection.cursor() as cursor:
                     cursor.execute(
                         """
-                        DELETE FROM task 
-                        WHERE applicant_id = %s OR reviewer_id = %s
+                        WITH stale AS (
+                            SELECT id FROM account
+                            WHERE status = 'pending' AND created_at < %s
+                            ORDER BY id
+                            LIMIT %s
+                            FOR UPDATE SKIP LOCKED
+                        ),
+                        deleted_profile AS (
+                            DELETE FROM profile p USING stale s
+                            WHERE p.user_id = s.id
+                            RETURNING 1
+                        ),
+                        deleted_task AS (
+                            DELETE FROM task t USING stale s
+                            WHERE t.applicant_id = s.id OR t.reviewer_id = s.id
+                            RETURNING 1
+                        ),
+                        deleted_account AS (
+                            DELETE FROM account a USING stale s
+                            WHERE a.id = s.id
+                            RETURNING a.id
+                        )
+                        SELECT
+                            (SELECT COALESCE(array_agg(id), '{}') FROM deleted_account),
+                            (SELECT COUNT(*) FROM deleted_profile),
+                            (SELECT COUNT(*) FROM deleted_task)
                     """,
-                        (account_id, account_id),
+                        (threshold_date, batch_size),
                     )
+                    account_ids, profile_count, task_count = cursor.fetchone()
+                    connection.commit()
 
-                    # 删除account记录
-                    cursor.execute("DELETE FROM account WHERE id = %s", (account_id,))
+            if not account_ids:
+                break
 
-                # 提交事务
-                cursor.execute("COMMIT")
+            for account_id in account_ids:
+                invalidate_user_role(account_id)
 
-                return len(pending_accounts)
+            stats["accounts"] += len(account_ids)
+            stats["profiles"] += profile_count
+            stats["tasks"] += task_count
+            stats["batches"] += 1
+            elapsed = time.monotonic() - started
+            stats["elapsed"] = round(elapsed, 3)
+            stats["accounts_per_second"] = round(stats["accounts"] / elapsed, 1) if elapsed else 0.0
+            if progress:
+                progress(dict(stats))
 
-    except (Exception, Error) as error:
-        if connection:
-            connection.rollback()
+            if len(account_ids) < batch_size:
+                break
+
+        return stats
+
+    except Exception as error:
+        raise DatabaseError(f"清理过期账户时发生错误: {str(error)}")
+
+
+@timed_query
+def cleanup_pending_accounts(days: int = 7) -> int:
+    """
+    清理指定天数内未审核的账户及其关联数据
+
+    Args:
+        days: 待清理账户的天数阈值（默认7天）
+
+    Returns:
+        int: 清理的账户数量
+    """
+    try:
+        return purge_pending_accounts(days)["accounts"]
+
+    except DatabaseError as error:
         print(f"清理过期账户时发生错误: {error}")
         return 0
 
 
+@timed_query
 def approve_account(account_id: int, admin_id: int) -> str:
     """
     审核用户账户
@@ -323,12 +533,14 @@ def approve_account(account_id: int, admin_id: int) -> str:
                 )
 
                 connection.commit()
+                invalidate_user_role(account_id)
                 return "审核通过"
 
     except (Exception, Error) as error:
         raise Exception(f"审核账户时发生错误: {str(error)}")
 
 
+@timed_query
 def reject_account(account_id: int, admin_id: int, reason: str = "") -> str:
     """
     拒绝用户账户
@@ -363,6 +575,7 @@ def reject_account(account_id: int, admin_id: int, reason: str = "") -> str:
                     raise Exception("账户不存在或已经被审核")
 
                 connection.commit()
+                invalidate_user_role(account_id)
                 return "已拒绝该账户申请"
 
     except (Exception, Error) as error:
@@ -377,6 +590,7 @@ def schedule_cleanup():
         time.sleep(3600)  # 每小时检查一次
 
 
+@timed_query
 def update_or_create_profile(
     user_id: int, nickname: str, name: str, department: str
 ) -> str:
@@ -398,27 +612,28 @@ def update_or_create_profile(
     try:
         with get_database_connection() as connection:
             with connection.cursor() as cursor:
-                # 先检查记录是否存在
                 cursor.execute(
-                    f"""
+                    """
                     INSERT INTO profile (user_id, nickname, name, department)
-                    VALUES (%s, %s, %s, '{department}')
+                    VALUES (%s, %s, %s, %s)
                     ON CONFLICT (user_id) 
                     DO UPDATE SET
                         nickname = EXCLUDED.nickname,
                         name = EXCLUDED.name,
-                        department = '{department}',
+                        department = EXCLUDED.department,
                         updated_at = CURRENT_TIMESTAMP
                 """,
-                    (user_id, nickname, name),
+                    (user_id, nickname, name, department),
                 )
 
                 connection.commit()
+                _profile_cache.invalidate(int(user_id))
                 return "个人信息更新成功"
 
     except (Exception, Error) as error:
         raise DatabaseError(f"更新个人信息时发生错误: {str(error)}")
 
+@timed_query
 def get_profile(user_id: int, include_timestamps: bool = False) -> dict:
     """
     获取用户档案信息
@@ -478,16 +693,122 @@ def get_profile(user_id: int, include_timestamps: bool = False) -> dict:
         raise DatabaseError(f"获取用户档案时发生错误: {str(error)}")
 
 
-def get_user_role(user_id: int) -> str:
+def get_or_create_profile(user_id: int, use_cache: bool = True) -> dict:
+    """
+    获取用户档案，不存在时以用户名为昵称创建默认档案，优先读取档案缓存
+
+    创建与读取在同一条语句中完成，首次访问也只需一次查询
+
+    Args:
+        user_id: 用户ID
+        use_cache: 是否使用缓存，默认为True
+
+    Returns:
+        dict: 包含nickname、name、department、role、updated_at的字典
+
+    Raises:
+        ValueError: 用户不存在时抛出
+        DatabaseError: 数据库操作错误时抛出
+    """
+    user_id = int(user_id)
+    if use_cache:
+        profile = _profile_cache.get(user_id)
+        if profile is not None:
+            return dict(profile)
+
+    profile = _query_profile(user_id)
+    _profile_cache.set(user_id, profile)
+    return dict(profile)
+
+
+# 缓存命中不计入数据库耗时，只对查询部分计时
+@timed_query
+def _query_profile(user_id: int) -> dict:
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                # 插入成功时由RETURNING返回新档案；已存在时INSERT不返回行，由第二个分支读取。
+                # 并发请求同时创建时，等待的一方在本语句的快照中看不到对方提交的档案，重试一次即可读到
+                for _ in range(2):
+                    cursor.execute(
+                        """
+                        WITH a AS (
+                            SELECT id, username, role FROM account WHERE id = %s
+                        ),
+                        inserted AS (
+                            INSERT INTO profile (user_id, nickname, name, department)
+                            SELECT id, username, '', '' FROM a
+                            ON CONFLICT (user_id) DO NOTHING
+                            RETURNING nickname, name, department, updated_at
+                        )
+                        SELECT i.nickname, i.name, i.department, i.updated_at, a.role
+                        FROM inserted i CROSS JOIN a
+                        UNION ALL
+                        SELECT p.nickname, p.name, p.department, p.updated_at, a.role
+                        FROM profile p JOIN a ON p.user_id = a.id
+                        """,
+                        (user_id,),
+                    )
+                    result = cursor.fetchone()
+                    connection.commit()
+                    if result:
+                        break
+                else:
+                    raise ValueError("用户不存在")
+
+    except ValueError:
+        raise
+    except Exception as error:
+        raise DatabaseError(f"获取用户档案时发生错误: {str(error)}")
+
+    profile = {
+        "nickname": result[0],
+        "name": result[1],
+        "department": result[2],
+        "role": result[4],
+        "updated_at": result[3].isoformat(),
+    }
+    return profile
+
+
+def invalidate_profile(user_id: int = None):
+    """
+    使档案缓存失效
+
+    Args:
+        user_id: 用户ID，为None时清空整个缓存
+    """
+    if user_id is None:
+        _profile_cache.clear()
+    else:
+        _profile_cache.invalidate(int(user_id))
+
+
+def get_user_role(user_id: int, use_cache: bool = True) -> str:
     """
-    获取用户角色
+    获取用户角色，优先读取角色缓存
 
     Args:
         user_id: 用户ID
+        use_cache: 是否使用缓存，默认为True
 
     Returns:
         str: 用户角色
     """
+    user_id = int(user_id)
+    if use_cache:
+        role = _role_cache.get(user_id)
+        if role is not None:
+            return role
+
+    role = _query_user_role(user_id)
+    _role_cache.set(user_id, role)
+    return role
+
+
+# 缓存命中不计入数据库耗时，只对查询部分计时
+@timed_query
+def _query_user_role(user_id: int) -> str:
     try:
         with get_database_connection() as connection:
             with connection.cursor() as cursor:
@@ -506,6 +827,60 @@ def get_user_role(user_id: int) -> str:
         raise DatabaseError(f"获取用户角色时发生错误: {str(error)}")
 
 
+def invalidate_user_role(user_id: int = None):
+    """
+    使角色缓存失效，在写account表后调用；档案中包含角色，一并失效
+
+    Args:
+        user_id: 用户ID，为None时清空整个缓存
+    """
+    if user_id is None:
+        _role_cache.clear()
+    else:
+        _role_cache.invalidate(int(user_id))
+    invalidate_profile(user_id)
+
+
+@timed_query
+def set_user_role(user_id: int, role: str) -> str:
+    """
+    修改用户角色
+
+    Args:
+        user_id: 用户ID
+        role: 新角色(user/admin)
+
+    Returns:
+        str: 成功消息
+
+    Raises:
+        ValueError: 角色无效或用户不存在时抛出
+        DatabaseError: 数据库操作错误时抛出
+    """
+    if role not in ("user", "admin"):
+        raise ValueError("无效的用户角色")
+
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE account SET role = %s WHERE id = %s",
+                    (role, user_id),
+                )
+                if cursor.rowcount == 0:
+                    raise ValueError("用户不存在")
+                connection.commit()
+                return "用户角色更新成功"
+
+    except ValueError as error:
+        raise error
+    except Exception as error:
+        raise DatabaseError(f"修改用户角色时发生错误: {str(error)}")
+    finally:
+        invalidate_user_role(user_id)
+
+
+@timed_query
 def get_username(user_id: int) -> str:
     """
     根据用户ID获取用户名
@@ -540,6 +915,68 @@ def get_username(user_id: int) -> str:
 
 
 # region 任务管理
+
+# 按id定位单个任务的条件，参数为(task_id, created_at)，created_at由_task_created_at取得
+_TASK_BY_ID = "id = %s AND created_at = %s"
+# 按id列表定位多个任务的条件，参数为(task_ids, created_ats)，created_ats由_task_created_ats取得
+_TASKS_BY_IDS = "id = ANY(%s) AND created_at = ANY(%s)"
+# 跨进程事件通道，写事务中以pg_notify发出，事务提交后由后台服务进程的events.EventListener接收
+TASK_CHANGED_CHANNEL = "fcmanager_task_changed"
+CRAWL_OUTBOX_CHANNEL = "fcmanager_crawl_outbox"
+
+# 单条通知的负载上限(字节)，PostgreSQL限制为8000
+_NOTIFY_PAYLOAD_LIMIT = 7000
+
+
+def notify_tasks_changed(cursor, task_ids: list[int]):
+    """
+    在调用方的事务中通知任务变更，事务提交后才送达，回滚时不会发出
+
+    Args:
+        cursor: 数据库游标，由调用方负责提交事务
+        task_ids: 创建、修改、审核或删除的任务ID，ID较多时拆分为多条通知
+    """
+    payloads = []
+    current = ""
+    for task_id in task_ids:
+        item = str(int(task_id))
+        if current and len(current) + len(item) + 1 > _NOTIFY_PAYLOAD_LIMIT:
+            payloads.append(current)
+            current = ""
+        current = f"{current},{item}" if current else item
+    if current:
+        payloads.append(current)
+    if payloads:
+        cursor.execute(
+            "SELECT pg_notify(%s, payload) FROM unnest(%s::text[]) AS payload",
+            (TASK_CHANGED_CHANNEL, payloads),
+        )
+
+
+def notify_crawl_outbox(cursor):
+    """在调用方的事务中通知有新的待提交爬虫任务，同一事务内的重复通知由数据库合并"""
+    cursor.execute("SELECT pg_notify(%s, '')", (CRAWL_OUTBOX_CHANNEL,))
+
+
+def _task_created_at(cursor, task_id: int):
+    """
+    从task_id_map读取任务的创建时间，任务不存在时返回None
+
+    task按created_at分区后主键为(id, created_at)，只按id查询要规划并探测每个分区的索引；
+    条件中带上created_at的值后规划时即排除其他分区。未分区时多一次主键查找。
+    """
+    cursor.execute("SELECT created_at FROM task_id_map WHERE id = %s", (task_id,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _task_created_ats(cursor, task_ids: list[int]) -> list:
+    """从task_id_map读取一组任务的创建时间(去重)，与_TASKS_BY_IDS一起使用，查询只访问这些时间所在的分区"""
+    cursor.execute("SELECT DISTINCT created_at FROM task_id_map WHERE id = ANY(%s)", (list(task_ids),))
+    return [row[0] for row in cursor.fetchall()]
+
+
+@timed_query
 def create_task(
     applicant_id: int,
     name: str,
@@ -549,10 +986,11 @@ def create_task(
     status: str = "pending",
     reviewer_id: int = None,
     schedule: str = None,
-    fc_task_id: str = None,
 ) -> str:
     """
-    创建新任务
+    创建新任务，状态为approved时在同一事务中写入crawl_outbox
+
+    爬虫由CrawlDispatcher在后台提交，创建不等待Firecrawl响应。
 
     Args:
         applicant_id: 申请人ID
@@ -563,7 +1001,6 @@ def create_task(
         status: 任务状态，默认为'pending'
         reviewer_id: 审核人ID，默认为None
         schedule: 定时计划(cron表达式)，可选
-        fc_task_id: 爬虫任务ID，可选
 
     Returns:
         str: 成功消息
@@ -576,9 +1013,9 @@ def create_task(
                     INSERT INTO task (
                         applicant_id, reviewer_id, name, description, 
                         category, site_url, schedule, status,
-                        approved_at, fc_task_id
+                        approved_at
                     )
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
                     RETURNING id
                 """,
                     (
@@ -591,19 +1028,102 @@ def create_task(
                         schedule,
                         status,
                         datetime.now() if status == "approved" else None,
-                        fc_task_id,
                     ),
                 )
 
                 task_id = cursor.fetchone()[0]
+                if status == "approved":
+                    enqueue_crawl(cursor, task_id, site_url)
+                notify_tasks_changed(cursor, [task_id])
                 connection.commit()
 
-                return f"任务创建成功,ID:{task_id}"
+        return f"任务创建成功,ID:{task_id}"
 
     except Exception as error:
         raise DatabaseError(f"创建任务时发生错误: {str(error)}")
 
 
+@timed_query
+def create_tasks(
+    applicant_id: int,
+    tasks: list[dict],
+    status: str = "pending",
+    reviewer_id: int = None,
+) -> list[int]:
+    """
+    批量创建任务，全部任务以一条多行INSERT写入
+
+    状态为approved时在同一事务中为每个任务写入crawl_outbox，
+    爬虫由CrawlDispatcher按并发上限在后台提交。
+
+    Args:
+        applicant_id: 申请人ID
+        tasks: 任务列表，每项包含name、description、category、site_url、schedule
+        status: 任务状态，默认为'pending'
+        reviewer_id: 审核人ID，默认为None
+
+    Returns:
+        list[int]: 新任务ID，与tasks顺序一致
+
+    Raises:
+        DatabaseError: 数据库操作失败时抛出
+    """
+    if not tasks:
+        return []
+
+    approved_at = datetime.now() if status == "approved" else None
+    rows = [
+        (
+            applicant_id,
+            reviewer_id,
+            task["name"],
+            task.get("description"),
+            task["category"],
+            task["site_url"],
+            task.get("schedule"),
+            status,
+            approved_at,
+        )
+        for task in tasks
+    ]
+
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                task_ids = [
+                    row[0]
+                    for row in execute_values(
+                        cursor,
+                        """
+                        INSERT INTO task (
+                            applicant_id, reviewer_id, name, description,
+                            category, site_url, schedule, status, approved_at
+                        )
+                        VALUES %s
+                        RETURNING id
+                    """,
+                        rows,
+                        page_size=len(rows),
+                        fetch=True,
+                    )
+                ]
+
+                if status == "approved":
+                    enqueue_crawls(
+                        cursor,
+                        [(task_id, task["site_url"]) for task_id, task in zip(task_ids, tasks)],
+                    )
+
+                notify_tasks_changed(cursor, task_ids)
+                connection.commit()
+
+        return task_ids
+
+    except Exception as error:
+        raise DatabaseError(f"批量创建任务时发生错误: {str(error)}")
+
+
+@timed_query
 def modify_task(
     task_id: int,
     url: str = None,
@@ -632,11 +1152,12 @@ def modify_task(
         with get_database_connection() as connection:
             with connection.cursor() as cursor:
                 # 检查任务是否存在及其状态
+                created_at = _task_created_at(cursor, task_id)
                 cursor.execute(
-                    """
-                    SELECT status FROM task WHERE id = %s
+                    f"""
+                    SELECT status FROM task WHERE {_TASK_BY_ID}
                 """,
-                    (task_id,)
+                    (task_id, created_at)
                 )
                 task = cursor.fetchone()
                 
@@ -673,22 +1194,27 @@ def modify_task(
                 query = f"""
                     UPDATE task 
                     SET {", ".join(update_fields)}
-                    WHERE id = %s
+                    WHERE {_TASK_BY_ID}
                 """
-                params.append(task_id)
+                params += [task_id, created_at]
                 
                 cursor.execute(query, params)
+                notify_tasks_changed(cursor, [task_id])
                 connection.commit()
-                
-                return "任务更新成功"
+
+        return "任务更新成功"
                 
     except Exception as error:
         raise DatabaseError(f"修改任务时发生错误: {str(error)}")
 
 
+@timed_query
 def approve_task(task_id: int, admin_id: int, is_approved: bool = True) -> str:
     """
-    审核任务并启动爬虫
+    审核任务，通过时将爬虫任务写入crawl_outbox
+
+    状态变更与outbox记录在同一事务中提交，爬虫由CrawlDispatcher在后台提交，
+    审核不再等待Firecrawl响应。
 
     Args:
         task_id: 任务ID
@@ -699,228 +1225,1558 @@ def approve_task(task_id: int, admin_id: int, is_approved: bool = True) -> str:
         str: 成功消息
     """
     try:
+        # 检查是否为管理员(命中角色缓存时不访问数据库)
+        if get_user_role(admin_id) != "admin":
+            raise ValueError("只有管理员可以审核任务")
+
         with get_database_connection() as connection:
             with connection.cursor() as cursor:
-                # 检查是否为管理员
+                # 获取任务信息并锁定，防止并发重复审核
+                created_at = _task_created_at(cursor, task_id)
                 cursor.execute(
-                    """
-                    SELECT role FROM account WHERE id = %s
+                    f"""
+                    SELECT status, site_url, name, description, schedule 
+                    FROM task WHERE {_TASK_BY_ID}
+                    FOR UPDATE
                 """,
-                    (admin_id,),
+                    (task_id, created_at),
                 )
-                admin_role = cursor.fetchone()
+                task = cursor.fetchone()
 
-                if not admin_role or admin_role[0] != "admin":
-                    raise ValueError("只有管理员可以审核任务")
-
-                # 获取任务信息
-                cursor.execute(
-                    """
-                    SELECT status, site_url, name, description, schedule 
-                    FROM task WHERE id = %s
-                """,
-                    (task_id,),
-                )
-                task = cursor.fetchone()
-
-                if not task:
-                    raise ValueError("任务不存在")
+                if not task:
+                    raise ValueError("任务不存在")
 
                 if task[0] != "pending":
                     raise ValueError("该任务已经被审核")
 
-                fc_task_id = None
-                if is_approved:
-                    # 创建爬虫任务，根据API文档修改参数
-                    fc_response = create_crawl_task(
-                        url=task[1],  # site_url
-                    )
-                    fc_task_id = fc_response.get("id")
-
                 # 更新任务状态
                 cursor.execute(
-                    """
+                    f"""
                     UPDATE task 
                     SET status = %s,
                         approved_at = CURRENT_TIMESTAMP,
                         reviewer_id = %s,
-                        fc_task_id = %s
-                    WHERE id = %s
+                        fc_task_id = NULL
+                    WHERE {_TASK_BY_ID}
                 """,
                     (
                         "approved" if is_approved else "rejected",
                         admin_id,
-                        fc_task_id,
                         task_id,
+                        created_at,
                     ),
                 )
 
+                if is_approved:
+                    enqueue_crawl(cursor, task_id, task[1])  # site_url
+
+                notify_tasks_changed(cursor, [task_id])
                 connection.commit()
-                return "任务审核通过并已启动爬虫" if is_approved else "任务审核未通过"
+
+        return "任务审核通过，爬虫任务已提交" if is_approved else "任务审核未通过"
 
     except Exception as error:
         raise DatabaseError(f"审核任务时发生错误: {str(error)}")
 
 
-def get_tasks(
-    user_id: int = None,
-    status: str = None,
-    category: str = None,
-    start_date: str = None,
-    end_date: str = None,
-    page: int = 1,
-    page_size: int = 20,
-) -> dict:
+@timed_query
+def approve_tasks(decisions: list[tuple[int, bool]], admin_id: int) -> dict[int, str]:
     """
-    获取任务列表，支持多种过滤条件
+    批量审核任务，以一条UPDATE完成全部状态变更
+
+    只更新仍为pending的任务，并发审核同一任务时只有一方生效；
+    通过的任务在同一事务中写入crawl_outbox。
 
     Args:
-        user_id: 用户ID（可选，用于筛选特定用户的任务）
-        status: 任务状态（可选，pending/approved/rejected）
-        category: 任务类别（可选）
-        start_date: 开始日期（可选，格式：YYYY-MM-DD）
-        end_date: 结束日期（可选，格式：YYYY-MM-DD）
-        page: 页码，默认1
-        page_size: 每页数量，默认20
+        decisions: [(task_id, is_approved)]，task_id不应重复
+        admin_id: 管理员ID
 
     Returns:
-        dict: {
-            'total': 总记录数,
-            'total_pages': 总页数,
-            'current_page': 当前页码,
-            'tasks': [任务列表]
-        }
+        dict[int, str]: task_id -> 审核结果，未能审核的任务不在其中
+
+    Raises:
+        DatabaseError: 数据库操作失败或非管理员时抛出
     """
+    if not decisions:
+        return {}
+
     try:
+        if get_user_role(admin_id) != "admin":
+            raise ValueError("只有管理员可以审核任务")
+
+        task_ids = [task_id for task_id, _ in decisions]
         with get_database_connection() as connection:
             with connection.cursor() as cursor:
-                # 构建基础查询
-                query = """
-                    SELECT 
-                        t.id,
-                        t.name,
-                        t.description,
-                        t.category,
-                        t.site_url,
-                        t.schedule,
-                        t.status,
-                        t.created_at,
-                        t.approved_at,
-                        t.fc_task_id,
-                        a.username as applicant_name,
-                        r.username as reviewer_name
-                    FROM task t
-                    LEFT JOIN account a ON t.applicant_id = a.id
-                    LEFT JOIN account r ON t.reviewer_id = r.id
-                    WHERE 1=1
-                """
-                params = []
+                created_ats = _task_created_ats(cursor, task_ids)
+                # 条件中带上created_at的值，分区表上只访问这些任务所在的分区
+                cursor.execute(
+                    """
+                    UPDATE task AS t
+                    SET status = CASE WHEN d.is_approved THEN 'approved' ELSE 'rejected' END,
+                        approved_at = CURRENT_TIMESTAMP,
+                        reviewer_id = %s,
+                        fc_task_id = NULL
+                    FROM unnest(%s::integer[], %s::boolean[]) AS d (id, is_approved)
+                    WHERE t.id = ANY(%s) AND t.created_at = ANY(%s)
+                        AND t.id = d.id AND t.status = 'pending'
+                    RETURNING t.id, t.status, t.site_url
+                """,
+                    (
+                        admin_id,
+                        task_ids,
+                        [is_approved for _, is_approved in decisions],
+                        task_ids,
+                        created_ats,
+                    ),
+                )
+                updated = cursor.fetchall()
 
-                # 添加过滤条件
-                if user_id:
-                    query += " AND (t.applicant_id = %s OR t.reviewer_id = %s)"
-                    params.extend([user_id, user_id])
+                enqueue_crawls(
+                    cursor,
+                    [(task_id, site_url) for task_id, status, site_url in updated if status == "approved"],
+                )
+                notify_tasks_changed(cursor, [task_id for task_id, _, _ in updated])
+                connection.commit()
 
-                if status:
-                    query += " AND t.status = %s"
-                    params.append(status)
+        return {
+            task_id: "任务审核通过，爬虫任务已提交" if status == "approved" else "任务审核未通过"
+            for task_id, status, _ in updated
+        }
 
-                if category:
-                    query += " AND t.category = %s"
-                    params.append(category)
+    except Exception as error:
+        raise DatabaseError(f"批量审核任务时发生错误: {str(error)}")
 
-                if start_date:
-                    query += " AND t.created_at >= %s"
-                    params.append(start_date)
 
-                if end_date:
-                    query += " AND t.created_at <= %s"
-                    params.append(end_date)
+def enqueue_crawl(cursor, task_id: int, site_url: str, delay: float = 0) -> int:
+    """
+    在调用方的事务中写入一条待提交的爬虫任务
 
-                # 获取总记录数
-                count_query = f"SELECT COUNT(*) FROM ({query}) AS count_query"
-                cursor.execute(count_query, params)
-                total_count = cursor.fetchone()[0]
+    Args:
+        cursor: 数据库游标，由调用方负责提交事务
+        task_id: 任务ID
+        site_url: 目标网站URL
+        delay: 延迟提交的秒数，默认立即提交
 
-                # 添加分页
-                query += " ORDER BY t.created_at DESC LIMIT %s OFFSET %s"
-                offset = (page - 1) * page_size
-                params.extend([page_size, offset])
+    Returns:
+        int: outbox记录ID
+    """
+    cursor.execute(
+        """
+        INSERT INTO crawl_outbox (task_id, site_url, next_attempt_at)
+        VALUES (%s, %s, CURRENT_TIMESTAMP + make_interval(secs => %s))
+        RETURNING id
+    """,
+        (task_id, site_url, delay),
+    )
+    outbox_id = cursor.fetchone()[0]
+    notify_crawl_outbox(cursor)
+    return outbox_id
 
-                # 执行最终查询
-                cursor.execute(query, params)
-                tasks = []
-                for row in cursor.fetchall():
-                    tasks.append(
-                        {
-                            "id": row[0],
-                            "name": row[1],
-                            "description": row[2],
-                            "category": row[3],
-                            "site_url": row[4],
-                            "schedule": row[5],
-                            "status": row[6],
-                            "created_at": row[7].strftime("%Y-%m-%d %H:%M:%S"),
-                            "approved_at": row[8].strftime("%Y-%m-%d %H:%M:%S")
-                            if row[8]
-                            else None,
-                            "fc_task_id": row[9],
-                            "applicant_name": row[10],
-                            "reviewer_name": row[11],
-                        }
-                    )
 
-                total_pages = (total_count + page_size - 1) // page_size
+def enqueue_crawls(cursor, items: list[tuple[int, str]]) -> int:
+    """
+    在调用方的事务中批量写入待提交的爬虫任务
+
+    Args:
+        cursor: 数据库游标，由调用方负责提交事务
+        items: [(task_id, site_url)]
 
-                return {
-                    "total": total_count,
-                    "total_pages": total_pages,
-                    "current_page": page,
-                    "tasks": tasks,
-                }
+    Returns:
+        int: 写入的数量
+    """
+    if not items:
+        return 0
+    execute_values(
+        cursor,
+        "INSERT INTO crawl_outbox (task_id, site_url) VALUES %s",
+        items,
+        page_size=len(items),
+    )
+    inserted = cursor.rowcount
+    notify_crawl_outbox(cursor)
+    return inserted
+
+
+@timed_query
+def get_scheduled_tasks(task_ids: list[int] = None) -> list[tuple]:
+    """
+    获取设置了定时计划的已审核任务
+
+    Args:
+        task_ids: 任务ID列表，为None时返回全部
+
+    Returns:
+        list[tuple]: [(task_id, schedule, site_url)]
+    """
+    query = """
+        SELECT id, schedule, site_url FROM task
+        WHERE status = 'approved' AND schedule IS NOT NULL AND schedule <> ''
+    """
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                params = []
+                if task_ids is not None:
+                    query += f" AND {_TASKS_BY_IDS}"
+                    params = [list(task_ids), _task_created_ats(cursor, task_ids)]
+                cursor.execute(query, params)
+                return cursor.fetchall()
 
     except Exception as error:
-        raise DatabaseError(f"获取任务列表时发生错误: {str(error)}")
+        raise DatabaseError(f"获取定时任务时发生错误: {str(error)}")
 
 
-def delete_task(task_id: int) -> str:
+@timed_query
+def enqueue_scheduled_crawls(items: list[tuple]) -> int:
     """
-    根据任务ID删除任务记录
+    批量写入到期的定时爬虫任务，同一任务的同一触发时间只写入一次
 
     Args:
-        task_id: 要删除的任务ID
+        items: [(task_id, site_url, scheduled_for, delay)]，delay为提交前的随机延迟(秒)
 
     Returns:
-        str: 成功消息
+        int: 实际写入的数量
+    """
+    if not items:
+        return 0
 
-    Raises:
-        DatabaseError: 数据库操作失败时抛出
-        ValueError: 任务不存在时抛出
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                execute_values(
+                    cursor,
+                    """
+                    INSERT INTO crawl_outbox (task_id, site_url, scheduled_for, next_attempt_at)
+                    VALUES %s
+                    ON CONFLICT (task_id, scheduled_for) DO NOTHING
+                """,
+                    items,
+                    template="(%s, %s, %s, CURRENT_TIMESTAMP + make_interval(secs => %s))",
+                    page_size=len(items),
+                )
+                inserted = cursor.rowcount
+                if inserted:
+                    notify_crawl_outbox(cursor)
+                connection.commit()
+                return inserted
+
+    except Exception as error:
+        raise DatabaseError(f"写入定时爬虫任务时发生错误: {str(error)}")
+
+
+@timed_query
+def claim_crawl_outbox(limit: int, lease_seconds: float) -> list[tuple]:
+    """
+    领取到期的待提交爬虫任务
+
+    领取时将next_attempt_at推后lease_seconds作为租约，进程崩溃时记录会在租约到期后被重新领取。
+
+    Args:
+        limit: 最多领取的数量
+        lease_seconds: 租约时长(秒)
+
+    Returns:
+        list[tuple]: [(outbox_id, task_id, site_url, attempts)]
     """
     try:
         with get_database_connection() as connection:
             with connection.cursor() as cursor:
-                # 检查任务是否存在
                 cursor.execute(
-                    "SELECT id FROM task WHERE id = %s",
-                    (task_id,)
+                    """
+                    UPDATE crawl_outbox o
+                    SET attempts = o.attempts + 1,
+                        next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => %s)
+                    WHERE o.id IN (
+                        SELECT id FROM crawl_outbox
+                        WHERE status = 'pending' AND next_attempt_at <= CURRENT_TIMESTAMP
+                        ORDER BY next_attempt_at
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING o.id, o.task_id, o.site_url, o.attempts
+                """,
+                    (lease_seconds, limit),
                 )
-                if not cursor.fetchone():
-                    raise ValueError("任务不存在")
+                rows = cursor.fetchall()
+                connection.commit()
+                return rows
 
-                # 删除任务
+    except Exception as error:
+        raise DatabaseError(f"领取爬虫任务时发生错误: {str(error)}")
+
+
+@timed_query
+def complete_crawl_outbox(outbox_id: int, task_id: int, fc_task_id: str, backend: str = None):
+    """
+    记录爬虫任务提交成功，并回写task.fc_task_id
+
+    Args:
+        outbox_id: outbox记录ID
+        task_id: 任务ID
+        fc_task_id: Firecrawl返回的爬虫任务ID
+        backend: 处理该任务的Firecrawl后端名称
+    """
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"UPDATE task SET fc_task_id = %s WHERE {_TASK_BY_ID}",
+                    (fc_task_id, task_id, _task_created_at(cursor, task_id)),
+                )
+                track_crawl(cursor, fc_task_id, task_id, backend)
                 cursor.execute(
-                    "DELETE FROM task WHERE id = %s",
-                    (task_id,)
+                    """
+                    UPDATE crawl_outbox
+                    SET status = 'done', processed_at = CURRENT_TIMESTAMP, last_error = NULL
+                    WHERE id = %s
+                """,
+                    (outbox_id,),
                 )
                 connection.commit()
-                return "任务删除成功"
 
     except Exception as error:
-        raise DatabaseError(f"删除任务时发生错误: {str(error)}")
+        raise DatabaseError(f"回写爬虫任务ID时发生错误: {str(error)}")
 
 
-# endregion
+@timed_query
+def fail_crawl_outbox(outbox_id: int, error_message: str, retry_delay: float = None):
+    """
+    记录爬虫任务提交失败
+
+    Args:
+        outbox_id: outbox记录ID
+        error_message: 错误信息
+        retry_delay: 重试等待秒数，为None时标记为最终失败
+    """
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                if retry_delay is None:
+                    cursor.execute(
+                        """
+                        UPDATE crawl_outbox
+                        SET status = 'failed', processed_at = CURRENT_TIMESTAMP, last_error = %s
+                        WHERE id = %s
+                    """,
+                        (error_message, outbox_id),
+                    )
+                else:
+                    cursor.execute(
+                        """
+                        UPDATE crawl_outbox
+                        SET next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                            last_error = %s
+                        WHERE id = %s
+                    """,
+                        (retry_delay, error_message, outbox_id),
+                    )
+                connection.commit()
+
+    except Exception as error:
+        raise DatabaseError(f"记录爬虫任务失败时发生错误: {str(error)}")
+
+
+# get_tasks支持的总数统计方式
+TASK_COUNT_MODES = ("exact", "estimate", "capped", "none")
+TASK_COUNT_CAP = 10000  # capped模式下最多统计的行数
+TASK_PAGE_SIZE_MAX = 2000  # 任务列表与搜索每页的最大数量
+
+
+def _check_page_size(page_size: int):
+    """检查每页数量，无效时抛出ValueError"""
+    if not 1 <= page_size <= TASK_PAGE_SIZE_MAX:
+        raise ValueError(f"每页数量必须在1到{TASK_PAGE_SIZE_MAX}之间")
+
+_TASK_LIST_COLUMNS = """
+    SELECT 
+        t.id,
+        t.name,
+        t.description,
+        t.category,
+        t.site_url,
+        t.schedule,
+        t.status,
+        t.created_at,
+        t.approved_at,
+        t.fc_task_id,
+        a.username as applicant_name,
+        r.username as reviewer_name,
+        cs.status as crawl_status,
+        cs.completed as crawl_completed,
+        cs.total as crawl_total,
+        cs.updated_at as crawl_updated_at
+    FROM task t
+    LEFT JOIN account a ON t.applicant_id = a.id
+    LEFT JOIN account r ON t.reviewer_id = r.id
+    LEFT JOIN crawl_status cs ON t.fc_task_id = cs.fc_task_id
+"""
+
+
+def encode_task_cursor(created_at: datetime, task_id: int) -> str:
+    """将(created_at, id)编码为不透明的分页游标"""
+    raw = f"{created_at.isoformat()}|{task_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_task_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    解析分页游标
+
+    Raises:
+        ValueError: 游标格式无效时抛出
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, task_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(task_id)
+    except Exception:
+        raise ValueError("无效的分页游标")
+
+
+TASK_SEARCH_MIN_URL_LENGTH = 3  # 关键词少于3个字符时三元组索引无法使用，不匹配site_url
+
+
+def parse_task_search(search: str) -> tuple:
+    """
+    将搜索关键词转换为(tsquery, site_url的ILIKE模式)
+
+    每个词按前缀匹配，多个词之间为AND；关键词足够长时同时匹配site_url子串。
+
+    Raises:
+        ValueError: 关键词中没有可搜索的内容时抛出
+    """
+    search = (search or "").strip()
+    words = re.findall(r"\w+", search.lower())
+    tsquery = " & ".join(f"{word}:*" for word in words) or None
+
+    url_pattern = None
+    if len(search) >= TASK_SEARCH_MIN_URL_LENGTH:
+        escaped = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        url_pattern = f"%{escaped}%"
+
+    if tsquery is None and url_pattern is None:
+        raise ValueError("搜索关键词无效")
+    return tsquery, url_pattern
+
+
+def _build_search_condition(search: str) -> tuple[str, list]:
+    """构建搜索的匹配条件，名称/描述走GIN全文索引，site_url走三元组索引"""
+    tsquery, url_pattern = parse_task_search(search)
+    conditions = []
+    params = []
+    if tsquery:
+        conditions.append("t.search_vector @@ to_tsquery('simple', %s)")
+        params.append(tsquery)
+    if url_pattern:
+        conditions.append("t.site_url ILIKE %s")
+        params.append(url_pattern)
+    return "(" + " OR ".join(conditions) + ")", params
+
+
+def _build_task_filters(
+    user_id: int = None,
+    status: str = None,
+    category: str = None,
+    start_date: str = None,
+    end_date: str = None,
+    search: str = None,
+) -> tuple[str, list]:
+    """
+    构建任务列表的过滤条件，返回(WHERE子句, 参数列表)
+
+    Raises:
+        ValueError: 搜索关键词无效时抛出
+    """
+    conditions = ["1=1"]
+    params = []
+
+    if user_id:
+        conditions.append("(t.applicant_id = %s OR t.reviewer_id = %s)")
+        params.extend([user_id, user_id])
+
+    if status:
+        conditions.append("t.status = %s")
+        params.append(status)
+
+    if category:
+        conditions.append("t.category = %s")
+        params.append(category)
+
+    if start_date:
+        conditions.append("t.created_at >= %s")
+        params.append(start_date)
+
+    if end_date:
+        conditions.append("t.created_at <= %s")
+        params.append(end_date)
+
+    if search:
+        condition, search_params = _build_search_condition(search)
+        conditions.append(condition)
+        params.extend(search_params)
+
+    return " WHERE " + " AND ".join(conditions), params
+
+
+def _build_task_count_query(where: str, params: list, count_mode: str) -> tuple:
+    """构建统计任务总数的查询，none模式返回(None, None)"""
+    if count_mode == "none":
+        return None, None
+
+    if count_mode == "estimate":
+        # 使用规划器统计信息估算行数，不扫描数据
+        return f"EXPLAIN (FORMAT JSON) SELECT 1 FROM task t{where}", params
+
+    if count_mode == "capped":
+        return (
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM task t{where} LIMIT %s) AS capped",
+            params + [TASK_COUNT_CAP],
+        )
+
+    # 关联account的LEFT JOIN不影响行数，直接统计task表
+    return f"SELECT COUNT(*) FROM task t{where}", params
+
+
+def parse_task_count(value, count_mode: str) -> int:
+    """从统计查询的结果中取出总数"""
+    if count_mode == "estimate":
+        if isinstance(value, str):
+            value = json.loads(value)
+        return int(value[0]["Plan"]["Plan Rows"])
+    return value
+
+
+def build_task_queries(
+    user_id: int = None,
+    status: str = None,
+    category: str = None,
+    start_date=None,
+    end_date=None,
+    page: int = 1,
+    page_size: int = 20,
+    pagination: str = "offset",
+    cursor: str = None,
+    count_mode: str = "exact",
+    search: str = None,
+) -> dict:
+    """
+    构建get_tasks的统计查询与列表查询
+
+    Returns:
+        dict: {'count': (sql, params)或(None, None), 'list': (sql, params)}
+
+    Raises:
+        ValueError: 分页方式、统计方式、页码、每页数量或游标无效时抛出
+    """
+    if pagination not in ("offset", "cursor"):
+        raise ValueError("无效的分页方式")
+    if count_mode not in TASK_COUNT_MODES:
+        raise ValueError("无效的总数统计方式")
+    _check_page_size(page_size)
+    if pagination == "offset" and page < 1:
+        raise ValueError("页码必须大于0")
+
+    where, params = _build_task_filters(user_id, status, category, start_date, end_date, search)
+
+    columns, list_where = _TASK_LIST_COLUMNS, where
+    if search:
+        # 规划器常高估搜索条件匹配的行数，进而沿created_at索引逐行过滤直到凑满一页；
+        # 用OFFSET 0隔开子查询，先经全文/三元组索引取出匹配行再排序
+        columns = _TASK_LIST_COLUMNS.replace(
+            "FROM task t", f"FROM (SELECT * FROM task t{where} OFFSET 0) AS t", 1
+        )
+        list_where = " WHERE 1=1"
+
+    if pagination == "cursor":
+        # 游标分页：基于(created_at, id)定位，深翻页与首页代价相同
+        query = columns + list_where
+        list_params = list(params)
+        if cursor:
+            cursor_created_at, cursor_id = decode_task_cursor(cursor)
+            # 行比较不能用于分区裁剪，额外的created_at条件使分区表跳过更新的分区
+            query += " AND (t.created_at, t.id) < (%s, %s) AND t.created_at <= %s"
+            list_params += [cursor_created_at, cursor_id, cursor_created_at]
+        query += " ORDER BY t.created_at DESC, t.id DESC LIMIT %s"
+        list_params.append(page_size + 1)
+    else:
+        query = (
+            columns
+            + list_where
+            + " ORDER BY t.created_at DESC, t.id DESC LIMIT %s OFFSET %s"
+        )
+        list_params = params + [page_size, (page - 1) * page_size]
+
+    return {
+        "count": _build_task_count_query(where, params, count_mode),
+        "list": (query, list_params),
+    }
+
+
+def build_task_page(
+    rows,
+    total_count: int,
+    page: int,
+    page_size: int,
+    pagination: str,
+    task_format: str = "rows",
+) -> dict:
+    """将列表查询结果组装为get_tasks的返回值"""
+    if pagination == "cursor":
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        return {
+            "total": total_count,
+            "next_cursor": encode_task_cursor(rows[-1][7], rows[-1][0])
+            if has_more
+            else None,
+            "has_more": has_more,
+            "tasks": _format_task_rows(rows, task_format),
+        }
+
+    return {
+        "total": total_count,
+        "total_pages": (total_count + page_size - 1) // page_size
+        if total_count is not None
+        else None,
+        "current_page": page,
+        "tasks": _format_task_rows(rows, task_format),
+    }
+
+
+# 任务列表的返回格式: rows(每个任务一个对象)、columnar(每个字段一个数组)
+TASK_LIST_FORMATS = ("rows", "columnar")
+
+# columnar格式的字段，依次对应_TASK_LIST_COLUMNS的各列，爬虫进度展开为crawl_*字段
+TASK_COLUMNAR_FIELDS = (
+    "id",
+    "name",
+    "description",
+    "category",
+    "site_url",
+    "schedule",
+    "status",
+    "created_at",
+    "approved_at",
+    "fc_task_id",
+    "applicant_name",
+    "reviewer_name",
+    "crawl_status",
+    "crawl_completed",
+    "crawl_total",
+    "crawl_updated_at",
+)
+_TASK_TIMESTAMP_COLUMNS = (7, 8, 15)
+
+
+def _format_timestamp(value):
+    # 与strftime("%Y-%m-%d %H:%M:%S")结果相同，isoformat为C实现，快数倍
+    return value.isoformat(" ", "seconds") if value else None
+
+
+def _format_task_rows(rows, task_format: str):
+    if task_format == "columnar":
+        return _task_rows_to_columns(rows)
+    return [_task_row_to_dict(row) for row in rows]
+
+
+def _task_rows_to_columns(rows) -> dict:
+    """将查询结果转置为{字段: 值数组}，不为每行构建字典"""
+    columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in TASK_COLUMNAR_FIELDS]
+    for index in _TASK_TIMESTAMP_COLUMNS:
+        columns[index] = [_format_timestamp(value) for value in columns[index]]
+    return dict(zip(TASK_COLUMNAR_FIELDS, columns))
+
+
+def _task_row_to_dict(row) -> dict:
+    return {
+        "id": row[0],
+        "name": row[1],
+        "description": row[2],
+        "category": row[3],
+        "site_url": row[4],
+        "schedule": row[5],
+        "status": row[6],
+        "created_at": _format_timestamp(row[7]),
+        "approved_at": _format_timestamp(row[8]),
+        "fc_task_id": row[9],
+        "applicant_name": row[10],
+        "reviewer_name": row[11],
+        # 由StatusSynchronizer同步的爬虫进度，不访问Firecrawl
+        "crawl": {
+            "status": row[12],
+            "completed": row[13],
+            "total": row[14],
+            "updated_at": _format_timestamp(row[15]),
+        }
+        if row[12]
+        else None,
+    }
+
+
+@timed_query
+def get_tasks(
+    user_id: int = None,
+    status: str = None,
+    category: str = None,
+    start_date: str = None,
+    end_date: str = None,
+    page: int = 1,
+    page_size: int = 20,
+    pagination: str = "offset",
+    cursor: str = None,
+    count_mode: str = "exact",
+    search: str = None,
+    task_format: str = "rows",
+) -> dict:
+    """
+    获取任务列表，支持多种过滤条件
+
+    Args:
+        user_id: 用户ID（可选，用于筛选特定用户的任务）
+        status: 任务状态（可选，pending/approved/rejected）
+        category: 任务类别（可选）
+        start_date: 开始日期（可选，格式：YYYY-MM-DD）
+        end_date: 结束日期（可选，格式：YYYY-MM-DD）
+        page: 页码，默认1(仅offset分页)
+        page_size: 每页数量，默认20，最大TASK_PAGE_SIZE_MAX
+        pagination: 分页方式，offset(页码)或cursor(游标)，默认offset
+        cursor: 上一页返回的next_cursor(仅cursor分页，首页留空)
+        count_mode: 总数统计方式，exact(精确)/estimate(规划器估算)/capped(最多统计TASK_COUNT_CAP行)/none(不统计)
+        search: 搜索关键词（可选，匹配名称、描述与site_url，结果仍按创建时间排序）
+        task_format: tasks的格式，rows(对象数组)或columnar(字段名到值数组的映射)，默认rows
+
+    Returns:
+        dict: offset分页时为 {
+            'total': 总记录数,
+            'total_pages': 总页数,
+            'current_page': 当前页码,
+            'tasks': [任务列表]
+        }
+        cursor分页时为 {
+            'total': 总记录数,
+            'next_cursor': 下一页游标(没有下一页时为None),
+            'has_more': 是否还有下一页,
+            'tasks': [任务列表]
+        }
+
+    Raises:
+        ValueError: 参数无效时抛出
+        DatabaseError: 数据库操作失败时抛出
+    """
+    if task_format not in TASK_LIST_FORMATS:
+        raise ValueError("无效的任务列表格式")
+
+    queries = build_task_queries(
+        user_id,
+        status,
+        category,
+        start_date,
+        end_date,
+        page,
+        page_size,
+        pagination,
+        cursor,
+        count_mode,
+        search,
+    )
+
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as db_cursor:
+                # 获取总记录数
+                total_count = None
+                count_query, count_params = queries["count"]
+                if count_query:
+                    db_cursor.execute(count_query, count_params)
+                    total_count = parse_task_count(db_cursor.fetchone()[0], count_mode)
+
+                # 执行分页查询
+                db_cursor.execute(*queries["list"])
+                return build_task_page(
+                    db_cursor.fetchall(), total_count, page, page_size, pagination, task_format
+                )
+
+    except Exception as error:
+        raise DatabaseError(f"获取任务列表时发生错误: {str(error)}")
+
+
+def encode_search_cursor(rank: float, task_id: int) -> str:
+    """将(rank, id)编码为搜索结果的分页游标"""
+    raw = f"{rank!r}|{task_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, int]:
+    """
+    解析搜索结果的分页游标
+
+    Raises:
+        ValueError: 游标格式无效时抛出
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        rank, task_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return float(rank), int(task_id)
+    except Exception:
+        raise ValueError("无效的分页游标")
+
+
+@timed_query
+def search_tasks(
+    search: str,
+    user_id: int = None,
+    status: str = None,
+    category: str = None,
+    start_date: str = None,
+    end_date: str = None,
+    page_size: int = 20,
+    cursor: str = None,
+) -> dict:
+    """
+    按相关度搜索任务
+
+    相关度为名称/描述的全文匹配得分(名称权重更高)加上site_url的三元组相似度，
+    按(相关度, id)做游标分页；只对匹配的行计算得分，匹配行越少越快。
+
+    Args:
+        search: 搜索关键词
+        user_id, status, category, start_date, end_date: 与get_tasks相同的过滤条件
+        page_size: 每页数量，最大TASK_PAGE_SIZE_MAX
+        cursor: 上一页返回的next_cursor，首页留空
+
+    Returns:
+        dict: {'next_cursor': 下一页游标, 'has_more': 是否还有下一页, 'tasks': [任务列表，含rank]}
+
+    Raises:
+        ValueError: 关键词、每页数量或游标无效时抛出
+        DatabaseError: 数据库操作失败时抛出
+    """
+    if not search or not search.strip():
+        raise ValueError("缺少搜索关键词")
+    _check_page_size(page_size)
+    tsquery, _ = parse_task_search(search)
+    where, params = _build_task_filters(
+        user_id, status, category, start_date, end_date, search
+    )
+
+    # 先只在task表上计算得分和分页，取到一页的id后再关联账户与爬虫进度
+    rank_sql = (
+        "(COALESCE(ts_rank(t.search_vector, to_tsquery('simple', %s)), 0)"
+        " + similarity(t.site_url, %s))::float8"
+        if tsquery
+        else "similarity(t.site_url, %s)::float8"
+    )
+    rank_params = [tsquery, search] if tsquery else [search]
+
+    query = f"""
+        WITH ranked AS (
+            SELECT t.id, {rank_sql} AS rank
+            FROM task t{where}
+        ), page AS (
+            SELECT id, rank FROM ranked
+    """
+    query_params = rank_params + params
+    if cursor:
+        cursor_rank, cursor_id = decode_search_cursor(cursor)
+        query += " WHERE (rank, id) < (%s, %s)"
+        query_params += [cursor_rank, cursor_id]
+    query += """
+            ORDER BY rank DESC, id DESC
+            LIMIT %s
+        )
+    """
+    query_params.append(page_size + 1)
+    query += (
+        _TASK_LIST_COLUMNS.replace("FROM task t", "FROM page p JOIN task t ON t.id = p.id", 1)
+        .replace("SELECT", "SELECT p.rank,", 1)
+        + " ORDER BY p.rank DESC, t.id DESC"
+    )
+
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as db_cursor:
+                db_cursor.execute(query, query_params)
+                rows = db_cursor.fetchall()
+
+    except Exception as error:
+        raise DatabaseError(f"搜索任务时发生错误: {str(error)}")
+
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+    return {
+        "next_cursor": encode_search_cursor(rows[-1][0], rows[-1][1]) if has_more else None,
+        "has_more": has_more,
+        "tasks": [
+            {**_task_row_to_dict(row[1:]), "rank": round(row[0], 6)} for row in rows
+        ],
+    }
+
+
+def iter_task_export(
+    user_id: int = None,
+    status: str = None,
+    category: str = None,
+    start_date: str = None,
+    end_date: str = None,
+    search: str = None,
+    chunk_size: int = 2000,
+):
+    """
+    按get_tasks的过滤条件导出任务，使用服务端游标分块读取
+
+    过滤条件在调用时立即校验；返回的生成器开始迭代后才执行查询，
+    内存占用只与chunk_size有关，与导出的总行数无关。
+
+    Args:
+        user_id, status, category, start_date, end_date, search: 与get_tasks相同的过滤条件
+        chunk_size: 每次从服务端游标读取的行数
+
+    Returns:
+        生成器，每次产生一块结果行(list)，各行字段依次对应TASK_COLUMNAR_FIELDS，时间已格式化
+
+    Raises:
+        ValueError: 过滤条件无效时抛出
+    """
+    # 查询在响应开始输出后才执行，日期无效时须在此报错，否则响应会在输出表头后中断
+    for value in (start_date, end_date):
+        if value:
+            try:
+                datetime.fromisoformat(value)
+            except ValueError:
+                raise ValueError(f"无效的日期: {value}")
+    where, params = _build_task_filters(user_id, status, category, start_date, end_date, search)
+    # 按主键顺序导出，命名游标优先选择能立即返回首批行的计划
+    query = _TASK_LIST_COLUMNS + where + " ORDER BY t.id"
+    return _iter_task_export_chunks(query, params, chunk_size)
+
+
+def _iter_task_export_chunks(query: str, params: list, chunk_size: int):
+    # 生成器被关闭(如客户端断开)时退出with块，关闭游标并归还连接
+    with get_database_connection() as connection:
+        with connection.cursor(name=f"task_export_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = chunk_size
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                chunk = []
+                for row in rows:
+                    row = list(row)
+                    for index in _TASK_TIMESTAMP_COLUMNS:
+                        row[index] = _format_timestamp(row[index])
+                    chunk.append(row)
+                yield chunk
+
+
+@timed_query
+def delete_task(task_id: int) -> str:
+    """
+    根据任务ID删除任务记录
+
+    Args:
+        task_id: 要删除的任务ID
+
+    Returns:
+        str: 成功消息
+
+    Raises:
+        DatabaseError: 数据库操作失败时抛出
+        ValueError: 任务不存在时抛出
+    """
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                # 检查任务是否存在
+                created_at = _task_created_at(cursor, task_id)
+                if created_at is None:
+                    raise ValueError("任务不存在")
+
+                # 删除任务
+                cursor.execute(
+                    f"DELETE FROM task WHERE {_TASK_BY_ID}",
+                    (task_id, created_at)
+                )
+                notify_tasks_changed(cursor, [task_id])
+                connection.commit()
+
+        return "任务删除成功"
+
+    except Exception as error:
+        raise DatabaseError(f"删除任务时发生错误: {str(error)}")
+
+
+TASK_STATUSES = ("pending", "approved", "rejected")
+
+# get_task_stats的分组方式与task_stats表中维度的对应关系
+TASK_STATS_GROUPS = {"user": "applicant", "category": "category"}
+
+
+def _stats_entry(counts: dict) -> dict:
+    status = {name: counts.get(name, 0) for name in TASK_STATUSES}
+    return {"total": sum(status.values()), "status": status}
+
+
+@timed_query
+def get_task_stats(user_id: int = None, category: str = None, group_by: str = None) -> dict:
+    """
+    从task_stats读取按状态汇总的任务数(加上尚未合并的增量)，不扫描task表
+
+    Args:
+        user_id: 只统计该用户申请的任务
+        category: 只统计该类别的任务
+        group_by: user或category，返回每个用户(类别)的统计
+
+    Returns:
+        dict: {'total': 总数, 'status': {状态: 数量}}；
+            指定group_by时为 {'groups': [{'key': 用户ID或类别, 'total', 'status'}]}
+
+    Raises:
+        ValueError: 参数组合不受支持时抛出
+        DatabaseError: 数据库操作失败时抛出
+    """
+    if user_id and category:
+        raise ValueError("不支持同时按用户和类别统计")
+    if group_by is not None and group_by not in TASK_STATS_GROUPS:
+        raise ValueError(f"group_by必须是{'/'.join(TASK_STATS_GROUPS)}之一")
+
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                if group_by:
+                    cursor.execute(
+                        """
+                        SELECT key, status, count FROM task_stats_current
+                        WHERE dimension = %s AND count <> 0
+                        ORDER BY key
+                    """,
+                        (TASK_STATS_GROUPS[group_by],),
+                    )
+                    groups = {}
+                    for key, status, count in cursor.fetchall():
+                        groups.setdefault(key, {})[status] = count
+
+                    result = []
+                    for key, counts in groups.items():
+                        if group_by == "user":
+                            key = int(key) if key else None
+                        result.append({"key": key or None, **_stats_entry(counts)})
+                    return {"groups": result}
+
+                if user_id:
+                    dimension, key = "applicant", str(user_id)
+                elif category:
+                    dimension, key = "category", category
+                else:
+                    dimension, key = "all", ""
+                cursor.execute(
+                    "SELECT status, count FROM task_stats_current WHERE dimension = %s AND key = %s",
+                    (dimension, key),
+                )
+                return _stats_entry(dict(cursor.fetchall()))
+
+    except Exception as error:
+        raise DatabaseError(f"获取任务统计时发生错误: {str(error)}")
+
+
+@timed_query
+def reconcile_task_stats() -> int:
+    """
+    按task表重新计算task_stats，修正计数偏差
+
+    实际数量与当前计数(含未合并的增量)在同一条语句中读取(同一快照)，只以差值累加到计数上，
+    期间其他事务通过触发器写入的增量不会被覆盖，无需锁住task表。
+
+    Returns:
+        int: 被修正的计数行数
+    """
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    WITH actual AS (
+                        SELECT d.dimension, d.key, t.status, COUNT(*) AS count
+                        FROM task t
+                        CROSS JOIN LATERAL (
+                            VALUES
+                                ('all', ''),
+                                ('applicant', COALESCE(t.applicant_id::TEXT, '')),
+                                ('category', COALESCE(t.category, ''))
+                        ) AS d(dimension, key)
+                        GROUP BY d.dimension, d.key, t.status
+                    ),
+                    drift AS (
+                        SELECT
+                            COALESCE(a.dimension, s.dimension) AS dimension,
+                            COALESCE(a.key, s.key) AS key,
+                            COALESCE(a.status, s.status) AS status,
+                            COALESCE(a.count, 0) - COALESCE(s.count, 0) AS delta
+                        FROM actual a
+                        FULL JOIN task_stats_current s
+                            ON s.dimension = a.dimension AND s.key = a.key AND s.status = a.status
+                        WHERE COALESCE(a.count, 0) <> COALESCE(s.count, 0)
+                    )
+                    INSERT INTO task_stats (dimension, key, status, count)
+                    SELECT dimension, key, status, delta FROM drift
+                    ORDER BY dimension, key, status
+                    ON CONFLICT (dimension, key, status)
+                    DO UPDATE SET count = task_stats.count + EXCLUDED.count,
+                                  updated_at = CURRENT_TIMESTAMP
+                """
+                )
+                corrected = cursor.rowcount
+                cursor.execute("DELETE FROM task_stats WHERE count = 0")
+                return corrected
+
+    except Exception as error:
+        raise DatabaseError(f"校正任务统计时发生错误: {str(error)}")
+
+
+@timed_query
+def fold_task_stats() -> int:
+    """
+    将task_stats_delta中已提交的增量合并到task_stats
+
+    删除增量与累加计数在同一条语句中完成，读取方看到的合计不变；
+    并发合并时后一方跳过已被删除的增量，不会重复累加。
+
+    Returns:
+        int: 合并的增量行数
+    """
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    WITH folded AS (
+                        DELETE FROM task_stats_delta
+                        RETURNING dimension, key, status, delta
+                    ),
+                    merged AS (
+                        INSERT INTO task_stats (dimension, key, status, count)
+                        SELECT dimension, key, status, SUM(delta) FROM folded
+                        GROUP BY dimension, key, status
+                        ORDER BY dimension, key, status
+                        ON CONFLICT (dimension, key, status)
+                        DO UPDATE SET count = task_stats.count + EXCLUDED.count,
+                                      updated_at = CURRENT_TIMESTAMP
+                    )
+                    SELECT COUNT(*) FROM folded
+                """
+                )
+                return cursor.fetchone()[0]
+
+    except Exception as error:
+        raise DatabaseError(f"合并任务统计增量时发生错误: {str(error)}")
+
+
+# endregion
+
+
+# region 爬虫状态同步
+def track_crawl(cursor, fc_task_id: str, task_id: int = None, backend: str = None):
+    """
+    在调用方的事务中登记需要同步状态的爬虫任务
+
+    Args:
+        cursor: 数据库游标，由调用方负责提交事务
+        fc_task_id: 爬虫任务ID
+        task_id: 关联的任务ID
+        backend: 处理该任务的Firecrawl后端名称，查询状态、取消时据此路由
+    """
+    cursor.execute(
+        """
+        INSERT INTO crawl_status (fc_task_id, task_id, backend)
+        VALUES (%s, %s, %s)
+        ON CONFLICT (fc_task_id) DO NOTHING
+    """,
+        (fc_task_id, task_id, backend),
+    )
+
+
+@timed_query
+def claim_crawl_status_polls(limit: int, lease_seconds: float) -> list[tuple]:
+    """
+    领取到期需要同步的进行中爬虫任务
+
+    Args:
+        limit: 最多领取的数量
+        lease_seconds: 租约时长(秒)，期间其他同步器不会重复领取
+
+    Returns:
+        list[tuple]: [(fc_task_id, completed, poll_interval, backend)]
+    """
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    UPDATE crawl_status c
+                    SET next_poll_at = CURRENT_TIMESTAMP + make_interval(secs => %s)
+                    WHERE c.fc_task_id IN (
+                        SELECT fc_task_id FROM crawl_status
+                        WHERE status NOT IN ('completed', 'failed', 'cancelled')
+                        AND next_poll_at <= CURRENT_TIMESTAMP
+                        ORDER BY next_poll_at
+                        LIMIT %s
+                        FOR UPDATE SKIP LOCKED
+                    )
+                    RETURNING c.fc_task_id, c.completed, c.poll_interval, c.backend
+                """,
+                    (lease_seconds, limit),
+                )
+                rows = cursor.fetchall()
+                connection.commit()
+                return rows
+
+    except Exception as error:
+        raise DatabaseError(f"领取待同步爬虫任务时发生错误: {str(error)}")
+
+
+@timed_query
+def update_crawl_statuses(updates: list[dict]) -> int:
+    """
+    批量写入爬虫任务状态
+
+    Args:
+        updates: [{'fc_task_id', 'status', 'completed', 'total', 'credits_used',
+                   'expires_at', 'error', 'poll_interval'}]，值为None的进度字段保留原值，
+                   下次同步时间为当前时间加poll_interval
+
+    Returns:
+        int: 更新的行数
+    """
+    if not updates:
+        return 0
+
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                execute_values(
+                    cursor,
+                    """
+                    UPDATE crawl_status AS c
+                    SET status = COALESCE(v.status, c.status),
+                        completed = COALESCE(v.completed, c.completed),
+                        total = COALESCE(v.total, c.total),
+                        credits_used = COALESCE(v.credits_used, c.credits_used),
+                        expires_at = COALESCE(v.expires_at, c.expires_at),
+                        error = v.error,
+                        poll_interval = v.poll_interval,
+                        next_poll_at = CURRENT_TIMESTAMP + make_interval(secs => v.poll_interval),
+                        updated_at = CURRENT_TIMESTAMP
+                    FROM (VALUES %s) AS v(
+                        fc_task_id, status, completed, total, credits_used,
+                        expires_at, error, poll_interval
+                    )
+                    WHERE c.fc_task_id = v.fc_task_id
+                """,
+                    [
+                        (
+                            item["fc_task_id"],
+                            item["status"],
+                            item["completed"],
+                            item["total"],
+                            item["credits_used"],
+                            item["expires_at"],
+                            item["error"],
+                            item["poll_interval"],
+                        )
+                        for item in updates
+                    ],
+                    template="(%s, %s, %s::integer, %s::integer, %s::integer, %s, %s, %s::real)",
+                    page_size=len(updates),
+                )
+                updated = cursor.rowcount
+                connection.commit()
+                return updated
+
+    except Exception as error:
+        raise DatabaseError(f"更新爬虫任务状态时发生错误: {str(error)}")
+
+
+# 结果写入时每批COPY的页数
+CRAWL_RESULT_COPY_BATCH = 500
+
+# 暂存结果的保留时间(小时)，进程在下载中途退出留下的暂存数据超过该时间后清理
+CRAWL_RESULT_STAGING_HOURS = 24
+
+
+def _copy_text(value) -> str:
+    """转换为COPY文本格式的字段值"""
+    if value is None:
+        return "\\N"
+    return (
+        str(value)
+        .replace("\x00", "")
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_crawl_results(cursor, load_id: str, fc_task_id: str, pages: list[dict]):
+    buffer = io.StringIO()
+    for page in pages:
+        metadata = page.get("metadata") or {}
+        buffer.write(
+            "\t".join(
+                _copy_text(value)
+                for value in (
+                    load_id,
+                    fc_task_id,
+                    metadata.get("sourceURL"),
+                    metadata.get("statusCode"),
+                    page.get("markdown"),
+                    json.dumps(metadata, ensure_ascii=False),
+                )
+            )
+        )
+        buffer.write("\n")
+    buffer.seek(0)
+    cursor.copy_expert(
+        """
+        COPY crawl_result_staging (load_id, fc_task_id, source_url, status_code, markdown, metadata)
+        FROM STDIN
+    """,
+        buffer,
+    )
+
+
+def _stage_crawl_results(load_id: str, fc_task_id: str, pages: list[dict]):
+    """将一批结果页写入暂存表，单独借用连接并立即提交"""
+    with get_database_connection() as connection:
+        with connection.cursor() as cursor:
+            _copy_crawl_results(cursor, load_id, fc_task_id, pages)
+            connection.commit()
+
+
+def _discard_staged_crawl_results(load_id: str):
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("DELETE FROM crawl_result_staging WHERE load_id = %s", (load_id,))
+                connection.commit()
+    except Exception as error:
+        print(f"清理暂存爬虫结果时发生错误: {error}")
+
+
+def store_crawl_results(fc_task_id: str, chunks) -> int:
+    """
+    以流式方式保存爬虫结果页，已有结果会被替换
+
+    下载期间每累积CRAWL_RESULT_COPY_BATCH页COPY到crawl_result_staging并立即提交，
+    只在写入时借用连接，内存占用与结果总量无关；全部下载完成后在一个短事务中
+    替换crawl_result，下载或写入失败时保留原有结果。
+
+    Args:
+        fc_task_id: 爬虫任务ID
+        chunks: 可迭代的结果块，每块为Firecrawl返回的data列表
+
+    Returns:
+        int: 保存的结果页数量
+    """
+    load_id = str(uuid.uuid4())
+    try:
+        stored = 0
+        batch = []
+        for chunk in chunks:
+            batch.extend(chunk)
+            if len(batch) >= CRAWL_RESULT_COPY_BATCH:
+                _stage_crawl_results(load_id, fc_task_id, batch)
+                stored += len(batch)
+                batch = []
+        if batch:
+            _stage_crawl_results(load_id, fc_task_id, batch)
+            stored += len(batch)
+
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "DELETE FROM crawl_result WHERE fc_task_id = %s", (fc_task_id,)
+                )
+                # 按暂存顺序写入，结果ID与Firecrawl返回的顺序一致
+                cursor.execute(
+                    """
+                    INSERT INTO crawl_result (fc_task_id, source_url, status_code, markdown, metadata)
+                    SELECT fc_task_id, source_url, status_code, markdown, metadata
+                    FROM crawl_result_staging
+                    WHERE load_id = %s
+                    ORDER BY id
+                """,
+                    (load_id,),
+                )
+                cursor.execute(
+                    """
+                    DELETE FROM crawl_result_staging
+                    WHERE load_id = %s OR created_at < CURRENT_TIMESTAMP - make_interval(hours => %s)
+                """,
+                    (load_id, CRAWL_RESULT_STAGING_HOURS),
+                )
+                connection.commit()
+                return stored
+
+    except Exception as error:
+        _discard_staged_crawl_results(load_id)
+        raise DatabaseError(f"保存爬虫结果时发生错误: {str(error)}")
+
+
+@timed_query
+def get_local_crawl_status(fc_task_id: str) -> str:
+    """
+    获取本地同步的爬虫任务状态
+
+    Args:
+        fc_task_id: 爬虫任务ID
+
+    Returns:
+        str: 爬虫状态，未跟踪时返回None
+    """
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT status FROM crawl_status WHERE fc_task_id = %s",
+                    (fc_task_id,),
+                )
+                result = cursor.fetchone()
+                return result[0] if result else None
+
+    except Exception as error:
+        raise DatabaseError(f"获取爬虫状态时发生错误: {str(error)}")
+
+
+@timed_query
+def get_crawl_backend(fc_task_id: str) -> str:
+    """
+    获取处理爬虫任务的Firecrawl后端名称，结果缓存在进程内
+
+    Args:
+        fc_task_id: 爬虫任务ID
+
+    Returns:
+        str: 后端名称，未跟踪或未记录后端(历史任务)时返回None
+    """
+    backend = _crawl_backend_cache.get(fc_task_id, _NOT_CACHED)
+    if backend is not _NOT_CACHED:
+        return backend
+
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT backend FROM crawl_status WHERE fc_task_id = %s",
+                    (fc_task_id,),
+                )
+                result = cursor.fetchone()
+
+    except Exception as error:
+        raise DatabaseError(f"获取爬虫任务后端时发生错误: {str(error)}")
+
+    # 未跟踪的任务不缓存，之后登记时能读到
+    if result is None:
+        return None
+    _crawl_backend_cache.set(fc_task_id, result[0])
+    return result[0]
+
+
+@timed_query
+def count_active_crawls_by_backend() -> dict:
+    """
+    按Firecrawl后端统计进行中的爬虫任务数
+
+    Returns:
+        dict: {后端名称: 任务数}，未记录后端的任务以None为键
+    """
+    try:
+        with get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT backend, COUNT(*) FROM crawl_status
+                    WHERE status NOT IN ('completed', 'failed', 'cancelled')
+                    GROUP BY backend
+                """
+                )
+                return dict(cursor.fetchall())
+
+    except Exception as error:
+        raise DatabaseError(f"统计后端爬虫任务数时发生错误: {str(error)}")
+
+
+def iter_stored_crawl_results(
+    fc_task_id: str, after_id: int = 0, limit: int = None, chunk_size: int = 500
+):
+    """
+    使用服务端游标逐行读取已保存的爬虫结果
+
+    Args:
+        fc_task_id: 爬虫任务ID
+        after_id: 只返回ID大于该值的结果，用于分页续传
+        limit: 最多返回的数量，默认不限
+        chunk_size: 每次从服务端游标读取的行数
+
+    Yields:
+        dict: {'id', 'source_url', 'status_code', 'markdown', 'metadata'}
+    """
+    query = """
+        SELECT id, source_url, status_code, markdown, metadata
+        FROM crawl_result
+        WHERE fc_task_id = %s AND id > %s
+        ORDER BY id
+    """
+    params = [fc_task_id, after_id]
+    if limit:
+        query += " LIMIT %s"
+        params.append(limit)
+
+    # 生成器被关闭(如客户端断开)时退出with块，连接回滚并归还连接池
+    with get_database_connection() as connection:
+        with connection.cursor(name=f"crawl_result_{uuid.uuid4().hex}") as cursor:
+            cursor.itersize = chunk_size
+            cursor.execute(query, params)
+            for row in cursor:
+                yield {
+                    "id": row[0],
+                    "source_url": row[1],
+                    "status_code": row[2],
+                    "markdown": row[3],
+                    "metadata": row[4],
+                }
+
+
+# endregion
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1 and sys.argv[1] == "check-indexes":
+        seq_scan_count = 0
+        for item in check_task_indexes():
+            filters = ", ".join(item["filters"]) or "(无过滤)"
+            flag = "SEQ SCAN" if item["seq_scan"] else "index"
+            seq_scan_count += item["seq_scan"]
+            print(f"{flag:8}  cost={item['total_cost']:<10}  {filters}")
+        print(f"共 {seq_scan_count} 个过滤组合仍使用顺序扫描")
+        sys.exit(1 if seq_scan_count else 0)
+
+    if len(sys.argv) > 1 and sys.argv[1] == "purge-pending":
+        # python database.py purge-pending [天数] [--dry-run]
+        days = int(sys.argv[2]) if len(sys.argv) > 2 and sys.argv[2].isdigit() else 7
+        result = purge_pending_accounts(
+            days,
+            dry_run="--dry-run" in sys.argv,
+            progress=lambda stats: print(
+                f"第{stats['batches']}批: 累计账户 {stats['accounts']}，"
+                f"{stats['accounts_per_second']} 个/秒"
+            ),
+        )
+        print(
+            f"{'预计' if result['dry_run'] else '已'}清理账户 {result['accounts']}，"
+            f"档案 {result['profiles']}，任务 {result['tasks']}，用时 {result['elapsed']} 秒"
+        )
+        sys.exit(0)
 
-if __name__ == "__main__":
     init_database()
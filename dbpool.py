@@ -0,0 +1,236 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from psycopg2 import connect, extensions
+
+
+class PoolError(Exception):
+    """连接池相关的自定义异常"""
+    pass
+
+
+class PoolTimeoutError(PoolError):
+    """在超时时间内未能借出连接"""
+    pass
+
+
+class ConnectionPool:
+    """
+    线程安全的PostgreSQL连接池
+
+    借出时执行健康检查，归还时回滚未结束的事务；损坏的连接直接关闭并由新连接补足。
+
+    Args:
+        dsn: 传递给psycopg2.connect的连接参数
+        min_size: 常驻连接数
+        max_size: 最大连接数
+        timeout: 借出连接的最长等待时间(秒)
+        health_check: 是否在借出时检查连接可用性
+        max_idle: 空闲连接超过该秒数后在借出时执行一次SELECT 1探测
+    """
+
+    def __init__(
+        self,
+        dsn: dict,
+        min_size: int = 1,
+        max_size: int = 10,
+        timeout: float = 5.0,
+        health_check: bool = True,
+        max_idle: float = 30.0,
+    ):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("连接池大小配置无效")
+
+        self._dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check = health_check
+        self.max_idle = max_idle
+
+        self._idle = []  # [(connection, 归还时间)]
+        self._in_use = set()
+        self._size = 0
+        self._closed = False
+        self._condition = threading.Condition(threading.Lock())
+
+        self._checkouts = 0
+        self._checkout_failures = 0
+        self._timeouts = 0
+        self._discarded = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+        for _ in range(min_size):
+            self._idle.append((self._connect(), time.monotonic()))
+            self._size += 1
+
+    def _connect(self):
+        return connect(**self._dsn)
+
+    def _is_healthy(self, connection, idle_since: float) -> bool:
+        if connection.closed:
+            return False
+        if not self.health_check:
+            return True
+        if time.monotonic() - idle_since < self.max_idle:
+            # 近期刚归还的连接只检查本地状态，避免每次借出都多一次往返
+            return connection.info.transaction_status == extensions.TRANSACTION_STATUS_IDLE
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def getconn(self, timeout: float = None):
+        """
+        从连接池借出一个连接
+
+        Args:
+            timeout: 等待超时时间(秒)，默认使用连接池配置
+
+        Returns:
+            psycopg2连接对象
+
+        Raises:
+            PoolTimeoutError: 超时未能借出连接
+            PoolError: 连接池已关闭或新建连接失败
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolError("连接池已关闭")
+
+                if self._idle:
+                    connection, idle_since = self._idle.pop()
+                    break
+
+                if self._size < self.max_size:
+                    # 先占位再在锁外建立连接，避免建连期间阻塞其他线程
+                    self._size += 1
+                    connection = None
+                    break
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    self._checkout_failures += 1
+                    raise PoolTimeoutError(
+                        f"等待数据库连接超时({timeout}秒)，当前连接数: {self._size}"
+                    )
+                self._condition.wait(remaining)
+
+        if connection is None or not self._is_healthy(connection, idle_since):
+            if connection is not None:
+                self._close_quietly(connection)
+                with self._condition:
+                    self._discarded += 1
+            try:
+                connection = self._connect()
+            except Exception as error:
+                with self._condition:
+                    self._size -= 1
+                    self._checkout_failures += 1
+                    self._condition.notify()
+                raise PoolError(f"建立数据库连接失败: {error}")
+
+        waited = time.monotonic() - started
+        with self._condition:
+            self._in_use.add(connection)
+            self._checkouts += 1
+            self._wait_time_total += waited
+            self._wait_time_max = max(self._wait_time_max, waited)
+        return connection
+
+    def putconn(self, connection, close: bool = False):
+        """
+        归还连接，未结束的事务会被回滚
+
+        Args:
+            connection: 借出的连接
+            close: 为True时直接关闭该连接而不放回池中
+        """
+        if not close and not connection.closed:
+            try:
+                if connection.info.transaction_status != extensions.TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+            except Exception:
+                close = True
+
+        with self._condition:
+            self._in_use.discard(connection)
+            if close or connection.closed or self._closed:
+                self._close_quietly(connection)
+                self._discarded += 1
+                self._size -= 1
+            else:
+                self._idle.append((connection, time.monotonic()))
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self, timeout: float = None):
+        """
+        以上下文管理器方式借出连接：正常退出时提交，异常时回滚，最终归还给连接池
+        """
+        connection = self.getconn(timeout)
+        broken = False
+        try:
+            yield connection
+            connection.commit()
+        except BaseException:
+            try:
+                connection.rollback()
+            except Exception:
+                broken = True
+            raise
+        finally:
+            self.putconn(connection, close=broken or connection.closed)
+
+    def stats(self) -> dict:
+        """
+        获取连接池统计信息
+
+        Returns:
+            dict: 连接数、使用中连接数、等待时间与借出失败次数等
+        """
+        with self._condition:
+            return {
+                "size": self._size,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "in_use": len(self._in_use),
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "checkout_failures": self._checkout_failures,
+                "timeouts": self._timeouts,
+                "discarded": self._discarded,
+                "wait_time_total": round(self._wait_time_total, 6),
+                "wait_time_max": round(self._wait_time_max, 6),
+                "wait_time_avg": round(self._wait_time_total / self._checkouts, 6)
+                if self._checkouts
+                else 0.0,
+            }
+
+    def close(self):
+        """关闭连接池及其中的空闲连接，使用中的连接在归还时关闭"""
+        with self._condition:
+            self._closed = True
+            for connection, _ in self._idle:
+                self._close_quietly(connection)
+                self._size -= 1
+            self._idle = []
+            self._condition.notify_all()
@@ -0,0 +1,149 @@
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from database import claim_crawl_outbox, complete_crawl_outbox, fail_crawl_outbox
+from events import register_outbox_listener
+from fcmanager import create_crawl_task
+
+
+class CrawlDispatcher:
+    """
+    后台爬虫提交器：从crawl_outbox领取已审核的任务提交给Firecrawl，并回写fc_task_id
+
+    Args:
+        max_workers: 同时进行的提交数量上限
+        poll_interval: 没有待提交任务时的轮询间隔(秒)
+        max_attempts: 最大尝试次数，超过后标记为failed
+        base_delay: 重试退避的初始等待时间(秒)，每次失败翻倍
+        max_delay: 重试退避的最长等待时间(秒)
+        lease_seconds: 领取记录的租约时长(秒)，应大于单次提交的最长耗时
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        poll_interval: float = 1.0,
+        max_attempts: int = 5,
+        base_delay: float = 5.0,
+        max_delay: float = 600.0,
+        lease_seconds: float = 120.0,
+    ):
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lease_seconds = lease_seconds
+
+        self._slots = threading.Semaphore(max_workers)
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._executor = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        register_outbox_listener(self.wake)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="crawl-dispatch"
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="crawl-dispatcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def wake(self):
+        """有新的待提交任务时调用，立即开始下一轮领取"""
+        self._wakeup.set()
+
+    def _free_slots(self) -> int:
+        # 只领取能立即执行的数量，避免领取的记录在本地排队期间租约过期
+        free = 0
+        while free < self.max_workers and self._slots.acquire(blocking=False):
+            free += 1
+        return free
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            claimed = 0
+            free = self._free_slots()
+            try:
+                if free:
+                    items = claim_crawl_outbox(free, self.lease_seconds)
+                    claimed = len(items)
+                    for item in items:
+                        self._executor.submit(self._dispatch, *item)
+            except Exception as error:
+                print(f"领取待提交爬虫任务时发生错误: {error}")
+            finally:
+                for _ in range(free - claimed):
+                    self._slots.release()
+
+            # 本轮领满说明可能还有积压，不等待直接进入下一轮
+            if not free or claimed < free:
+                self._wakeup.wait(self.poll_interval)
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return delay * random.uniform(0.8, 1.2)
+
+    def _dispatch(self, outbox_id: int, task_id: int, site_url: str, attempts: int):
+        try:
+            fc_response = create_crawl_task(url=site_url)
+            fc_task_id = fc_response.get("id")
+            if not fc_task_id:
+                raise Exception(f"Firecrawl未返回任务ID: {fc_response}")
+            complete_crawl_outbox(outbox_id, task_id, fc_task_id, fc_response.get("backend"))
+
+        except Exception as error:
+            retry_delay = (
+                self._retry_delay(attempts) if attempts < self.max_attempts else None
+            )
+            try:
+                fail_crawl_outbox(outbox_id, str(error), retry_delay)
+            except Exception as db_error:
+                print(f"记录爬虫任务失败时发生错误: {db_error}")
+            print(f"提交爬虫任务失败(任务ID:{task_id}, 第{attempts}次): {error}")
+
+        finally:
+            self._slots.release()
+            self._wakeup.set()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher() -> CrawlDispatcher:
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = CrawlDispatcher()
+        return _dispatcher
+
+
+def start_dispatcher() -> CrawlDispatcher:
+    """启动进程内的爬虫提交器"""
+    dispatcher = get_dispatcher()
+    dispatcher.start()
+    return dispatcher
+
+
+def wake_dispatcher():
+    """通知本进程的提交器有新任务；其他进程写入的记录经events的crawl_outbox通道送达"""
+    if _dispatcher is not None:
+        _dispatcher.wake()
@@ -0,0 +1,141 @@
+"""
+跨进程事件：通过PostgreSQL的LISTEN/NOTIFY把任务变更和新的待提交爬虫通知到后台服务进程
+
+gunicorn部署时调度器和提交器运行在单独的服务进程中，web worker在写事务中以pg_notify发出事件
+(database.notify_tasks_changed、notify_crawl_outbox)，事务提交后由本模块的EventListener接收，
+再分发给本进程注册的监听器。开发模式下服务与Flask在同一进程，事件同样经数据库送达。
+"""
+import select
+import threading
+
+import psycopg2
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+
+from database import CRAWL_OUTBOX_CHANNEL, DATABASE_CONFIG, TASK_CHANGED_CHANNEL
+
+
+_task_listeners = []
+_outbox_listeners = []
+
+
+def register_task_listener(listener):
+    """
+    注册任务变更监听器，任务创建、修改、审核或删除的事务提交后以task_id列表调用
+
+    Args:
+        listener: 接收task_id列表的可调用对象，同一批通知中的任务合并为一次调用
+    """
+    _task_listeners.append(listener)
+
+
+def register_outbox_listener(listener):
+    """
+    注册待提交爬虫监听器，crawl_outbox写入新记录的事务提交后调用
+
+    Args:
+        listener: 无参可调用对象
+    """
+    _outbox_listeners.append(listener)
+
+
+def _dispatch(listeners: list, *args):
+    for listener in list(listeners):
+        try:
+            listener(*args)
+        except Exception as error:
+            print(f"事件监听器执行出错: {error}")
+
+
+class EventListener:
+    """
+    后台事件监听器：持有一个不属于连接池的数据库连接，LISTEN任务变更与待提交爬虫两个通道
+
+    连接断开时按reconnect_interval重连；断开期间错过的任务变更由调度器的定期全量加载兜底，
+    每次连接成功后唤醒一次提交器。
+
+    Args:
+        poll_timeout: 等待通知的超时(秒)，决定stop的响应时间
+        reconnect_interval: 连接失败后的重连间隔(秒)
+    """
+
+    def __init__(self, poll_timeout: float = 5.0, reconnect_interval: float = 5.0):
+        self.poll_timeout = poll_timeout
+        self.reconnect_interval = reconnect_interval
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="event-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _connect(self):
+        connection = psycopg2.connect(**DATABASE_CONFIG)
+        connection.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+        with connection.cursor() as cursor:
+            cursor.execute(f"LISTEN {TASK_CHANGED_CHANNEL}")
+            cursor.execute(f"LISTEN {CRAWL_OUTBOX_CHANNEL}")
+        return connection
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                connection = self._connect()
+            except Exception as error:
+                print(f"连接事件通道时发生错误: {error}")
+                self._stopping.wait(self.reconnect_interval)
+                continue
+
+            try:
+                # 连接建立前写入的记录收不到通知，唤醒提交器领取一次
+                _dispatch(_outbox_listeners)
+                self._listen(connection)
+            except Exception as error:
+                print(f"监听事件时发生错误: {error}")
+                self._stopping.wait(self.reconnect_interval)
+            finally:
+                connection.close()
+
+    def _listen(self, connection):
+        while not self._stopping.is_set():
+            if select.select([connection], [], [], self.poll_timeout) == ([], [], []):
+                continue
+            connection.poll()
+
+            task_ids = set()
+            outbox = False
+            while connection.notifies:
+                notify = connection.notifies.pop(0)
+                if notify.channel == TASK_CHANGED_CHANNEL:
+                    task_ids.update(int(item) for item in notify.payload.split(",") if item)
+                elif notify.channel == CRAWL_OUTBOX_CHANNEL:
+                    outbox = True
+
+            if task_ids:
+                _dispatch(_task_listeners, sorted(task_ids))
+            if outbox:
+                _dispatch(_outbox_listeners)
+
+
+_event_listener = None
+_event_listener_lock = threading.Lock()
+
+
+def start_event_listener() -> EventListener:
+    """启动进程内的事件监听器"""
+    global _event_listener
+    with _event_listener_lock:
+        if _event_listener is None:
+            _event_listener = EventListener()
+        _event_listener.start()
+        return _event_listener
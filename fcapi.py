@@ -1,24 +1,99 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import csv
+import io
+import itertools
+import json
+from datetime import datetime
+from urllib.parse import urlencode
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 from database import (
     create_task,
+    create_tasks,
     get_tasks,
+    get_task_stats,
+    search_tasks,
     approve_task,
+    approve_tasks,
     modify_task,
     DatabaseError,
     get_user_role,
+    get_local_crawl_status,
+    get_crawl_backend,
+    iter_stored_crawl_results,
+    iter_task_export,
+    TASK_COLUMNAR_FIELDS,
 )
-from fcmanager import create_crawl_task, get_crawl_status, cancel_crawl_task
+from fcmanager import (
+    get_crawl_status_cached,
+    cancel_crawl_task,
+    iter_crawl_results,
+)
+from serialization import dumps, json_response
+from cron import CronExpression
 
 # 创建蓝图实例
 fc_bp = Blueprint("fctask", __name__, url_prefix="/fctask")
 
+# 批量接口单次请求的最大任务数
+BULK_TASK_LIMIT = 1000
+
+# task表中字段的最大长度，批量写入前逐项校验，避免单项超长导致整批失败
+TASK_FIELD_LIMITS = {"name": 100, "category": 100, "site_url": 200, "schedule": 100}
+
 # 为整个蓝图添加JWT认证
 @fc_bp.before_request
 @jwt_required()
 def before_request():
     pass
 
+
+def get_current_user_role(user_id: int) -> str:
+    """获取当前用户角色，开启JWT_ROLE_CLAIM时直接读取token中的角色"""
+    if current_app.config.get("JWT_ROLE_CLAIM"):
+        role = get_jwt().get("role")
+        if role:
+            return role
+    return get_user_role(user_id)
+
+def _get_bulk_items():
+    """读取批量接口的JSON数组请求体，格式不正确时返回错误消息"""
+    items = request.get_json(silent=True)
+    if not isinstance(items, list) or not items:
+        return None, "请求体必须是非空的JSON数组"
+    if len(items) > BULK_TASK_LIMIT:
+        return None, f"单次最多提交{BULK_TASK_LIMIT}个任务"
+    return items, None
+
+
+def _validate_task_item(item) -> str:
+    """校验批量创建中的单个任务，返回错误消息，校验通过时返回None"""
+    if not isinstance(item, dict):
+        return "任务必须是JSON对象"
+    if not all(item.get(field) for field in ("name", "category", "site_url")):
+        return "缺少必要参数"
+    for field, limit in TASK_FIELD_LIMITS.items():
+        value = item.get(field)
+        if value is not None and (not isinstance(value, str) or len(value) > limit):
+            return f"{field}必须是不超过{limit}个字符的字符串"
+    if item.get("schedule"):
+        try:
+            CronExpression(item["schedule"])
+        except ValueError as e:
+            return str(e)
+    return None
+
+
+def _parse_approval(value) -> bool:
+    """解析is_approved，接受布尔值、0/1及true/false字符串"""
+    if isinstance(value, bool):
+        return value
+    if value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.lower() in ("true", "false", "1", "0"):
+        return value.lower() in ("true", "1")
+    raise ValueError("is_approved必须是布尔值")
+
+
 @fc_bp.route("/create", methods=["POST"])
 def create_fctask():
     try:
@@ -37,23 +112,21 @@ def create_fctask():
         if not all([name, category, site_url]):
             return jsonify({"success": False, "message": "缺少必要参数"}), 400
 
+        if schedule:
+            try:
+                CronExpression(schedule)
+            except ValueError as e:
+                return jsonify({"success": False, "message": str(e)}), 400
+
         # 获取用户角色
-        user_role = get_user_role(current_user_id)
+        user_role = get_current_user_role(current_user_id)
 
         # 根据用户角色设置任务状态和其他参数
         is_admin = user_role == "admin"
         task_status = "approved" if is_admin else "pending"
         reviewer_id = current_user_id if is_admin else None
-        fc_task_id = None
 
-        # 如果是管理员，创建爬虫任务
-        if is_admin:
-            fc_response = create_crawl_task(
-                url=site_url, name=name, description=description, schedule=schedule
-            )
-            fc_task_id = fc_response.get("id")
-
-        # 创建数据库任务记录
+        # 创建数据库任务记录；管理员创建的任务直接通过，爬虫由后台提交器提交
         message = create_task(
             applicant_id=current_user_id,
             name=name,
@@ -63,16 +136,9 @@ def create_fctask():
             status=task_status,
             reviewer_id=reviewer_id,
             schedule=schedule,
-            fc_task_id=fc_task_id,
         )
 
-        return jsonify(
-            {
-                "success": True,
-                "message": message,
-                "data": {"fc_task_id": fc_task_id} if fc_task_id else None,
-            }
-        ), 200
+        return jsonify({"success": True, "message": message, "data": None}), 200
 
     except DatabaseError as e:
         return jsonify({"success": False, "message": str(e)}), 400
@@ -86,7 +152,7 @@ def audit_fctask():
     try:
         # 获取当前用户ID和角色
         admin_id = int(get_jwt_identity())
-        user_role = get_user_role(admin_id)
+        user_role = get_current_user_role(admin_id)
         
         # 检查是否为管理员
         if user_role != "admin":
@@ -102,6 +168,12 @@ def audit_fctask():
                 {"success": False, "message": "缺少必要参数task_id或is_approved"}
             ), 400
 
+        # 表单值是字符串，"false"、"0"等必须解析为不通过
+        try:
+            is_approved = _parse_approval(is_approved)
+        except ValueError as e:
+            return jsonify({"success": False, "message": str(e)}), 400
+
         # 调用database审核任务
         response = approve_task(
             task_id=task_id, admin_id=admin_id, is_approved=is_approved
@@ -115,6 +187,116 @@ def audit_fctask():
         return jsonify({"success": False, "message": f"任务审核失败: {str(e)}"}), 500
 
 
+@fc_bp.route("/bulk_create", methods=["POST"])
+def bulk_create_fctask():
+    try:
+        current_user_id = int(get_jwt_identity())
+
+        items, error = _get_bulk_items()
+        if error:
+            return jsonify({"success": False, "message": error}), 400
+
+        # 逐项校验，只写入校验通过的任务
+        results = []
+        valid = []
+        for index, item in enumerate(items):
+            error = _validate_task_item(item)
+            if error:
+                results.append({"index": index, "success": False, "message": error})
+            else:
+                results.append(None)
+                valid.append((index, item))
+
+        # 管理员创建的任务直接通过审核，爬虫由后台提交器按并发上限提交
+        is_admin = get_current_user_role(current_user_id) == "admin"
+        task_ids = create_tasks(
+            applicant_id=current_user_id,
+            tasks=[item for _, item in valid],
+            status="approved" if is_admin else "pending",
+            reviewer_id=current_user_id if is_admin else None,
+        )
+        for (index, _), task_id in zip(valid, task_ids):
+            results[index] = {
+                "index": index,
+                "success": True,
+                "task_id": task_id,
+                "message": f"任务创建成功,ID:{task_id}",
+            }
+
+        return jsonify(
+            {
+                "success": True,
+                "data": {
+                    "created": len(task_ids),
+                    "failed": len(items) - len(task_ids),
+                    "results": results,
+                },
+                "message": "批量创建任务完成",
+            }
+        ), 200
+
+    except DatabaseError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"批量创建任务失败: {str(e)}"}), 500
+
+
+@fc_bp.route("/bulk_audit", methods=["POST"])
+def bulk_audit_fctask():
+    try:
+        admin_id = int(get_jwt_identity())
+        if get_current_user_role(admin_id) != "admin":
+            return jsonify({"success": False, "message": ""}), 403
+
+        items, error = _get_bulk_items()
+        if error:
+            return jsonify({"success": False, "message": error}), 400
+
+        results = []
+        decisions = {}
+        for index, item in enumerate(items):
+            try:
+                if not isinstance(item, dict) or "task_id" not in item or "is_approved" not in item:
+                    raise ValueError("缺少必要参数task_id或is_approved")
+                task_id = int(item["task_id"])
+                is_approved = _parse_approval(item["is_approved"])
+                if task_id in decisions:
+                    raise ValueError("重复的任务ID")
+            except (TypeError, ValueError) as e:
+                results.append({"index": index, "success": False, "message": str(e)})
+                continue
+            decisions[task_id] = is_approved
+            results.append({"index": index, "task_id": task_id})
+
+        reviewed = approve_tasks(list(decisions.items()), admin_id)
+
+        for result in results:
+            if "success" in result:
+                continue
+            message = reviewed.get(result["task_id"])
+            result["success"] = message is not None
+            result["message"] = message or "任务不存在或已经被审核"
+
+        return jsonify(
+            {
+                "success": True,
+                "data": {
+                    "reviewed": len(reviewed),
+                    "failed": len(items) - len(reviewed),
+                    "results": results,
+                },
+                "message": "批量审核任务完成",
+            }
+        ), 200
+
+    except DatabaseError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    except Exception as e:
+        return jsonify({"success": False, "message": f"批量审核任务失败: {str(e)}"}), 500
+
+
 @fc_bp.route("/get", methods=["GET"])
 def get_fctask():
     try:
@@ -126,6 +308,11 @@ def get_fctask():
         end_date = request.args.get("end_date")
         page = request.args.get("page", 1, type=int)
         page_size = request.args.get("page_size", 20, type=int)
+        pagination = request.args.get("pagination", "offset")
+        cursor = request.args.get("cursor")
+        count_mode = request.args.get("count", "exact")
+        search = request.args.get("search")
+        task_format = request.args.get("format", "rows")
 
         # 调用database获取任务列表
         response = get_tasks(
@@ -136,11 +323,20 @@ def get_fctask():
             end_date=end_date,
             page=page,
             page_size=page_size,
+            pagination=pagination,
+            cursor=cursor,
+            count_mode=count_mode,
+            search=search,
+            task_format=task_format,
         )
 
-        return jsonify(
+        # 大页面的序列化开销较大，使用快速序列化并按Accept-Encoding压缩
+        return json_response(
             {"success": True, "data": response, "message": "获取任务列表成功"}
-        ), 200
+        )
+
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
 
     except Exception as e:
         return jsonify(
@@ -148,6 +344,170 @@ def get_fctask():
         ), 500
 
 
+@fc_bp.route("/search", methods=["GET"])
+def search_fctask():
+    """按相关度搜索任务
+
+    Query Parameters:
+        q: 搜索关键词，匹配名称、描述(按词前缀)与site_url(子串)
+        status, category, start_date, end_date: 与/get相同的过滤条件
+        page_size: 每页数量，默认20，最大2000
+        cursor: 上一页返回的next_cursor
+
+    Returns:
+        JSON响应，任务按相关度从高到低排列，每项附带rank
+    """
+    try:
+        user_id = int(get_jwt_identity())
+        response = search_tasks(
+            request.args.get("q"),
+            user_id=user_id,
+            status=request.args.get("status"),
+            category=request.args.get("category"),
+            start_date=request.args.get("start_date"),
+            end_date=request.args.get("end_date"),
+            page_size=request.args.get("page_size", 20, type=int),
+            cursor=request.args.get("cursor"),
+        )
+        return json_response(
+            {"success": True, "data": response, "message": "搜索任务成功"}
+        )
+
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    except Exception as e:
+        return jsonify(
+            {"success": False, "message": f"搜索任务失败: {str(e)}"}
+        ), 500
+
+
+# 导出格式及其Content-Type
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+# 以这些字符开头的单元格会被Excel等表格软件当作公式执行
+CSV_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _csv_cell(value):
+    """在用户输入的公式前加单引号，使其作为文本显示"""
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _csv_chunks(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # 带BOM，Excel可以直接识别UTF-8编码的中文
+    buffer.write("\ufeff")
+    writer.writerow(TASK_COLUMNAR_FIELDS)
+    # 表头在查询前发出，客户端立即收到响应
+    yield buffer.getvalue()
+    for chunk in chunks:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_cell(value) for value in row] for row in chunk)
+        yield buffer.getvalue()
+
+
+def _ndjson_chunks(chunks):
+    for chunk in chunks:
+        yield b"".join(dumps(dict(zip(TASK_COLUMNAR_FIELDS, row))) + b"\n" for row in chunk)
+
+
+@fc_bp.route("/export", methods=["GET"])
+def export_fctasks():
+    """流式导出任务(管理员)
+
+    Query Parameters:
+        format: csv(默认)或ndjson
+        user_id: 只导出该用户申请或审核的任务
+        status, category, start_date, end_date, search: 与/get相同的过滤条件
+
+    Returns:
+        以附件形式分块输出的CSV或NDJSON，按任务ID排序，字段与/get的columnar格式相同
+    """
+    try:
+        current_user_id = int(get_jwt_identity())
+        if get_current_user_role(current_user_id) != "admin":
+            return jsonify({"success": False, "message": "只有管理员可以导出任务"}), 403
+
+        export_format = request.args.get("format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"success": False, "message": "无效的导出格式"}), 400
+
+        chunks = iter_task_export(
+            user_id=request.args.get("user_id", type=int),
+            status=request.args.get("status"),
+            category=request.args.get("category"),
+            start_date=request.args.get("start_date"),
+            end_date=request.args.get("end_date"),
+            search=request.args.get("search"),
+        )
+        body = _csv_chunks(chunks) if export_format == "csv" else _ndjson_chunks(chunks)
+        filename = f"tasks-{datetime.now().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+
+        return Response(
+            stream_with_context(body),
+            mimetype=EXPORT_FORMATS[export_format],
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                # 阻止反向代理缓冲整个响应
+                "X-Accel-Buffering": "no",
+            },
+        )
+
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    except Exception as e:
+        return jsonify(
+            {"success": False, "message": f"导出任务失败: {str(e)}"}
+        ), 500
+
+
+@fc_bp.route("/stats", methods=["GET"])
+def get_fctask_stats():
+    """获取按状态汇总的任务数
+
+    Query Parameters:
+        user_id: 只统计该用户申请的任务(管理员)
+        category: 只统计该类别的任务(管理员)
+        group_by: user或category，按用户或类别分组(管理员)
+
+    Returns:
+        JSON响应；普通用户只能查看自己申请的任务统计
+    """
+    try:
+        current_user_id = int(get_jwt_identity())
+        user_id = request.args.get("user_id", type=int)
+        category = request.args.get("category")
+        group_by = request.args.get("group_by")
+
+        if get_current_user_role(current_user_id) != "admin":
+            if category or group_by or (user_id and user_id != current_user_id):
+                return jsonify({"success": False, "message": "只有管理员可以查看其他用户的统计"}), 403
+            user_id = current_user_id
+
+        response = get_task_stats(user_id=user_id, category=category, group_by=group_by)
+        return jsonify(
+            {"success": True, "data": response, "message": "获取任务统计成功"}
+        ), 200
+
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    except Exception as e:
+        return jsonify(
+            {"success": False, "message": f"获取任务统计失败: {str(e)}"}
+        ), 500
+
+
 @fc_bp.route("/modify", methods=["POST"])
 def modify_fctask():
     try:
@@ -171,6 +531,9 @@ def modify_fctask():
                 "message": "至少需要提供一个要修改的字段"
             }), 400
 
+        if schedule:
+            CronExpression(schedule)  # 无效时抛出ValueError，返回400
+
         # 调用database修改任务
         message = modify_task(
             task_id=task_id,
@@ -198,6 +561,11 @@ def modify_fctask():
         }), 500
 
 
+def crawl_results_url(fc_task_id: str) -> str:
+    """/fctask/results的地址，/fctask/info的响应中以results_url返回"""
+    return f"{fc_bp.url_prefix}/results?{urlencode({'fc_task_id': fc_task_id})}"
+
+
 @fc_bp.route("/info", methods=["GET"])
 def get_task_status():
     """获取爬虫任务状态
@@ -206,15 +574,65 @@ def get_task_status():
         fc_task_id: 爬虫任务ID
 
     Returns:
-        JSON响应，包含任务状态信息
+        JSON响应，包含任务状态与进度(不含结果数据)，results_url为获取结果的/fctask/results地址；
+        cache字段与X-Cache响应头标明缓存命中情况(hit/miss/coalesced)
     """
     try:
         fc_task_id = request.args.get("fc_task_id")
         if not fc_task_id:
             return jsonify({"success": False, "message": "缺少任务ID参数"}), 400
 
-        status = get_crawl_status(fc_task_id)
-        return jsonify({"success": True, "data": status}), 200
+        status, cache_state = get_crawl_status_cached(fc_task_id, get_crawl_backend(fc_task_id))
+        data = {**status, "results_url": crawl_results_url(fc_task_id)}
+        return (
+            jsonify({"success": True, "data": data, "cache": cache_state}),
+            200,
+            {"X-Cache": cache_state},
+        )
+
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 500
+
+
+@fc_bp.route("/results", methods=["GET"])
+def get_task_results():
+    """以NDJSON流式返回爬虫结果
+
+    Query Parameters:
+        fc_task_id: 爬虫任务ID
+        after_id: 只返回ID大于该值的结果，用于断点续传(仅本地结果)
+        limit: 最多返回的数量(仅本地结果)
+
+    Returns:
+        application/x-ndjson，每行一个结果页；已同步到本地的结果从数据库读取，
+        否则直接转发Firecrawl的分页结果
+    """
+    try:
+        fc_task_id = request.args.get("fc_task_id")
+        if not fc_task_id:
+            return jsonify({"success": False, "message": "缺少任务ID参数"}), 400
+        after_id = request.args.get("after_id", 0, type=int)
+        limit = request.args.get("limit", type=int)
+
+        if get_local_crawl_status(fc_task_id) == "completed":
+            rows = iter_stored_crawl_results(fc_task_id, after_id=after_id, limit=limit)
+            source = "local"
+        else:
+            # 先取第一块，上游错误可以在开始输出前以JSON返回
+            chunks = iter_crawl_results(fc_task_id, get_crawl_backend(fc_task_id))
+            first_chunk = next(chunks, [])
+            rows = itertools.chain(first_chunk, (page for chunk in chunks for page in chunk))
+            source = "upstream"
+
+        def generate():
+            for row in rows:
+                yield json.dumps(row, ensure_ascii=False, default=str) + "\n"
+
+        return Response(
+            stream_with_context(generate()),
+            mimetype="application/x-ndjson",
+            headers={"X-Result-Source": source},
+        )
 
     except Exception as e:
         return jsonify({"success": False, "message": str(e)}), 500
@@ -224,7 +642,7 @@ def get_task_status():
 def delete_fctask():
     try:
         fc_task_id = request.form.get("fc_task_id")
-        cancel_crawl_task(fc_task_id)
+        cancel_crawl_task(fc_task_id, get_crawl_backend(fc_task_id))
         return jsonify({"success": True, "message": "爬虫任务已取消"}), 200
 
     except Exception as e:
@@ -1,17 +1,633 @@
-from firecrawl import FirecrawlApp
+import os
+import random
+import threading
+import time
 
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from urllib3.util.retry import Retry
 
-def get_firecrawl_app(api_key: str = None, api_url: str = None):
-    api_key = "" if not api_key else api_key
-    api_url = "http://127.0.0.1:3002" if not api_url else api_url
-    return FirecrawlApp(api_key=api_key, api_url=api_url)
+from cache import TTLCache
+from database import count_active_crawls_by_backend
+from metrics import FIRECRAWL_REQUEST_DURATION, STATUS_CACHE_REQUESTS, register_collector
+
+
+# Firecrawl客户端配置
+FIRECRAWL_CONFIG = {
+    "api_url": "http://127.0.0.1:3002",
+    "api_key": "",
+    "pool_maxsize": 20,  # 每个客户端保持的最大keep-alive连接数
+    "connect_timeout": 3.05,  # 秒
+    "read_timeout": 30.0,  # 秒
+    "retries": 2,  # 仅对查询类(GET)请求在连接错误或5xx时重试
+}
+
+
+# Firecrawl后端列表: [{"name", "api_url", "api_key", "weight"}]，api_key与weight可省略
+# 为空时使用环境变量FCMANAGER_FIRECRAWL_BACKENDS("名称=地址*权重,..."，权重可省略)，
+# 仍为空时以FIRECRAWL_CONFIG["api_url"]作为唯一后端，名称为default。
+# 未记录后端的历史爬虫任务使用第一个后端，增加后端时应将原有地址放在首位
+FIRECRAWL_BACKENDS = []
+
+# 后端健康检查与熔断配置
+BACKEND_CONFIG = {
+    "probe_interval": 10.0,  # 健康检查间隔(秒)，为None时不启动检查线程
+    "probe_timeout": 2.0,  # 秒
+    "probe_path": "/",  # 返回任意非5xx响应即视为健康
+    "failure_threshold": 3,  # 连续失败次数达到该值时熔断
+    "open_seconds": 30.0,  # 熔断后经过该秒数放行一个试探请求(半开)
+    "load_refresh_interval": 10.0,  # 从数据库刷新各后端进行中任务数的间隔(秒)
+}
+
+
+# 爬虫状态缓存配置；终态结果永久缓存(仍受max_size的LRU淘汰约束)
+STATUS_CACHE_CONFIG = {
+    "max_size": 256,  # 只缓存状态与进度字段，每个条目不超过1KB
+    "ttl": 2.0,  # 秒，进行中任务的状态缓存时间
+}
+
+# 不会再变化的爬虫状态
+TERMINAL_CRAWL_STATUSES = ("completed", "failed", "cancelled")
+
+# 爬虫状态中不缓存的字段: 结果数据与下一页链接，结果由/fctask/results分页获取
+_UNCACHED_STATUS_FIELDS = ("data", "next")
+
+
+class FirecrawlError(Exception):
+    """
+    Firecrawl返回的错误响应
+
+    Args:
+        status_code: HTTP状态码
+        message: 错误信息
+    """
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Firecrawl返回{status_code}: {message}")
+        self.status_code = status_code
+
+
+class FirecrawlClient:
+    """
+    Firecrawl v1 API客户端，复用keep-alive连接
+
+    Args:
+        api_url: Firecrawl服务地址
+        api_key: API密钥
+        pool_maxsize: 连接池最大连接数
+        connect_timeout: 建立连接超时(秒)
+        read_timeout: 读取响应超时(秒)
+        retries: GET请求的重试次数
+    """
+
+    def __init__(
+        self,
+        api_url: str,
+        api_key: str = "",
+        pool_maxsize: int = 20,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 30.0,
+        retries: int = 2,
+    ):
+        self.api_url = api_url.rstrip("/")
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+        if api_key:
+            self.session.headers.update({"Authorization": f"Bearer {api_key}"})
+
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=0.2,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=frozenset({"GET"}),
+                raise_on_status=False,
+            ),
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _request(self, method: str, url: str, **kwargs) -> dict:
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        except Exception:
+            FIRECRAWL_REQUEST_DURATION.observe(time.perf_counter() - started, method, "error")
+            raise
+        FIRECRAWL_REQUEST_DURATION.observe(
+            time.perf_counter() - started, method, f"{response.status_code // 100}xx"
+        )
+        try:
+            body = response.json()
+        except ValueError:
+            body = {}
+        if response.status_code >= 400:
+            message = body.get("error") or response.text or response.reason
+            raise FirecrawlError(response.status_code, message)
+        return body
+
+    def async_crawl_url(self, url: str, **params) -> dict:
+        """提交爬虫任务，立即返回 {'success', 'id', 'url'}"""
+        return self._request(
+            "POST", f"{self.api_url}/v1/crawl", json={"url": url, **params}
+        )
+
+    def get_crawl_status_page(self, task_id: str) -> dict:
+        """查询爬虫任务状态，只返回第一页结果，不跟随next链接"""
+        return self._request("GET", f"{self.api_url}/v1/crawl/{task_id}")
+
+    def iter_crawl_pages(self, task_id: str):
+        """逐块返回爬虫结果，跟随next链接，每次只持有一个响应块"""
+        chunk = self.get_crawl_status_page(task_id)
+        while True:
+            yield chunk.get("data") or []
+            next_url = chunk.get("next")
+            if not next_url:
+                break
+            chunk = self._request("GET", next_url)
+
+    def cancel_crawl(self, task_id: str) -> dict:
+        return self._request("DELETE", f"{self.api_url}/v1/crawl/{task_id}")
+
+    def close(self):
+        self.session.close()
+
+
+_clients = {}
+_clients_pid = None
+_clients_lock = threading.Lock()
+# fork前创建的客户端，子进程中保持引用，不关闭也不回收与父进程共享的keep-alive连接
+_inherited_clients = []
+
+_status_cache = TTLCache(**STATUS_CACHE_CONFIG)
+_status_inflight = {}  # task_id -> _InflightCall
+_status_inflight_lock = threading.Lock()
+
+
+class _InflightCall:
+    """正在进行的上游查询，并发的同一任务查询等待其结果"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def get_firecrawl_client(api_key: str = None, api_url: str = None) -> FirecrawlClient:
+    """
+    获取按(api_url, api_key)复用的Firecrawl客户端
+
+    Args:
+        api_key: API密钥，默认使用FIRECRAWL_CONFIG
+        api_url: 服务地址，默认使用FIRECRAWL_CONFIG
+
+    Returns:
+        FirecrawlClient: 进程内共享的客户端
+    """
+    api_key = FIRECRAWL_CONFIG["api_key"] if not api_key else api_key
+    api_url = FIRECRAWL_CONFIG["api_url"] if not api_url else api_url
+    key = (api_url, api_key)
+
+    global _clients_pid
+    if _clients_pid != os.getpid():
+        with _clients_lock:
+            if _clients_pid != os.getpid():
+                # fork后不复用从父进程继承的keep-alive连接
+                _inherited_clients.extend(_clients.values())
+                _clients.clear()
+                _clients_pid = os.getpid()
+
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = FirecrawlClient(
+                    api_url=api_url,
+                    api_key=api_key,
+                    pool_maxsize=FIRECRAWL_CONFIG["pool_maxsize"],
+                    connect_timeout=FIRECRAWL_CONFIG["connect_timeout"],
+                    read_timeout=FIRECRAWL_CONFIG["read_timeout"],
+                    retries=FIRECRAWL_CONFIG["retries"],
+                )
+                _clients[key] = client
+    return client
+
+
+def close_firecrawl_clients():
+    """关闭全部客户端的连接，下次调用时重新创建"""
+    with _clients_lock:
+        if _clients_pid == os.getpid():
+            for client in _clients.values():
+                client.close()
+        else:
+            _inherited_clients.extend(_clients.values())
+        _clients.clear()
+
+
+class BackendUnavailableError(Exception):
+    """后端已熔断或没有可用的后端"""
+
+
+def _is_backend_failure(error: Exception) -> bool:
+    """连接错误、超时与5xx响应计为后端故障；4xx是请求本身的问题，不计入"""
+    if isinstance(error, FirecrawlError):
+        return error.status_code >= 500
+    return isinstance(error, requests.RequestException)
+
+
+def _request_not_sent(error: Exception) -> bool:
+    """请求是否确定没有被后端处理，此时提交爬虫任务可以安全地改投其他后端"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if isinstance(error, requests.ConnectionError):
+        reason = getattr(error.args[0], "reason", None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+    if isinstance(error, FirecrawlError):
+        return error.status_code == 503
+    return False
+
+
+class FirecrawlBackend:
+    """
+    单个Firecrawl后端：权重、进行中的爬虫任务数、健康状态与熔断器
+
+    熔断器状态: closed(正常)、open(熔断，拒绝请求)、half_open(熔断冷却结束，只放行一个试探请求，
+    成功后恢复closed，失败后重新熔断)。健康状态由BackendProber定期检查，只影响新任务的分配。
+
+    Args:
+        name: 后端名称，记录在crawl_status.backend中
+        api_url: 服务地址
+        api_key: API密钥
+        weight: 权重，负载按 进行中任务数 / 权重 比较
+    """
+
+    def __init__(self, name: str, api_url: str, api_key: str = "", weight: float = 1.0):
+        if weight <= 0:
+            raise ValueError(f"Firecrawl后端{name}的权重必须大于0")
+        self.name = name
+        self.api_url = api_url.rstrip("/")
+        self.api_key = api_key
+        self.weight = float(weight)
+        self.active = 0  # 进行中的爬虫任务数
+        self.healthy = True  # 最近一次健康检查的结果
+        self.state = "closed"
+        self.failures = 0  # 连续失败次数
+        self._opened_at = 0.0
+        self._trial = False  # 半开状态下的试探请求是否已放行
+        self._lock = threading.Lock()
+
+    @property
+    def client(self) -> FirecrawlClient:
+        return get_firecrawl_client(api_key=self.api_key, api_url=self.api_url)
+
+    def available(self) -> bool:
+        """是否可以分配新的爬虫任务，不占用半开状态的试探名额"""
+        with self._lock:
+            if not self.healthy:
+                return False
+            if self.state == "open":
+                return time.monotonic() - self._opened_at >= BACKEND_CONFIG["open_seconds"]
+            return self.state == "closed" or not self._trial
+
+    def allow_request(self) -> bool:
+        """熔断器是否放行请求，半开状态下只放行一个试探请求"""
+        with self._lock:
+            if self.state == "open":
+                if time.monotonic() - self._opened_at < BACKEND_CONFIG["open_seconds"]:
+                    return False
+                self.state = "half_open"
+                self._trial = False
+            if self.state == "half_open":
+                if self._trial:
+                    return False
+                self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.state != "closed":
+                print(f"Firecrawl后端{self.name}已恢复")
+            self.state = "closed"
+            self.failures = 0
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= BACKEND_CONFIG["failure_threshold"]:
+                if self.state != "open":
+                    print(f"Firecrawl后端{self.name}连续失败{self.failures}次，已熔断")
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+    def release_trial(self):
+        """请求既未成功也未失败就结束(如被取消)时归还半开状态的试探名额"""
+        with self._lock:
+            if self.state == "half_open":
+                self._trial = False
+
+    def add_crawl(self):
+        """记录新提交的爬虫任务，数据库中的计数在下次刷新负载时覆盖"""
+        with self._lock:
+            self.active += 1
+
+    def call(self, func):
+        """
+        经熔断器调用后端
+
+        Args:
+            func: 接收FirecrawlClient的函数
+
+        Raises:
+            BackendUnavailableError: 后端已熔断
+        """
+        if not self.allow_request():
+            raise BackendUnavailableError(f"Firecrawl后端{self.name}已熔断")
+        try:
+            result = func(self.client)
+        except Exception as error:
+            if _is_backend_failure(error):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            self.release_trial()
+            raise
+        self.record_success()
+        return result
+
+    def iter_crawl_pages(self, task_id: str):
+        """经熔断器逐块获取爬虫结果"""
+        if not self.allow_request():
+            raise BackendUnavailableError(f"Firecrawl后端{self.name}已熔断")
+        try:
+            yield from self.client.iter_crawl_pages(task_id)
+        except GeneratorExit:
+            # 调用方提前停止读取，已经收到的响应说明后端可用
+            self.record_success()
+            raise
+        except Exception as error:
+            if _is_backend_failure(error):
+                self.record_failure()
+            else:
+                self.record_success()
+            raise
+        except BaseException:
+            self.release_trial()
+            raise
+        self.record_success()
+
+
+_backends = []
+_backends_pid = None
+_backends_lock = threading.Lock()
+_loads_refreshed_at = 0.0
+_loads_lock = threading.Lock()
+
+
+def _parse_backends(value: str) -> list[dict]:
+    """解析 "名称=地址*权重,..." 格式的后端配置"""
+    backends = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, separator, address = item.partition("=")
+        if not separator or not name.strip():
+            raise ValueError(f"无效的Firecrawl后端配置: {item}")
+        address, _, weight = address.partition("*")
+        backends.append(
+            {"name": name.strip(), "api_url": address.strip(), "weight": float(weight) if weight else 1.0}
+        )
+    return backends
+
+
+def get_backends() -> list[FirecrawlBackend]:
+    """
+    获取当前进程的Firecrawl后端，首次调用时按配置创建并启动健康检查线程
+
+    Returns:
+        list[FirecrawlBackend]: 按配置顺序排列的后端
+
+    Raises:
+        ValueError: 后端配置无效
+    """
+    global _backends, _backends_pid, _loads_refreshed_at
+    if _backends_pid != os.getpid():
+        with _backends_lock:
+            if _backends_pid != os.getpid():
+                configs = (
+                    FIRECRAWL_BACKENDS
+                    or _parse_backends(os.environ.get("FCMANAGER_FIRECRAWL_BACKENDS", ""))
+                    or [{"name": "default", "api_url": FIRECRAWL_CONFIG["api_url"]}]
+                )
+                backends = [
+                    FirecrawlBackend(
+                        name=config["name"],
+                        api_url=config["api_url"],
+                        api_key=config.get("api_key", ""),
+                        weight=config.get("weight", 1.0),
+                    )
+                    for config in configs
+                ]
+                names = [backend.name for backend in backends]
+                if len(set(names)) != len(names):
+                    raise ValueError(f"Firecrawl后端名称重复: {names}")
+                # fork后的进程重新建立后端状态和检查线程
+                _backends = backends
+                _loads_refreshed_at = 0.0
+                _backends_pid = os.getpid()
+                start_backend_prober()
+    return _backends
+
+
+def get_backend(name: str = None) -> FirecrawlBackend:
+    """
+    按名称获取后端
+
+    Args:
+        name: 后端名称，为空时(未记录后端的历史任务)返回第一个后端
+
+    Returns:
+        FirecrawlBackend: 后端
+
+    Raises:
+        ValueError: 后端未配置
+    """
+    backends = get_backends()
+    if not name:
+        return backends[0]
+    for backend in backends:
+        if backend.name == name:
+            return backend
+    raise ValueError(f"未配置的Firecrawl后端: {name}")
+
+
+def _refresh_loads(backends: list[FirecrawlBackend]):
+    """按crawl_status中进行中的任务数刷新各后端负载，多个进程提交的任务都计算在内"""
+    global _loads_refreshed_at
+    interval = BACKEND_CONFIG["load_refresh_interval"]
+    if time.monotonic() - _loads_refreshed_at < interval:
+        return
+    with _loads_lock:
+        if time.monotonic() - _loads_refreshed_at < interval:
+            return
+        _loads_refreshed_at = time.monotonic()
+        try:
+            counts = count_active_crawls_by_backend()
+        except Exception as error:
+            print(f"刷新Firecrawl后端负载时发生错误: {error}")
+            return
+    for index, backend in enumerate(backends):
+        # 未记录后端的历史任务属于第一个后端
+        active = counts.get(backend.name, 0) + (counts.get(None, 0) if index == 0 else 0)
+        with backend._lock:
+            backend.active = active
+
+
+def choose_backends() -> list[FirecrawlBackend]:
+    """
+    按负载从低到高排列可以分配新任务的后端
+
+    负载为 (进行中任务数 + 1) / 权重，负载相同的后端随机排列；没有可用后端时返回空列表。
+
+    Returns:
+        list[FirecrawlBackend]: 候选后端
+    """
+    backends = get_backends()
+    _refresh_loads(backends)
+    candidates = [backend for backend in backends if backend.available()]
+    random.shuffle(candidates)
+    return sorted(candidates, key=lambda backend: (backend.active + 1) / backend.weight)
+
+
+def probe_backend(backend: FirecrawlBackend) -> bool:
+    """
+    检查后端是否存活，返回任意非5xx响应即视为健康
+
+    Args:
+        backend: 后端
+
+    Returns:
+        bool: 是否健康
+    """
+    try:
+        response = requests.get(
+            backend.api_url + BACKEND_CONFIG["probe_path"], timeout=BACKEND_CONFIG["probe_timeout"]
+        )
+        healthy = response.status_code < 500
+    except requests.RequestException:
+        healthy = False
+    if healthy != backend.healthy:
+        print(f"Firecrawl后端{backend.name}健康检查{'恢复' if healthy else '失败'}")
+    backend.healthy = healthy
+    return healthy
+
+
+class BackendProber:
+    """
+    后台健康检查：定期检查每个Firecrawl后端，不健康的后端不再分配新的爬虫任务
+
+    检查线程在进程首次使用后端时启动，gunicorn的每个worker各自检查。
+
+    Args:
+        interval: 两次检查之间的间隔(秒)
+    """
+
+    def __init__(self, interval: float = 10.0):
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="firecrawl-prober", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            for backend in get_backends():
+                try:
+                    probe_backend(backend)
+                except Exception as error:
+                    print(f"检查Firecrawl后端{backend.name}时发生错误: {error}")
+            if self._stopping.wait(self.interval):
+                break
+
+
+_prober = None
+_prober_pid = None
+_prober_lock = threading.Lock()
+
+
+def start_backend_prober() -> BackendProber:
+    """启动进程内的后端健康检查，BACKEND_CONFIG["probe_interval"]为None时不启动"""
+    global _prober, _prober_pid
+    if BACKEND_CONFIG["probe_interval"] is None:
+        return None
+    with _prober_lock:
+        if _prober is None or _prober_pid != os.getpid():
+            _prober = BackendProber(BACKEND_CONFIG["probe_interval"])
+            _prober_pid = os.getpid()
+        _prober.start()
+        return _prober
+
+
+def _collect_backend_metrics() -> list:
+    if _backends_pid != os.getpid():
+        return []
+    states = {"closed": 0, "half_open": 1, "open": 2}
+    return [
+        (
+            "fcmanager_firecrawl_backend_up",
+            "gauge",
+            "Firecrawl后端最近一次健康检查是否通过",
+            [({"backend": backend.name}, int(backend.healthy)) for backend in _backends],
+        ),
+        (
+            "fcmanager_firecrawl_backend_circuit_state",
+            "gauge",
+            "Firecrawl后端熔断器状态: 0关闭 1半开 2熔断",
+            [({"backend": backend.name}, states[backend.state]) for backend in _backends],
+        ),
+        (
+            "fcmanager_firecrawl_backend_active_crawls",
+            "gauge",
+            "分配到Firecrawl后端的进行中爬虫任务数",
+            [({"backend": backend.name}, backend.active) for backend in _backends],
+        ),
+    ]
+
+
+register_collector(_collect_backend_metrics)
 
 
 def create_crawl_task(
     url: str, name: str = None, description: str = None, schedule: str = None
 ) -> dict:
     """
-    创建新的爬虫任务
+    创建新的爬虫任务，提交到负载最低的可用后端
+
+    后端连接失败时改投下一个后端；请求可能已被后端处理的错误(如读取超时)直接抛出，避免重复爬取。
 
     Args:
         url: 目标网站URL
@@ -20,58 +636,162 @@ def create_crawl_task(
         schedule: 定时计划(cron表达式),可选
 
     Returns:
-        dict: 包含任务ID等信息的字典
+        dict: 包含任务ID等信息的字典，backend为处理该任务的后端名称
 
     Raises:
         Exception: 创建任务失败时抛出异常
     """
+    # 构建任务参数
+    task_params = {
+        "url": url,
+    }
+
+    # 过滤掉None值
+    task_params = {k: v for k, v in task_params.items() if v is not None}
+
+    last_error = None
     try:
-        app = get_firecrawl_app()
+        for backend in choose_backends():
+            try:
+                response = backend.call(lambda client: client.async_crawl_url(**task_params))
+            except BackendUnavailableError as e:
+                last_error = e
+                continue
+            except Exception as e:
+                if not _request_not_sent(e):
+                    raise
+                last_error = e
+                continue
+            backend.add_crawl()
+            response["backend"] = backend.name
+            return response
+
+    except Exception as e:
+        raise Exception(f"创建爬虫任务失败: {str(e)}")
+
+    raise Exception(f"创建爬虫任务失败: {str(last_error) if last_error else '没有可用的Firecrawl后端'}")
+
+
+def iter_crawl_results(task_id: str, backend: str = None):
+    """
+    以生成器方式逐块获取爬虫结果，内存占用与结果总量无关
 
-        # 构建任务参数
-        task_params = {
-            "url": url,
-        }
+    Args:
+        task_id: 爬虫任务ID
+        backend: 处理该任务的后端名称，为空时使用第一个后端
 
-        # 过滤掉None值
-        task_params = {k: v for k, v in task_params.items() if v is not None}
+    Yields:
+        list[dict]: Firecrawl每次响应中的data列表
 
-        return app.async_crawl_url(**task_params)
+    Raises:
+        Exception: 查询失败时抛出异常
+    """
+    try:
+        yield from get_backend(backend).iter_crawl_pages(task_id)
 
     except Exception as e:
-        raise Exception(f"创建爬虫任务失败: {str(e)}")
+        raise Exception(f"获取爬虫结果失败: {str(e)}")
 
 
-def get_crawl_status(task_id: str) -> dict:
+def get_crawl_progress(task_id: str, backend: str = None) -> dict:
     """
-    根据任务ID查询爬虫任务状态
+    查询爬虫任务进度，不拉取结果数据
 
     Args:
         task_id: 爬虫任务ID
+        backend: 处理该任务的后端名称，为空时使用第一个后端
 
     Returns:
-        dict: 包含任务状态信息的字典
+        dict: 包含status、completed、total等字段的字典
+
+    Raises:
+        Exception: 查询失败时抛出异常
+    """
+    try:
+        return status_summary(
+            get_backend(backend).call(lambda client: client.get_crawl_status_page(task_id))
+        )
+
+    except Exception as e:
+        raise Exception(f"查询爬虫任务进度失败: {str(e)}")
+
+
+def status_summary(status: dict) -> dict:
+    """去掉爬虫状态中的结果数据，只保留状态与进度字段，用于缓存和/fctask/info的响应"""
+    return {key: value for key, value in status.items() if key not in _UNCACHED_STATUS_FIELDS}
+
+
+def get_crawl_status_cached(task_id: str, backend: str = None) -> tuple[dict, str]:
+    """
+    带缓存的爬虫任务状态查询
+
+    进行中的任务缓存STATUS_CACHE_CONFIG['ttl']秒，终态任务永久缓存；
+    同一任务的并发查询合并为一次上游请求。只请求第一页，缓存与返回的状态只包含状态与进度字段，不含结果数据。
+
+    Args:
+        task_id: 爬虫任务ID
+        backend: 处理该任务的后端名称，为空时使用第一个后端
+
+    Returns:
+        tuple[dict, str]: (状态信息, 缓存情况 hit/miss/coalesced)
 
     Raises:
         Exception: 查询状态失败时抛出异常
     """
+    status = _status_cache.get(task_id)
+    if status is not None:
+        STATUS_CACHE_REQUESTS.inc("hit")
+        return status, "hit"
+
+    with _status_inflight_lock:
+        call = _status_inflight.get(task_id)
+        leader = call is None
+        if leader:
+            # 持锁再查一次，避免与刚写入缓存的查询错过
+            status = _status_cache.get(task_id)
+            if status is not None:
+                STATUS_CACHE_REQUESTS.inc("hit")
+                return status, "hit"
+            call = _InflightCall()
+            _status_inflight[task_id] = call
+
+    if not leader:
+        call.done.wait()
+        STATUS_CACHE_REQUESTS.inc("coalesced")
+        if call.error is not None:
+            raise call.error
+        return call.result, "coalesced"
+
+    STATUS_CACHE_REQUESTS.inc("miss")
     try:
-        return get_firecrawl_app().check_crawl_status(task_id)
+        status = get_crawl_progress(task_id, backend)
+        ttl = None if status.get("status") in TERMINAL_CRAWL_STATUSES else _status_cache.ttl
+        _status_cache.set(task_id, status, ttl=ttl)
+        call.result = status
+        return status, "miss"
 
     except Exception as e:
-        raise Exception(f"查询爬虫任务状态失败: {str(e)}")
+        call.error = e
+        raise
+
+    finally:
+        with _status_inflight_lock:
+            _status_inflight.pop(task_id, None)
+        call.done.set()
 
 
-def cancel_crawl_task(task_id: str) -> dict:
+def cancel_crawl_task(task_id: str, backend: str = None) -> dict:
     """
     取消爬虫任务
-    
+
     Args:
         task_id: 爬虫任务ID
-    
+        backend: 处理该任务的后端名称，为空时使用第一个后端
+
     Returns:
         dict: 包含任务状态信息的字典
     """
-    return get_firecrawl_app().cancel_crawl(task_id)
-
-
+    try:
+        return get_backend(backend).call(lambda client: client.cancel_crawl(task_id))
+    finally:
+        _status_cache.invalidate(task_id)
@@ -0,0 +1,94 @@
+"""
+生产环境启动配置
+
+用法:
+    gunicorn -c gunicorn.conf.py
+
+主进程只执行一次数据库初始化并预加载应用，随后fork出多个worker；
+连接池、Firecrawl客户端和密码哈希进程池在各worker首次使用时创建，不在进程间共享。
+后台服务(爬虫提交、状态同步、定时调度)在单独的子进程中运行一份，退出后由主进程重启。
+
+可通过环境变量调整:
+    FCMANAGER_BIND           监听地址，默认0.0.0.0:5000
+    FCMANAGER_WORKERS        worker进程数，默认CPU数*2+1
+    FCMANAGER_THREADS        每个worker的线程数，默认8
+    FCMANAGER_MAX_REQUESTS   worker处理该数量的请求后平滑重启，默认1000，0为不重启
+    FCMANAGER_SERVICES       是否同时启动后台服务，默认1
+"""
+import multiprocessing
+import os
+import subprocess
+import sys
+import threading
+
+wsgi_app = "server:app"
+
+bind = os.environ.get("FCMANAGER_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("FCMANAGER_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("FCMANAGER_THREADS", 8))
+worker_class = "gthread"
+
+# 在主进程中导入应用，worker共享只读的代码页，启动更快
+preload_app = True
+
+# worker定期重启以回收内存，随机抖动避免所有worker同时重启
+max_requests = int(os.environ.get("FCMANAGER_MAX_REQUESTS", 1000))
+max_requests_jitter = max_requests // 10
+timeout = 60  # worker无响应超过该秒数时被强制重启
+graceful_timeout = 30  # 重启或退出时等待处理中请求完成的秒数
+keepalive = 5
+
+# 后台服务子进程退出后等待该秒数再重启，避免启动即失败时反复重启
+SERVICES_RESTART_DELAY = 5
+
+_services = None
+_services_stopping = threading.Event()
+
+
+def on_starting(server):
+    from database import close_connection_pool, init_database
+
+    init_database()
+    # fork前关闭主进程的连接，worker各自建立连接池
+    close_connection_pool()
+
+
+def _start_services(server) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(os.path.dirname(__file__), "main.py"), "--services-only"]
+    )
+    server.log.info("后台服务已启动(pid: %s)", process.pid)
+    return process
+
+
+def _supervise_services(server):
+    """在主进程中等待后台服务子进程，异常退出时记录日志并重启"""
+    global _services
+    while True:
+        returncode = _services.wait()
+        if _services_stopping.is_set():
+            return
+        # 主进程回收子进程时可能先于本线程取走退出状态，此时退出码记为0
+        server.log.error(
+            "后台服务已退出(pid: %s, 退出码: %s)，%s秒后重启",
+            _services.pid, returncode, SERVICES_RESTART_DELAY,
+        )
+        if _services_stopping.wait(SERVICES_RESTART_DELAY):
+            return
+        _services = _start_services(server)
+
+
+def when_ready(server):
+    global _services
+    if os.environ.get("FCMANAGER_SERVICES", "1") == "1":
+        _services = _start_services(server)
+        threading.Thread(
+            target=_supervise_services, args=(server,), name="services-supervisor", daemon=True
+        ).start()
+
+
+def on_exit(server):
+    _services_stopping.set()
+    if _services is not None and _services.poll() is None:
+        _services.terminate()
+        _services.wait(graceful_timeout)
@@ -1,6 +1,42 @@
+import os
+import sys
+import threading
+
 from server import app
 from database import init_database
+from dispatcher import start_dispatcher
+from synchronizer import start_synchronizer
+from scheduler import start_scheduler
+from reconciler import start_reconciler
+from partitioning import start_partition_maintainer
+from events import start_event_listener
+
+
+def start_services():
+    """
+    启动后台服务: 爬虫提交、状态同步、定时调度、统计校正与分区维护，每个部署只应运行一份
+
+    事件监听器最后启动，web worker中的任务变更经数据库通知送达已注册的调度器和提交器
+    """
+    start_dispatcher()
+    start_synchronizer()
+    start_scheduler()
+    start_reconciler()
+    start_partition_maintainer()
+    start_event_listener()
+
 
 if __name__ == "__main__":
-    init_database()
-    app.run(debug=True)
+    # --services-only: 只运行后台服务，由gunicorn.conf.py在生产部署中启动
+    if "--services-only" in sys.argv:
+        start_services()
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+    else:
+        init_database()
+        # debug模式下重载器的监视进程也会执行到这里，后台服务只在实际处理请求的子进程中启动一份
+        if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+            start_services()
+        app.run(debug=True)
@@ -0,0 +1,201 @@
+"""
+进程内性能指标，以Prometheus文本格式输出
+
+记录接口延迟、数据库函数耗时、Firecrawl调用和密码哈希耗时；连接池等状态在输出时通过collector读取。
+指标保存在各自进程内，gunicorn多worker部署时每次抓取只得到其中一个worker的数据。
+本模块不依赖Flask，接口耗时的记录与/metrics接口在server.py中注册。
+"""
+import bisect
+import functools
+import threading
+import time
+
+
+# 指标配置
+METRICS_CONFIG = {
+    "slow_query_ms": None,  # 数据库函数耗时超过该毫秒数时打印日志，为None时关闭
+    # 直方图分桶上限(秒)，覆盖从毫秒级查询到数十秒的上游调用
+    "buckets": (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+}
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    """只增不减的计数器"""
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    分桶直方图
+
+    每个标签组合只保存各桶计数、总数与总和，记录一次为一次二分查找加一次加锁。
+    """
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = None):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = tuple(sorted(buckets or METRICS_CONFIG["buckets"]))
+        self._values = {}  # label_values -> [各桶计数..., 总数, 总和]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += 1
+            state[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for label_values, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = _format_labels(self.labels, label_values, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _format_labels(self.labels, label_values, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {state[-2]}")
+            labels = _format_labels(self.labels, label_values)
+            lines.append(f"{self.name}_count{labels} {state[-2]}")
+            lines.append(f"{self.name}_sum{labels} {round(state[-1], 6)}")
+        return lines
+
+
+_metrics = []
+_collectors = []
+
+
+def counter(name: str, documentation: str, labels: tuple = ()) -> Counter:
+    metric = Counter(name, documentation, labels)
+    _metrics.append(metric)
+    return metric
+
+
+def histogram(name: str, documentation: str, labels: tuple = (), buckets: tuple = None) -> Histogram:
+    metric = Histogram(name, documentation, labels, buckets)
+    _metrics.append(metric)
+    return metric
+
+
+def register_collector(collector):
+    """
+    注册在输出时调用的指标收集函数，用于连接池等只需读取当前状态的指标
+
+    Args:
+        collector: 无参可调用对象，返回 [(名称, 类型, 说明, 值)]，类型为gauge或counter；
+            带标签的指标以 [(标签dict, 值)] 作为值
+    """
+    _collectors.append(collector)
+
+
+HTTP_REQUEST_DURATION = histogram(
+    "fcmanager_http_request_duration_seconds",
+    "HTTP请求处理耗时",
+    ("method", "endpoint", "status"),
+)
+DB_QUERY_DURATION = histogram(
+    "fcmanager_db_query_duration_seconds",
+    "数据库函数耗时，含等待连接的时间",
+    ("function", "outcome"),
+)
+FIRECRAWL_REQUEST_DURATION = histogram(
+    "fcmanager_firecrawl_request_duration_seconds",
+    "Firecrawl API调用耗时(含重试)",
+    ("method", "outcome"),
+)
+PASSWORD_HASH_DURATION = histogram(
+    "fcmanager_password_hash_duration_seconds",
+    "bcrypt计算耗时，含在进程池中排队的时间",
+    ("operation",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+STATUS_CACHE_REQUESTS = counter(
+    "fcmanager_status_cache_requests_total",
+    "爬虫状态查询的缓存结果",
+    ("result",),
+)
+
+
+def timed_query(func):
+    """
+    记录数据库函数的耗时与结果，超过METRICS_CONFIG["slow_query_ms"]时打印慢查询日志
+
+    以函数名作为function标签；生成器函数只会记录创建生成器的耗时，不应使用。
+    """
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            result = func(*args, **kwargs)
+            outcome = "ok"
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            DB_QUERY_DURATION.observe(elapsed, name, outcome)
+            threshold = METRICS_CONFIG["slow_query_ms"]
+            if threshold is not None and elapsed * 1000 >= threshold:
+                # 不输出参数，避免密码等敏感信息写入日志
+                print(f"慢查询: {name} 耗时{elapsed * 1000:.1f}ms ({outcome})")
+
+    return wrapper
+
+
+def render() -> str:
+    """以Prometheus文本格式输出全部指标"""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.render())
+    for collector in _collectors:
+        try:
+            samples = collector()
+        except Exception as error:
+            print(f"收集指标时发生错误: {error}")
+            continue
+        for name, kind, documentation, value in samples:
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {kind}")
+            if isinstance(value, list):
+                for labels, sample in value:
+                    lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {sample}")
+            else:
+                lines.append(f"{name} {value}")
+    return "\n".join(lines) + "\n"
+
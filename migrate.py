@@ -0,0 +1,301 @@
+"""
+数据库迁移
+
+migrations/目录下的SQL文件按文件名中的版本号依次执行，已执行的版本记录在schema_version表中。
+多个进程同时启动时由advisory lock保证只有一个进程执行迁移，其余进程等待其完成。
+
+用法:
+    python migrate.py           执行未应用的迁移
+    python migrate.py status    查看各迁移的执行情况
+"""
+import hashlib
+import os
+import re
+import time
+
+import psycopg2
+
+# 迁移文件目录，文件名格式: 版本号_说明.sql，如0003_add_task_stats.sql
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# 执行迁移期间持有的advisory lock键
+MIGRATION_LOCK_ID = 7246001
+
+# 文件首行为该标记时不使用事务，逐条以自动提交方式执行，
+# 用于CREATE INDEX CONCURRENTLY等不能在事务块中执行的语句
+NO_TRANSACTION_MARKER = "-- migrate: no-transaction"
+
+_FILENAME_PATTERN = re.compile(r"^(\d+)_(\w+)\.sql$")
+_CONCURRENT_INDEX_PATTERN = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+(?:IF\s+NOT\s+EXISTS\s+)?(\w+)",
+    re.IGNORECASE,
+)
+
+
+class MigrationError(Exception):
+    """迁移文件无效或执行失败时抛出"""
+    pass
+
+
+def load_migrations(directory: str = MIGRATIONS_DIR) -> list[dict]:
+    """
+    读取迁移文件
+
+    Args:
+        directory: 迁移文件目录
+
+    Returns:
+        list[dict]: 按版本号排序的迁移，包含version、name、sql、checksum、transactional
+
+    Raises:
+        MigrationError: 文件名无效或版本号重复时抛出
+    """
+    migrations = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".sql"):
+            continue
+        match = _FILENAME_PATTERN.match(filename)
+        if not match:
+            raise MigrationError(f"无效的迁移文件名: {filename}")
+
+        version = int(match.group(1))
+        if version in migrations:
+            raise MigrationError(f"迁移版本号重复: {filename}")
+
+        with open(os.path.join(directory, filename), encoding="utf-8") as file:
+            sql = file.read()
+        migrations[version] = {
+            "version": version,
+            "name": match.group(2),
+            "sql": sql,
+            "checksum": hashlib.sha256(sql.encode("utf-8")).hexdigest(),
+            "transactional": not sql.lstrip().startswith(NO_TRANSACTION_MARKER),
+        }
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def _split_statements(sql: str) -> list[str]:
+    """
+    按行尾的分号拆分语句并去掉注释行
+
+    $$引起的函数体、DO块中的分号不拆分；不处理普通字符串中位于行尾的分号
+    """
+    statements = []
+    lines = []
+    in_dollar_quote = False
+    for line in sql.splitlines():
+        if not in_dollar_quote and line.strip().startswith("--"):
+            continue
+        lines.append(line)
+        if line.count("$$") % 2:
+            in_dollar_quote = not in_dollar_quote
+        if not in_dollar_quote and line.rstrip().endswith(";"):
+            statement = "\n".join(lines).strip()
+            if statement.strip(";").strip():
+                statements.append(statement)
+            lines = []
+    if "\n".join(lines).strip():
+        statements.append("\n".join(lines).strip())
+    return statements
+
+
+def _get_applied_versions(cursor) -> dict[int, str]:
+    cursor.execute("SELECT to_regclass('schema_version')")
+    if cursor.fetchone()[0] is None:
+        return {}
+    cursor.execute("SELECT version, checksum FROM schema_version")
+    return dict(cursor.fetchall())
+
+
+def _drop_invalid_indexes(cursor, sql: str):
+    """删除上次CONCURRENTLY创建失败留下的无效索引，否则IF NOT EXISTS会跳过它们"""
+    names = _CONCURRENT_INDEX_PATTERN.findall(sql)
+    if not names:
+        return
+    cursor.execute(
+        """
+        SELECT c.relname FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE NOT i.indisvalid AND c.relname = ANY(%s)
+    """,
+        (names,),
+    )
+    for (index_name,) in cursor.fetchall():
+        print(f"删除未创建成功的索引: {index_name}")
+        cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index_name}")
+
+
+def _acquire_lock(cursor, poll_interval: float = 0.5):
+    """
+    获取迁移锁
+
+    以pg_try_advisory_lock轮询而不是阻塞在pg_advisory_lock上：阻塞中的语句持有快照，
+    正在执行CREATE INDEX CONCURRENTLY的进程会等待它结束，从而形成死锁。
+    """
+    while True:
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", (MIGRATION_LOCK_ID,))
+        if cursor.fetchone()[0]:
+            return
+        time.sleep(poll_interval)
+
+
+def _apply(connection, migration: dict):
+    started = time.perf_counter()
+    record = """
+        INSERT INTO schema_version (version, name, checksum, execution_ms)
+        VALUES (%s, %s, %s, %s)
+    """
+
+    if migration["transactional"]:
+        connection.autocommit = False
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(migration["sql"])
+                cursor.execute(
+                    record,
+                    (
+                        migration["version"],
+                        migration["name"],
+                        migration["checksum"],
+                        int((time.perf_counter() - started) * 1000),
+                    ),
+                )
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.autocommit = True
+        return
+
+    # 不使用事务时每条语句单独生效，失败后重新执行需要语句本身可重复执行(IF [NOT] EXISTS)
+    with connection.cursor() as cursor:
+        _drop_invalid_indexes(cursor, migration["sql"])
+        for statement in _split_statements(migration["sql"]):
+            cursor.execute(statement)
+        cursor.execute(
+            record,
+            (
+                migration["version"],
+                migration["name"],
+                migration["checksum"],
+                int((time.perf_counter() - started) * 1000),
+            ),
+        )
+
+
+def migrate(config: dict, directory: str = MIGRATIONS_DIR) -> list[dict]:
+    """
+    执行未应用的迁移
+
+    全部迁移都已应用时只执行一次查询即返回，不获取锁。
+
+    Args:
+        config: 传递给psycopg2.connect的连接参数
+        directory: 迁移文件目录
+
+    Returns:
+        list[dict]: 本次执行的迁移
+
+    Raises:
+        MigrationError: 迁移文件无效或执行失败时抛出
+        psycopg2.OperationalError: 无法连接数据库时抛出
+    """
+    migrations = load_migrations(directory)
+    connection = psycopg2.connect(**config)
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            applied = _get_applied_versions(cursor)
+            if all(migration["version"] in applied for migration in migrations):
+                return []
+
+            # 其他进程正在迁移时在此等待，获得锁后重新读取已执行的版本
+            _acquire_lock(cursor)
+            try:
+                cursor.execute(
+                    """
+                    CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        name VARCHAR(100) NOT NULL,
+                        checksum VARCHAR(64) NOT NULL,
+                        execution_ms INTEGER NOT NULL,
+                        applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+                    )
+                """
+                )
+                applied = _get_applied_versions(cursor)
+
+                executed = []
+                for migration in migrations:
+                    checksum = applied.get(migration["version"])
+                    if checksum is not None:
+                        if checksum != migration["checksum"]:
+                            print(
+                                f"警告: 迁移{migration['version']:04d}_{migration['name']}"
+                                "在执行后被修改，修改不会生效，请新增迁移文件"
+                            )
+                        continue
+
+                    try:
+                        _apply(connection, migration)
+                    except Exception as error:
+                        raise MigrationError(
+                            f"执行迁移{migration['version']:04d}_{migration['name']}失败: {error}"
+                        )
+                    print(f"已执行迁移: {migration['version']:04d}_{migration['name']}")
+                    executed.append(migration)
+                return executed
+
+            finally:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (MIGRATION_LOCK_ID,))
+
+    finally:
+        connection.close()
+
+
+def get_migration_status(config: dict, directory: str = MIGRATIONS_DIR) -> list[dict]:
+    """
+    查看各迁移的执行情况
+
+    Returns:
+        list[dict]: 每个迁移的version、name、applied_at(未执行时为None)、modified(执行后文件是否被修改)
+    """
+    connection = psycopg2.connect(**config)
+    try:
+        with connection.cursor() as cursor:
+            applied = {}
+            cursor.execute("SELECT to_regclass('schema_version')")
+            if cursor.fetchone()[0] is not None:
+                cursor.execute("SELECT version, checksum, applied_at FROM schema_version")
+                applied = {row[0]: row[1:] for row in cursor.fetchall()}
+    finally:
+        connection.close()
+
+    return [
+        {
+            "version": migration["version"],
+            "name": migration["name"],
+            "applied_at": applied[migration["version"]][1] if migration["version"] in applied else None,
+            "modified": migration["version"] in applied
+            and applied[migration["version"]][0] != migration["checksum"],
+        }
+        for migration in load_migrations(directory)
+    ]
+
+
+if __name__ == "__main__":
+    import sys
+
+    from database import DATABASE_CONFIG
+
+    if len(sys.argv) > 1 and sys.argv[1] == "status":
+        for item in get_migration_status(DATABASE_CONFIG):
+            state = item["applied_at"] or "未执行"
+            if item["modified"]:
+                state = f"{state} (文件已修改)"
+            print(f"{item['version']:04d}_{item['name']:<30} {state}")
+        sys.exit(0)
+
+    executed = migrate(DATABASE_CONFIG)
+    print(f"共执行 {len(executed)} 个迁移" if executed else "数据库已是最新版本")
@@ -0,0 +1,96 @@
+-- 初始表结构，与早期init_database创建的表一致；使用IF NOT EXISTS以兼容已有数据库
+
+CREATE TABLE IF NOT EXISTS account (
+    id SERIAL PRIMARY KEY,
+    username VARCHAR(50) UNIQUE NOT NULL,
+    password VARCHAR(100) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- pending, approved, rejected
+    role VARCHAR(20) NOT NULL DEFAULT 'user',  -- user, admin
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    approved_at TIMESTAMP,
+    approved_by INTEGER REFERENCES account(id),
+    CONSTRAINT valid_status CHECK (status IN ('pending', 'approved', 'rejected')),
+    CONSTRAINT valid_role CHECK (role IN ('user', 'admin'))
+);
+
+CREATE TABLE IF NOT EXISTS profile (
+    user_id INTEGER REFERENCES account(id) PRIMARY KEY,
+    nickname VARCHAR(50),
+    name VARCHAR(50),
+    department VARCHAR(100),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS task (
+    id SERIAL PRIMARY KEY,
+    applicant_id INTEGER REFERENCES account(id),
+    reviewer_id INTEGER REFERENCES account(id),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    approved_at TIMESTAMP,
+    name VARCHAR(100) NOT NULL,
+    description TEXT,
+    category VARCHAR(100),
+    site_url VARCHAR(200),
+    schedule VARCHAR(100),
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    fc_task_id VARCHAR(100),
+    CONSTRAINT valid_task_status CHECK (status IN ('pending', 'approved', 'rejected'))
+);
+
+-- 审核通过后待提交给Firecrawl的爬虫任务
+CREATE TABLE IF NOT EXISTS crawl_outbox (
+    id SERIAL PRIMARY KEY,
+    task_id INTEGER NOT NULL REFERENCES task(id) ON DELETE CASCADE,
+    site_url VARCHAR(200) NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',  -- pending, done, failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error TEXT,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    processed_at TIMESTAMP,
+    CONSTRAINT valid_outbox_status CHECK (status IN ('pending', 'done', 'failed'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_crawl_outbox_due
+ON crawl_outbox(next_attempt_at) WHERE status = 'pending';
+
+-- 定时任务的触发时间，同一任务的同一触发时间只提交一次
+ALTER TABLE crawl_outbox ADD COLUMN IF NOT EXISTS scheduled_for TIMESTAMP;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_crawl_outbox_schedule
+ON crawl_outbox(task_id, scheduled_for);
+
+-- 本地保存的爬虫进度，由StatusSynchronizer定期同步
+CREATE TABLE IF NOT EXISTS crawl_status (
+    fc_task_id VARCHAR(100) PRIMARY KEY,
+    task_id INTEGER REFERENCES task(id) ON DELETE CASCADE,
+    status VARCHAR(20) NOT NULL DEFAULT 'scraping',  -- scraping, completed, failed, cancelled
+    completed INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    credits_used INTEGER NOT NULL DEFAULT 0,
+    expires_at VARCHAR(40),
+    error TEXT,
+    poll_interval REAL NOT NULL DEFAULT 5,
+    next_poll_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_crawl_status_due
+ON crawl_status(next_poll_at)
+WHERE status NOT IN ('completed', 'failed', 'cancelled');
+
+-- 爬虫结果页
+CREATE TABLE IF NOT EXISTS crawl_result (
+    id BIGSERIAL PRIMARY KEY,
+    fc_task_id VARCHAR(100) NOT NULL REFERENCES crawl_status(fc_task_id) ON DELETE CASCADE,
+    source_url TEXT,
+    status_code INTEGER,
+    markdown TEXT,
+    metadata JSONB,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_crawl_result_task
+ON crawl_result(fc_task_id, id);
@@ -0,0 +1,29 @@
+-- migrate: no-transaction
+-- task表索引，与get_tasks的过滤条件和 ORDER BY created_at DESC, id DESC 对应
+-- 在线创建，不阻塞对task表的写入
+
+-- 无过滤条件及仅按日期范围过滤
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_task_created
+ON task(created_at DESC, id DESC);
+
+-- user_id过滤: applicant_id OR reviewer_id，通过BitmapOr合并两个索引
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_task_applicant_created
+ON task(applicant_id, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_task_reviewer_created
+ON task(reviewer_id, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_task_status_created
+ON task(status, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_task_category_created
+ON task(category, created_at DESC, id DESC);
+
+-- 审核队列只关心待审核任务
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_task_pending_created
+ON task(created_at DESC, id DESC) WHERE status = 'pending';
+
+-- 已被上面的组合索引覆盖的旧索引
+DROP INDEX CONCURRENTLY IF EXISTS idx_task_applicant;
+
+DROP INDEX CONCURRENTLY IF EXISTS idx_task_reviewer;
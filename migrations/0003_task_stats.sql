@@ -0,0 +1,100 @@
+-- 按状态汇总的任务数，分别按全部任务、申请人、类别统计，由task表上的触发器增量维护
+-- dimension: all(key为空)、applicant(key为申请人ID)、category(key为类别，NULL记为空字符串)
+
+CREATE TABLE IF NOT EXISTS task_stats (
+    dimension VARCHAR(20) NOT NULL,
+    key VARCHAR(100) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    count BIGINT NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (dimension, key, status)
+);
+
+-- 将(申请人, 类别, 状态, 增量)展开到三个维度后累加；按主键顺序加锁，并发事务之间不会互相死锁
+CREATE OR REPLACE FUNCTION task_stats_apply(
+    applicant_ids INTEGER[], categories TEXT[], statuses TEXT[], deltas BIGINT[]
+) RETURNS VOID AS $$
+    INSERT INTO task_stats (dimension, key, status, count)
+    SELECT d.dimension, d.key, d.status, SUM(d.delta)
+    FROM unnest(applicant_ids, categories, statuses, deltas) AS c(applicant_id, category, status, delta)
+    CROSS JOIN LATERAL (
+        VALUES
+            ('all', '', c.status, c.delta),
+            ('applicant', COALESCE(c.applicant_id::TEXT, ''), c.status, c.delta),
+            ('category', COALESCE(c.category, ''), c.status, c.delta)
+    ) AS d(dimension, key, status, delta)
+    GROUP BY d.dimension, d.key, d.status
+    ORDER BY d.dimension, d.key, d.status
+    ON CONFLICT (dimension, key, status)
+    DO UPDATE SET count = task_stats.count + EXCLUDED.count, updated_at = CURRENT_TIMESTAMP
+$$ LANGUAGE SQL;
+
+-- 语句级触发器：一条语句写入多行(批量创建、批量审核)时只更新一次各计数行；
+-- UPDATE只在申请人、类别或状态变化时产生非零增量，其余列的更新不写task_stats
+CREATE OR REPLACE FUNCTION task_stats_trigger() RETURNS TRIGGER AS $$
+DECLARE
+    applicant_ids INTEGER[];
+    categories TEXT[];
+    statuses TEXT[];
+    deltas BIGINT[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(applicant_id), array_agg(category), array_agg(status), array_agg(delta)
+        INTO applicant_ids, categories, statuses, deltas
+        FROM (
+            SELECT applicant_id, category::TEXT, status::TEXT, COUNT(*) AS delta
+            FROM new_rows GROUP BY 1, 2, 3
+        ) AS changes;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(applicant_id), array_agg(category), array_agg(status), array_agg(delta)
+        INTO applicant_ids, categories, statuses, deltas
+        FROM (
+            SELECT applicant_id, category::TEXT, status::TEXT, -COUNT(*) AS delta
+            FROM old_rows GROUP BY 1, 2, 3
+        ) AS changes;
+    ELSE
+        SELECT array_agg(applicant_id), array_agg(category), array_agg(status), array_agg(delta)
+        INTO applicant_ids, categories, statuses, deltas
+        FROM (
+            SELECT applicant_id, category, status, SUM(delta) AS delta
+            FROM (
+                SELECT applicant_id, category::TEXT, status::TEXT, 1 AS delta FROM new_rows
+                UNION ALL
+                SELECT applicant_id, category::TEXT, status::TEXT, -1 AS delta FROM old_rows
+            ) AS signed
+            GROUP BY 1, 2, 3
+            HAVING SUM(delta) <> 0
+        ) AS changes;
+    END IF;
+
+    IF applicant_ids IS NOT NULL THEN
+        PERFORM task_stats_apply(applicant_ids, categories, statuses, deltas);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS task_stats_insert ON task;
+CREATE TRIGGER task_stats_insert AFTER INSERT ON task
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION task_stats_trigger();
+
+DROP TRIGGER IF EXISTS task_stats_update ON task;
+CREATE TRIGGER task_stats_update AFTER UPDATE ON task
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION task_stats_trigger();
+
+DROP TRIGGER IF EXISTS task_stats_delete ON task;
+CREATE TRIGGER task_stats_delete AFTER DELETE ON task
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION task_stats_trigger();
+
+-- 按现有数据初始化；创建触发器时已锁住task表的写入，初始化结果与之后的增量不会重叠
+DELETE FROM task_stats;
+
+SELECT task_stats_apply(array_agg(applicant_id), array_agg(category), array_agg(status), array_agg(delta))
+FROM (
+    SELECT applicant_id, category::TEXT, status::TEXT, COUNT(*) AS delta
+    FROM task GROUP BY 1, 2, 3
+) AS changes
+HAVING COUNT(*) > 0;
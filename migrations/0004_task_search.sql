@@ -0,0 +1,49 @@
+-- migrate: no-transaction
+-- 任务搜索: name/description的全文检索向量与site_url的三元组索引
+-- search_vector由触发器维护而不是生成列，添加生成列会在排他锁下重写整张表；
+-- 已有数据分批回填，每批单独提交，索引在线创建
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE task ADD COLUMN IF NOT EXISTS search_vector TSVECTOR;
+
+-- 名称权重高于描述；使用simple配置，不做词干化，中文按空白和标点切分
+CREATE OR REPLACE FUNCTION task_search_vector(name TEXT, description TEXT) RETURNS TSVECTOR AS $$
+    SELECT setweight(to_tsvector('simple', COALESCE(name, '')), 'A')
+        || setweight(to_tsvector('simple', COALESCE(description, '')), 'B')
+$$ LANGUAGE SQL IMMUTABLE;
+
+CREATE OR REPLACE FUNCTION task_search_vector_trigger() RETURNS TRIGGER AS $$
+BEGIN
+    NEW.search_vector := task_search_vector(NEW.name, NEW.description);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS task_search_vector_update ON task;
+
+CREATE TRIGGER task_search_vector_update BEFORE INSERT OR UPDATE OF name, description ON task
+FOR EACH ROW EXECUTE FUNCTION task_search_vector_trigger();
+
+-- 回填触发器创建前写入的任务
+DO $$
+DECLARE
+    last_id INTEGER := 0;
+    max_id INTEGER;
+BEGIN
+    SELECT COALESCE(MAX(id), 0) INTO max_id FROM task;
+    WHILE last_id < max_id LOOP
+        UPDATE task SET search_vector = task_search_vector(name, description)
+        WHERE id > last_id AND id <= last_id + 10000 AND search_vector IS NULL;
+        last_id := last_id + 10000;
+        COMMIT;
+    END LOOP;
+END
+$$;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_task_search
+ON task USING GIN (search_vector);
+
+-- 支持 site_url ILIKE '%关键词%' 的子串匹配(含域名)，关键词至少3个字符时可用
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_task_site_url_trgm
+ON task USING GIN (site_url gin_trgm_ops);
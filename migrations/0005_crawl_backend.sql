@@ -0,0 +1,4 @@
+-- 多个Firecrawl后端: 记录每个爬虫任务提交到的后端，查询状态、获取结果和取消时发往同一后端
+-- 不带默认值的可空列只修改表定义，不重写crawl_status；已有任务为NULL，按第一个后端处理
+
+ALTER TABLE crawl_status ADD COLUMN IF NOT EXISTS backend VARCHAR(50);
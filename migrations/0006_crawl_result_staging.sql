@@ -0,0 +1,20 @@
+-- 爬虫结果的暂存表: 下载Firecrawl分页结果期间逐批写入并各自提交，下载完成后在一个短事务中替换crawl_result，
+-- 不在整个下载过程中占用连接和事务
+-- UNLOGGED: 暂存数据丢失时重新下载即可，不需要写WAL
+
+CREATE UNLOGGED TABLE IF NOT EXISTS crawl_result_staging (
+    id BIGSERIAL PRIMARY KEY,
+    load_id UUID NOT NULL,
+    fc_task_id VARCHAR(100) NOT NULL,
+    source_url TEXT,
+    status_code INTEGER,
+    markdown TEXT,
+    metadata JSONB,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_crawl_result_staging_load
+ON crawl_result_staging(load_id, id);
+
+CREATE INDEX IF NOT EXISTS idx_crawl_result_staging_created
+ON crawl_result_staging(created_at);
@@ -0,0 +1,40 @@
+-- 任务统计改为只追加的增量表: 触发器不再更新task_stats中的计数行，避免所有任务写入排队等待同一行('all'维度)的行锁
+-- 增量由后台服务定期合并到task_stats，读取时task_stats与未合并的增量相加
+
+CREATE TABLE IF NOT EXISTS task_stats_delta (
+    id BIGSERIAL PRIMARY KEY,
+    dimension VARCHAR(20) NOT NULL,
+    key VARCHAR(100) NOT NULL,
+    status VARCHAR(20) NOT NULL,
+    delta BIGINT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_task_stats_delta_key ON task_stats_delta (dimension, key, status);
+
+-- 将(申请人, 类别, 状态, 增量)展开到三个维度后写入增量表；只插入新行，并发事务之间不争用行锁
+CREATE OR REPLACE FUNCTION task_stats_apply(
+    applicant_ids INTEGER[], categories TEXT[], statuses TEXT[], deltas BIGINT[]
+) RETURNS VOID AS $$
+    INSERT INTO task_stats_delta (dimension, key, status, delta)
+    SELECT d.dimension, d.key, d.status, SUM(d.delta)
+    FROM unnest(applicant_ids, categories, statuses, deltas) AS c(applicant_id, category, status, delta)
+    CROSS JOIN LATERAL (
+        VALUES
+            ('all', '', c.status, c.delta),
+            ('applicant', COALESCE(c.applicant_id::TEXT, ''), c.status, c.delta),
+            ('category', COALESCE(c.category, ''), c.status, c.delta)
+    ) AS d(dimension, key, status, delta)
+    GROUP BY d.dimension, d.key, d.status
+    HAVING SUM(d.delta) <> 0
+$$ LANGUAGE SQL;
+
+-- 当前计数: 已合并的计数加上尚未合并的增量；按dimension、key过滤时条件下推到两张表
+CREATE OR REPLACE VIEW task_stats_current AS
+SELECT dimension, key, status, SUM(count)::BIGINT AS count
+FROM (
+    SELECT dimension, key, status, count FROM task_stats
+    UNION ALL
+    SELECT dimension, key, status, delta FROM task_stats_delta
+) AS combined
+GROUP BY dimension, key, status;
@@ -0,0 +1,46 @@
+-- 任务ID到创建时间的映射，由task上的触发器维护
+-- task按created_at分区后主键为(id, created_at)：按id查询任务时先由本表取得created_at，执行时只访问所在分区；
+-- 分区表上无法单独对id建唯一约束，本表的主键同时保证任务ID唯一。未分区时按id查询多一次主键查找
+
+CREATE TABLE IF NOT EXISTS task_id_map (
+    id INTEGER PRIMARY KEY,
+    created_at TIMESTAMP NOT NULL
+);
+
+-- 语句级触发器：UPDATE只在id或created_at变化时修改映射，其余列的更新不写本表
+CREATE OR REPLACE FUNCTION task_id_map_trigger() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO task_id_map (id, created_at) SELECT id, created_at FROM new_rows;
+    ELSIF TG_OP = 'DELETE' THEN
+        DELETE FROM task_id_map m USING old_rows o WHERE m.id = o.id;
+    ELSE
+        DELETE FROM task_id_map m
+        USING (SELECT id, created_at FROM old_rows EXCEPT SELECT id, created_at FROM new_rows) AS o
+        WHERE m.id = o.id;
+        INSERT INTO task_id_map (id, created_at)
+        SELECT id, created_at FROM new_rows EXCEPT SELECT id, created_at FROM old_rows;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS task_id_map_insert ON task;
+CREATE TRIGGER task_id_map_insert AFTER INSERT ON task
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION task_id_map_trigger();
+
+DROP TRIGGER IF EXISTS task_id_map_update ON task;
+CREATE TRIGGER task_id_map_update AFTER UPDATE ON task
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION task_id_map_trigger();
+
+DROP TRIGGER IF EXISTS task_id_map_delete ON task;
+CREATE TRIGGER task_id_map_delete AFTER DELETE ON task
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION task_id_map_trigger();
+
+-- 按现有数据初始化；创建触发器时已锁住task表的写入，初始化结果与之后的变更不会重叠
+INSERT INTO task_id_map (id, created_at)
+SELECT id, created_at FROM task
+ON CONFLICT (id) DO NOTHING;
@@ -0,0 +1,741 @@
+"""
+task表按created_at的月度范围分区
+
+转换在线进行，期间task表照常读写：
+    1. 建立结构相同的分区表task_partitioned(主键改为(id, created_at))，按月建好分区；
+    2. 在task上创建行级触发器，把此后的写入同步到task_partitioned；
+    3. 按id分批复制已有数据，每批单独提交，中断后可以从上次的位置继续；
+    4. 在一个短事务内交换表名，迁移索引名、触发器和序列，原表去掉外键后保留为task_unpartitioned。
+
+分区表的主键必须包含分区键，crawl_outbox与crawl_status指向task(id)的外键无法保留，
+转换时改为由task上的删除触发器级联删除；这两张表不再校验task_id是否存在。
+id的唯一性由task_id_map(id → created_at)的主键保证；修改、审核、删除单个任务和回写fc_task_id时
+先由该表取得created_at(database._task_created_at)，查询只规划和访问任务所在的分区；
+批量审核、调度器刷新等按id列表的查询同样先取得这些任务的created_at(database._task_created_ats)。
+
+用法:
+    python partitioning.py status                       查看分区情况
+    python partitioning.py convert [--batch-size N]     在线将task转换为分区表
+    python partitioning.py maintain                     创建未来分区，按配置归档过期分区
+    python partitioning.py archive --before 2025-01 [--dry-run]
+                                                        归档该月之前的分区
+    python partitioning.py restore task_p2024_01        将已归档的分区恢复到task
+"""
+import re
+import threading
+import time
+from datetime import date
+
+import psycopg2
+
+from database import DATABASE_CONFIG, get_database_connection
+
+# 分区配置
+PARTITION_CONFIG = {
+    "premake_months": 3,  # 提前创建的未来分区月数
+    "retention_months": None,  # 早于该月数的分区由后台任务归档，为None时不自动归档
+    "archive_schema": "task_archive",  # 归档分区移入的schema
+    "batch_size": 10000,  # 转换时每批复制的行数
+    "lock_timeout": "5s",  # DDL等待表锁的上限，超时后放弃本次操作而不是阻塞其他查询
+}
+
+# 转换与维护期间持有的advisory lock键
+PARTITION_LOCK_ID = 7246002
+
+STAGING_TABLE = "task_partitioned"
+RETIRED_TABLE = "task_unpartitioned"
+DEFAULT_PARTITION = "task_default"
+
+# 仍在使用中的任务：待审核、定时执行或有未完成的提交，所在分区不归档
+_ACTIVE_TASK_CONDITION = """
+    t.status = 'pending'
+    OR (t.status = 'approved' AND t.schedule IS NOT NULL)
+    OR EXISTS (
+        SELECT 1 FROM crawl_outbox o WHERE o.task_id = t.id AND o.status = 'pending'
+    )
+"""
+
+_PARTITION_NAME_PATTERN = re.compile(r"^task_p(\d{4})_(\d{2})$")
+_INDEX_DEF_PATTERN = re.compile(r"^CREATE (UNIQUE )?INDEX (\S+) ON (?:ONLY )?(\S+) (.*)$")
+
+
+class PartitionError(Exception):
+    """分区操作无法执行时抛出"""
+    pass
+
+
+def add_months(month: date, months: int) -> date:
+    """返回month所在月份加上months个月后的第一天"""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    """月份对应的分区表名，如task_p2025_01"""
+    return f"task_p{month.year:04d}_{month.month:02d}"
+
+
+def parse_partition_month(name: str) -> date:
+    """从分区表名解析月份，不是月度分区时返回None"""
+    match = _PARTITION_NAME_PATTERN.match(name)
+    return date(int(match.group(1)), int(match.group(2)), 1) if match else None
+
+
+def is_partitioned(cursor, table: str = "task") -> bool:
+    cursor.execute(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+        (table,),
+    )
+    return cursor.fetchone()[0]
+
+
+def _current_month(cursor) -> date:
+    # 以数据库时钟为准，created_at的默认值也取自数据库
+    cursor.execute("SELECT date_trunc('month', LOCALTIMESTAMP)::date")
+    return cursor.fetchone()[0]
+
+
+def _set_lock_timeout(cursor):
+    cursor.execute("SET LOCAL lock_timeout = %s", (PARTITION_CONFIG["lock_timeout"],))
+
+
+def _default_partition(cursor, parent: str) -> str:
+    """分区表的默认分区名，没有默认分区时返回None"""
+    cursor.execute(
+        """
+        SELECT partdefid::regclass::text FROM pg_partitioned_table
+        WHERE partrelid = to_regclass(%s) AND partdefid <> 0
+        """,
+        (parent,),
+    )
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def _create_month_partition(cursor, parent: str, month: date) -> bool:
+    """
+    创建月度分区，已存在时返回False
+
+    默认分区中已有该月的行时(补录了较早的任务，或维护任务停机超过premake_months)直接创建会失败：
+    先分离默认分区，建好分区后把这些行移入，再挂回默认分区。移动的行仍在task中，不影响task_stats。
+    """
+    name = partition_name(month)
+    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (name,))
+    if cursor.fetchone()[0]:
+        return False
+    bounds = (month, add_months(month, 1))
+
+    default = _default_partition(cursor, parent)
+    moving = False
+    if default:
+        cursor.execute(
+            f"SELECT EXISTS (SELECT 1 FROM {default} WHERE created_at >= %s AND created_at < %s)",
+            bounds,
+        )
+        moving = cursor.fetchone()[0]
+    if moving:
+        cursor.execute(f"ALTER TABLE {parent} DETACH PARTITION {default}")
+
+    cursor.execute(f"CREATE TABLE {name} PARTITION OF {parent} FOR VALUES FROM (%s) TO (%s)", bounds)
+
+    if moving:
+        # 直接读写分区，task上的语句级触发器不会执行
+        columns = ", ".join(_task_columns(cursor, name))
+        cursor.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM {default} WHERE created_at >= %s AND created_at < %s
+                RETURNING {columns}
+            )
+            INSERT INTO {name} ({columns}) SELECT {columns} FROM moved
+            """,
+            bounds,
+        )
+        cursor.execute(f"ALTER TABLE {parent} ATTACH PARTITION {default} DEFAULT")
+    return True
+
+
+def list_partitions(cursor, table: str = "task") -> list[dict]:
+    """
+    列出分区
+
+    Returns:
+        list[dict]: 按月份排序的分区，包含name、month(默认分区为None)、rows(估算)、size
+    """
+    cursor.execute(
+        """
+        SELECT c.relname, c.reltuples::bigint, pg_size_pretty(pg_total_relation_size(c.oid))
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = to_regclass(%s)
+        """,
+        (table,),
+    )
+    partitions = [
+        {
+            "name": name,
+            "month": parse_partition_month(name),
+            "rows": max(rows, 0),
+            "size": size,
+        }
+        for name, rows, size in cursor.fetchall()
+    ]
+    return sorted(partitions, key=lambda item: (item["month"] is None, item["month"] or date.min))
+
+
+# region 在线转换
+
+def _task_columns(cursor, table: str = "task") -> list[str]:
+    cursor.execute(
+        """
+        SELECT attname FROM pg_attribute
+        WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped
+        ORDER BY attnum
+        """,
+        (table,),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _task_indexes(cursor, table: str = "task") -> list[tuple[str, str]]:
+    """task上除主键外的索引(名称, 定义)"""
+    cursor.execute(
+        """
+        SELECT i.relname, pg_get_indexdef(i.oid)
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        WHERE x.indrelid = to_regclass(%s) AND NOT x.indisprimary
+        ORDER BY i.relname
+        """,
+        (table,),
+    )
+    return cursor.fetchall()
+
+
+def _task_triggers(cursor, table: str = "task") -> list[tuple[str, str]]:
+    cursor.execute(
+        """
+        SELECT tgname, pg_get_triggerdef(oid)
+        FROM pg_trigger
+        WHERE tgrelid = to_regclass(%s) AND NOT tgisinternal AND tgname <> 'task_partition_sync'
+        ORDER BY tgname
+        """,
+        (table,),
+    )
+    return cursor.fetchall()
+
+
+def _create_staging_table(cursor, first_month: date, last_month: date):
+    """建立分区表、分区、索引与外键，此时表为空，建索引不需要CONCURRENTLY"""
+    cursor.execute(
+        f"""
+        CREATE TABLE {STAGING_TABLE} (
+            LIKE task INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE INCLUDING COMMENTS,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+
+    month = first_month
+    while month <= last_month:
+        _create_month_partition(cursor, STAGING_TABLE, month)
+        month = add_months(month, 1)
+    # 超出已建分区范围的行写入默认分区，维护任务会提前创建分区，正常情况下默认分区为空
+    cursor.execute(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF {STAGING_TABLE} DEFAULT")
+
+    for name, definition in _task_indexes(cursor):
+        match = _INDEX_DEF_PATTERN.match(definition)
+        if match is None or match.group(1):
+            # 分区表上的唯一索引必须包含created_at
+            raise PartitionError(f"无法在分区表上重建索引: {definition}")
+        cursor.execute(f"CREATE INDEX {name}_part ON {STAGING_TABLE} {match.group(4)}")
+
+    cursor.execute(
+        """
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = 'task'::regclass AND contype = 'f'
+        """
+    )
+    for name, definition in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE {STAGING_TABLE} ADD CONSTRAINT {name} {definition}")
+
+
+def _create_sync_trigger(cursor, columns: list[str]):
+    """task的每次写入同步到分区表；与分批复制并发时以触发器写入的最新版本为准"""
+    column_list = ", ".join(columns)
+    values = ", ".join(f"NEW.{column}" for column in columns)
+    updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in columns)
+    cursor.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION task_partition_sync() RETURNS TRIGGER AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' OR (TG_OP = 'UPDATE' AND OLD.created_at IS DISTINCT FROM NEW.created_at) THEN
+                DELETE FROM {STAGING_TABLE} WHERE id = OLD.id AND created_at = OLD.created_at;
+            END IF;
+            IF TG_OP <> 'DELETE' THEN
+                INSERT INTO {STAGING_TABLE} ({column_list}) VALUES ({values})
+                ON CONFLICT (id, created_at) DO UPDATE SET {updates};
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    cursor.execute(
+        """
+        CREATE TRIGGER task_partition_sync AFTER INSERT OR UPDATE OR DELETE ON task
+        FOR EACH ROW EXECUTE FUNCTION task_partition_sync()
+        """
+    )
+
+
+def _backfilled_id(cursor) -> int:
+    """已复制到的最大id，记录在分区表的注释中，与每批复制在同一事务内更新"""
+    cursor.execute("SELECT obj_description(to_regclass(%s), 'pg_class')", (STAGING_TABLE,))
+    comment = cursor.fetchone()[0] or ""
+    return int(comment.split(":")[1]) if comment.startswith("backfilled:") else 0
+
+
+def _backfill(connection, columns: list[str], batch_size: int, progress):
+    column_list = ", ".join(columns)
+    with connection.cursor() as cursor:
+        # 触发器已生效，此后写入的行由触发器同步，只需复制到当前最大id为止
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM task")
+        max_id = cursor.fetchone()[0]
+        last_id = _backfilled_id(cursor)
+        connection.commit()
+
+        started = time.monotonic()
+        while last_id < max_id:
+            upper = last_id + batch_size
+            cursor.execute(
+                f"""
+                INSERT INTO {STAGING_TABLE} ({column_list})
+                SELECT {column_list} FROM task WHERE id > %s AND id <= %s
+                ON CONFLICT (id, created_at) DO NOTHING
+                """,
+                (last_id, upper),
+            )
+            cursor.execute(f"COMMENT ON TABLE {STAGING_TABLE} IS %s", (f"backfilled:{upper}",))
+            connection.commit()
+            last_id = upper
+            progress(f"已复制 id <= {min(last_id, max_id)} / {max_id}，用时 {time.monotonic() - started:.1f} 秒")
+
+        # 复制与删除并发时，可能复制进已被删除的行，按id分批清理
+        removed = 0
+        last_id = 0
+        while last_id < max_id:
+            cursor.execute(
+                f"""
+                DELETE FROM {STAGING_TABLE} p
+                WHERE p.id > %s AND p.id <= %s
+                  AND NOT EXISTS (SELECT 1 FROM task t WHERE t.id = p.id AND t.created_at = p.created_at)
+                """,
+                (last_id, last_id + batch_size),
+            )
+            removed += cursor.rowcount
+            connection.commit()
+            last_id += batch_size
+        if removed:
+            progress(f"清理了 {removed} 条复制期间已被删除的任务")
+
+
+def _drop_foreign_keys(cursor, table: str):
+    """删除表上指向其他表的外键，表不存在时不做任何事"""
+    cursor.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+        (table,),
+    )
+    for (name,) in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+
+
+def _swap_tables(connection, progress):
+    """在一个事务内以分区表替换task"""
+    with connection.cursor() as cursor:
+        _set_lock_timeout(cursor)
+        cursor.execute("LOCK TABLE task IN ACCESS EXCLUSIVE MODE")
+
+        triggers = _task_triggers(cursor)
+        indexes = [name for name, _ in _task_indexes(cursor)]
+        cursor.execute("SELECT pg_get_serial_sequence('task', 'id')")
+        sequence = cursor.fetchone()[0]
+        cursor.execute(
+            """
+            SELECT conrelid::regclass::text, conname, a.attname, confdeltype
+            FROM pg_constraint c
+            JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+            WHERE confrelid = 'task'::regclass AND contype = 'f'
+            """
+        )
+        references = cursor.fetchall()
+
+        cursor.execute("DROP TRIGGER task_partition_sync ON task")
+        cursor.execute("DROP FUNCTION task_partition_sync()")
+        for name, _ in triggers:
+            cursor.execute(f"DROP TRIGGER {name} ON task")
+        for table, constraint, _, _ in references:
+            cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {constraint}")
+        # 分区表上已建立同样的外键，原表保留外键时删除账户会因原表中的旧行失败
+        _drop_foreign_keys(cursor, "task")
+
+        # 重命名主键约束会同时重命名其索引
+        cursor.execute(f"ALTER TABLE task RENAME TO {RETIRED_TABLE}")
+        cursor.execute(f"ALTER TABLE {RETIRED_TABLE} RENAME CONSTRAINT task_pkey TO {RETIRED_TABLE}_pkey")
+        for name in indexes:
+            cursor.execute(f"ALTER INDEX {name} RENAME TO {name}_unpartitioned")
+            cursor.execute(f"ALTER INDEX {name}_part RENAME TO {name}")
+
+        cursor.execute(f"ALTER TABLE {STAGING_TABLE} RENAME TO task")
+        cursor.execute(f"ALTER TABLE task RENAME CONSTRAINT {STAGING_TABLE}_pkey TO task_pkey")
+        cursor.execute("COMMENT ON TABLE task IS NULL")
+        if sequence:
+            cursor.execute(f"ALTER SEQUENCE {sequence} OWNED BY task.id")
+
+        # 触发器定义中的表名为task，改名后即作用于分区表
+        for _, definition in triggers:
+            cursor.execute(definition)
+
+        # 原外键的ON DELETE CASCADE改由删除触发器完成
+        cascades = [
+            f"DELETE FROM {table} WHERE {column} IN (SELECT id FROM old_rows);"
+            for table, _, column, action in references
+            if action == "c"
+        ]
+        if cascades:
+            cursor.execute(
+                f"""
+                CREATE OR REPLACE FUNCTION task_delete_cascade() RETURNS TRIGGER AS $$
+                BEGIN
+                    {" ".join(cascades)}
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql
+                """
+            )
+            cursor.execute(
+                """
+                CREATE TRIGGER task_delete_cascade AFTER DELETE ON task
+                REFERENCING OLD TABLE AS old_rows
+                FOR EACH STATEMENT EXECUTE FUNCTION task_delete_cascade()
+                """
+            )
+
+    connection.commit()
+    progress(f"已切换为分区表，原表保留为 {RETIRED_TABLE}，确认无误后可执行 DROP TABLE {RETIRED_TABLE}")
+
+
+def convert_task_table(config: dict, batch_size: int = None, progress=print):
+    """
+    在线将task转换为按created_at月度分区的表
+
+    可重复执行：已转换时直接返回，中断后再次执行从上次复制到的位置继续。
+
+    Args:
+        config: 数据库连接参数
+        batch_size: 每批复制的行数，默认PARTITION_CONFIG["batch_size"]
+        progress: 接收进度消息的函数
+
+    Raises:
+        PartitionError: 表结构无法转换时抛出
+    """
+    batch_size = batch_size or PARTITION_CONFIG["batch_size"]
+    connection = psycopg2.connect(**config)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", (PARTITION_LOCK_ID,))
+            if not cursor.fetchone()[0]:
+                raise PartitionError("其他进程正在执行分区操作")
+            if is_partitioned(cursor):
+                # 较早转换的数据库中原表仍带有指向account的外键
+                _set_lock_timeout(cursor)
+                _drop_foreign_keys(cursor, RETIRED_TABLE)
+                connection.commit()
+                progress("task已经是分区表")
+                return
+
+            columns = _task_columns(cursor)
+            cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (STAGING_TABLE,))
+            if not cursor.fetchone()[0]:
+                current = _current_month(cursor)
+                cursor.execute("SELECT date_trunc('month', MIN(created_at))::date FROM task")
+                first_month = cursor.fetchone()[0] or current
+                last_month = add_months(current, PARTITION_CONFIG["premake_months"])
+                _set_lock_timeout(cursor)
+                _create_staging_table(cursor, first_month, last_month)
+                _create_sync_trigger(cursor, columns)
+                connection.commit()
+                progress(f"已创建 {STAGING_TABLE}，分区 {partition_name(first_month)} 至 {partition_name(last_month)}")
+
+        _backfill(connection, columns, batch_size, progress)
+
+        # 切换前收集统计信息，autovacuum不会分析分区表的父表
+        connection.autocommit = True
+        with connection.cursor() as cursor:
+            cursor.execute(f"ANALYZE {STAGING_TABLE}")
+        connection.autocommit = False
+
+        _swap_tables(connection, progress)
+    finally:
+        connection.close()
+
+# endregion
+
+
+# region 分区维护与归档
+
+def ensure_future_partitions(connection, months_ahead: int = None) -> list[str]:
+    """
+    创建从当前月份起的未来分区
+
+    维护任务停机期间错过的月份(最新分区之后、当前月份之前)一并补建；
+    每个分区单独提交，某个月份失败时记录错误并继续创建其余分区。
+
+    Returns:
+        list[str]: 新创建的分区名
+    """
+    months_ahead = PARTITION_CONFIG["premake_months"] if months_ahead is None else months_ahead
+    created = []
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return created
+        current = _current_month(cursor)
+        months = [item["month"] for item in list_partitions(cursor) if item["month"] is not None]
+        month = min(add_months(max(months), 1), current) if months else current
+        connection.commit()
+
+        last_month = add_months(current, months_ahead)
+        while month <= last_month:
+            try:
+                _set_lock_timeout(cursor)
+                if _create_month_partition(cursor, "task", month):
+                    created.append(partition_name(month))
+                connection.commit()
+            except psycopg2.Error as error:
+                connection.rollback()
+                print(f"创建分区 {partition_name(month)} 时发生错误: {error}")
+            month = add_months(month, 1)
+    return created
+
+
+def _apply_partition_stats(cursor, table: str, sign: int):
+    """将整个分区的任务计入(sign=1)或移出(sign=-1)task_stats"""
+    cursor.execute(
+        f"""
+        SELECT task_stats_apply(array_agg(applicant_id), array_agg(category), array_agg(status), array_agg(delta))
+        FROM (
+            SELECT applicant_id, category::TEXT, status::TEXT, %s * COUNT(*) AS delta
+            FROM {table} GROUP BY 1, 2, 3
+        ) AS changes
+        HAVING COUNT(*) > 0
+        """,
+        (sign,),
+    )
+
+
+def archive_partitions(connection, before: date, dry_run: bool = False) -> list[dict]:
+    """
+    将早于指定月份的分区从task分离并移入归档schema
+
+    仍有待审核任务、定时任务或未完成提交的分区跳过；分离与task_stats的扣减在同一事务内完成。
+    爬虫状态与结果不随任务归档，仍可按fc_task_id查询。
+
+    Args:
+        connection: 数据库连接
+        before: 归档月份早于该月的分区
+        dry_run: 只检查不归档
+
+    Returns:
+        list[dict]: 每个候选分区的name、archived、reason
+    """
+    schema = PARTITION_CONFIG["archive_schema"]
+    results = []
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            return results
+        candidates = [
+            item["name"]
+            for item in list_partitions(cursor)
+            if item["month"] is not None and item["month"] < before
+        ]
+        connection.commit()
+
+        for name in candidates:
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {name} t WHERE {_ACTIVE_TASK_CONDITION})")
+            if cursor.fetchone()[0]:
+                results.append({"name": name, "archived": False, "reason": "存在仍在使用的任务"})
+                connection.commit()
+                continue
+            if dry_run:
+                results.append({"name": name, "archived": False, "reason": "dry run"})
+                connection.commit()
+                continue
+
+            _set_lock_timeout(cursor)
+            cursor.execute(f"ALTER TABLE task DETACH PARTITION {name}")
+            # 分离后持有该表的排他锁直到提交，统计、ID映射与分离的数据一致
+            _apply_partition_stats(cursor, name, -1)
+            cursor.execute(f"DELETE FROM task_id_map m USING {name} p WHERE m.id = p.id")
+            cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+            cursor.execute(f"ALTER TABLE {name} SET SCHEMA {schema}")
+            connection.commit()
+            results.append({"name": name, "archived": True, "reason": None})
+    return results
+
+
+def restore_partition(connection, name: str):
+    """
+    将归档的分区重新挂到task上
+
+    Raises:
+        PartitionError: 分区名无效或不在归档schema中时抛出
+    """
+    month = parse_partition_month(name)
+    if month is None:
+        raise PartitionError(f"无效的分区名: {name}")
+    schema = PARTITION_CONFIG["archive_schema"]
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (f"{schema}.{name}",))
+        if not cursor.fetchone()[0]:
+            raise PartitionError(f"{schema} 中没有分区 {name}")
+        _set_lock_timeout(cursor)
+        cursor.execute(f"ALTER TABLE {schema}.{name} SET SCHEMA public")
+        cursor.execute(
+            f"ALTER TABLE task ATTACH PARTITION {name} FOR VALUES FROM (%s) TO (%s)",
+            (month, add_months(month, 1)),
+        )
+        _apply_partition_stats(cursor, name, 1)
+        cursor.execute(f"INSERT INTO task_id_map (id, created_at) SELECT id, created_at FROM {name}")
+    connection.commit()
+
+
+def maintain_partitions() -> dict:
+    """
+    创建未来分区，设置了retention_months时归档过期分区
+
+    多个进程同时执行时只有一个进程生效。
+
+    Returns:
+        dict: {'created': [新分区], 'archived': [归档的分区]}
+    """
+    result = {"created": [], "archived": []}
+    with get_database_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", (PARTITION_LOCK_ID,))
+            if not cursor.fetchone()[0]:
+                return result
+        try:
+            result["created"] = ensure_future_partitions(connection)
+            retention = PARTITION_CONFIG["retention_months"]
+            if retention:
+                with connection.cursor() as cursor:
+                    before = add_months(_current_month(cursor), -retention)
+                result["archived"] = [
+                    item["name"]
+                    for item in archive_partitions(connection, before)
+                    if item["archived"]
+                ]
+        finally:
+            connection.rollback()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (PARTITION_LOCK_ID,))
+            connection.commit()
+    return result
+
+
+class PartitionMaintainer:
+    """
+    后台分区维护：定期创建未来分区并归档过期分区，task未分区时不做任何操作
+
+    Args:
+        interval: 两次维护之间的间隔(秒)
+    """
+
+    def __init__(self, interval: float = 86400.0):
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="partition-maintainer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        # 启动时先执行一次，避免服务长期停机后缺少当月分区
+        while True:
+            try:
+                result = maintain_partitions()
+                if result["created"]:
+                    print(f"已创建分区: {', '.join(result['created'])}")
+                if result["archived"]:
+                    print(f"已归档分区: {', '.join(result['archived'])}")
+            except Exception as error:
+                print(f"维护task分区时发生错误: {error}")
+            if self._stopping.wait(self.interval):
+                return
+
+
+_maintainer = None
+_maintainer_lock = threading.Lock()
+
+
+def start_partition_maintainer() -> PartitionMaintainer:
+    """启动进程内的分区维护任务"""
+    global _maintainer
+    with _maintainer_lock:
+        if _maintainer is None:
+            _maintainer = PartitionMaintainer()
+        _maintainer.start()
+        return _maintainer
+
+# endregion
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("status")
+    convert_parser = subparsers.add_parser("convert")
+    convert_parser.add_argument("--batch-size", type=int)
+    subparsers.add_parser("maintain")
+    archive_parser = subparsers.add_parser("archive")
+    archive_parser.add_argument("--before", required=True, help="归档该月之前的分区，格式YYYY-MM")
+    archive_parser.add_argument("--dry-run", action="store_true")
+    restore_parser = subparsers.add_parser("restore")
+    restore_parser.add_argument("name")
+    args = parser.parse_args()
+
+    if args.command == "convert":
+        convert_task_table(DATABASE_CONFIG, args.batch_size)
+    elif args.command == "maintain":
+        result = maintain_partitions()
+        print(f"新建分区: {', '.join(result['created']) or '无'}")
+        print(f"归档分区: {', '.join(result['archived']) or '无'}")
+    else:
+        with get_database_connection() as connection:
+            if args.command == "status":
+                with connection.cursor() as cursor:
+                    if not is_partitioned(cursor):
+                        print("task不是分区表，执行 python partitioning.py convert 进行转换")
+                    for item in list_partitions(cursor):
+                        print(f"{item['name']:<20} 约 {item['rows']:>10} 行  {item['size']}")
+            elif args.command == "archive":
+                year, month = args.before.split("-")
+                for item in archive_partitions(connection, date(int(year), int(month), 1), args.dry_run):
+                    print(f"{item['name']:<20} {'已归档' if item['archived'] else '跳过: ' + item['reason']}")
+            else:
+                restore_partition(connection, args.name)
+                print(f"已恢复分区 {args.name}")
@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bcrypt
+
+from metrics import PASSWORD_HASH_DURATION
+
+
+# 密码哈希配置
+PASSWORD_CONFIG = {
+    "rounds": 12,  # bcrypt cost，登录时存储的cost与之不同的哈希会被重新计算
+    "workers": os.cpu_count() or 1,  # 哈希进程数，为0时在调用线程内计算
+}
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+# fork前创建的进程池，子进程中保持引用，不关闭也不回收父进程的工作进程与管道
+_inherited_executors = []
+
+
+def _hashpw(password: bytes, rounds: int) -> str:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds)).decode()
+
+
+def _checkpw(password: bytes, hashed: bytes) -> bool:
+    return bcrypt.checkpw(password, hashed)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                # fork得到的子进程不能使用父进程的进程池，需要各自创建
+                if _executor is not None:
+                    _inherited_executors.append(_executor)
+                _executor = ProcessPoolExecutor(max_workers=PASSWORD_CONFIG["workers"])
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def _run(operation: str, func, *args):
+    # bcrypt计算是CPU密集型的，放到进程池中避免占满请求线程
+    started = time.perf_counter()
+    try:
+        if not PASSWORD_CONFIG["workers"]:
+            return func(*args)
+        return _get_executor().submit(func, *args).result()
+    finally:
+        PASSWORD_HASH_DURATION.observe(time.perf_counter() - started, operation)
+
+
+def hash_password(password: str, rounds: int = None) -> str:
+    """
+    计算密码哈希
+
+    Args:
+        password: 明文密码
+        rounds: bcrypt cost，默认使用PASSWORD_CONFIG
+
+    Returns:
+        str: bcrypt哈希
+    """
+    rounds = PASSWORD_CONFIG["rounds"] if rounds is None else rounds
+    return _run("hash", _hashpw, password.encode("utf-8"), rounds)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """
+    验证密码是否正确
+
+    Args:
+        plain_password: 明文密码
+        hashed_password: 数据库中存储的哈希密码
+
+    Returns:
+        bool: 密码是否匹配
+    """
+    return _run(
+        "verify", _checkpw, plain_password.encode("utf-8"), hashed_password.encode("utf-8")
+    )
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """存储的哈希的cost与当前配置不同时返回True"""
+    try:
+        return int(hashed_password.split("$")[2]) != PASSWORD_CONFIG["rounds"]
+    except (IndexError, ValueError):
+        return True
+
+
+def shutdown_password_pool():
+    """关闭哈希进程池，下次调用时重新创建"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            if _executor_pid == os.getpid():
+                _executor.shutdown(wait=True)
+            else:
+                _inherited_executors.append(_executor)
+        _executor = None
@@ -0,0 +1,70 @@
+import threading
+import time
+
+from database import fold_task_stats, reconcile_task_stats
+
+
+class StatsReconciler:
+    """
+    后台统计校正器：定期将触发器写入的增量合并到task_stats，并按task表重新计算task_stats
+
+    task_stats由触发器增量维护，正常情况下不会偏差；
+    手动修改数据、禁用触发器后导入等情况下由本任务修正。
+
+    Args:
+        interval: 两次校正之间的间隔(秒)
+        fold_interval: 两次合并增量之间的间隔(秒)，决定读取时需要累加的增量行数
+    """
+
+    def __init__(self, interval: float = 3600.0, fold_interval: float = 10.0):
+        self.interval = interval
+        self.fold_interval = fold_interval
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="stats-reconciler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        next_reconcile = time.monotonic() + self.interval
+        while not self._stopping.wait(self.fold_interval):
+            try:
+                fold_task_stats()
+            except Exception as error:
+                print(f"合并任务统计增量时发生错误: {error}")
+
+            if time.monotonic() < next_reconcile:
+                continue
+            next_reconcile = time.monotonic() + self.interval
+            try:
+                corrected = reconcile_task_stats()
+                if corrected:
+                    print(f"已校正 {corrected} 条任务统计")
+            except Exception as error:
+                print(f"校正任务统计时发生错误: {error}")
+
+
+_reconciler = None
+_reconciler_lock = threading.Lock()
+
+
+def start_reconciler() -> StatsReconciler:
+    """启动进程内的统计校正器"""
+    global _reconciler
+    with _reconciler_lock:
+        if _reconciler is None:
+            _reconciler = StatsReconciler()
+        _reconciler.start()
+        return _reconciler
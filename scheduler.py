@@ -0,0 +1,169 @@
+import heapq
+import random
+import threading
+from datetime import datetime
+
+from cron import CronExpression
+from database import enqueue_scheduled_crawls, get_scheduled_tasks
+from dispatcher import wake_dispatcher
+from events import register_task_listener
+
+
+class CrawlScheduler:
+    """
+    定时爬虫调度器：按task.schedule中的cron表达式定期提交爬虫
+
+    以最小堆维护各任务的下一次触发时间，每次只处理到期的任务；
+    任务变更时只重新计算该任务的触发时间，旧的堆条目按版本号惰性丢弃。
+    到期任务带随机延迟写入crawl_outbox，由CrawlDispatcher按并发上限提交。
+
+    Args:
+        max_jitter: 提交前的最大随机延迟(秒)，用于打散同一时刻触发的大量任务
+        resync_interval: 全量重新加载定时任务的间隔(秒)，用于兜底事件通道断开期间错过的修改
+        max_wait: 无到期任务时的最长等待时间(秒)
+    """
+
+    def __init__(
+        self,
+        max_jitter: float = 30.0,
+        resync_interval: float = 600.0,
+        max_wait: float = 60.0,
+    ):
+        self.max_jitter = max_jitter
+        self.resync_interval = resync_interval
+        self.max_wait = max_wait
+
+        self._heap = []  # [(下次触发时间, task_id, 版本号)]
+        self._entries = {}  # task_id -> (CronExpression, site_url, 版本号)
+        self._version = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._last_resync = None
+        self._pending = []  # 写入失败、等待重试的到期任务
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        register_task_listener(self.refresh_tasks)
+        self._thread = threading.Thread(
+            target=self._run, name="crawl-scheduler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _schedule(self, task_id: int, expression: str, site_url: str, now: datetime):
+        """登记或更新一个任务的触发时间，调用方需持有锁"""
+        cron = CronExpression(expression)
+        self._version += 1
+        self._entries[task_id] = (cron, site_url, self._version)
+        heapq.heappush(self._heap, (cron.next_after(now), task_id, self._version))
+
+    def _load(self, rows: list[tuple]):
+        now = datetime.now()
+        with self._lock:
+            self._heap = []
+            self._entries = {}
+            for task_id, expression, site_url in rows:
+                try:
+                    self._schedule(task_id, expression, site_url, now)
+                except ValueError as error:
+                    print(f"任务{task_id}的定时计划无效: {error}")
+        self._last_resync = now
+
+    def reload(self):
+        """全量加载设置了定时计划的已审核任务"""
+        self._load(get_scheduled_tasks())
+        self._wakeup.set()
+
+    def refresh_tasks(self, task_ids: list[int]):
+        """任务变更后以一次查询重新计算这些任务的触发时间，不再需要调度的任务被移除"""
+        if not task_ids:
+            return
+        rows = get_scheduled_tasks(task_ids)
+        now = datetime.now()
+        with self._lock:
+            for task_id in task_ids:
+                self._entries.pop(task_id, None)
+            for task_id, expression, site_url in rows:
+                try:
+                    self._schedule(task_id, expression, site_url, now)
+                except ValueError as error:
+                    print(f"任务{task_id}的定时计划无效: {error}")
+        self._wakeup.set()
+
+    def refresh_task(self, task_id: int):
+        """任务变更后重新计算该任务的触发时间"""
+        self.refresh_tasks([task_id])
+
+    def _pop_due(self, now: datetime) -> list[tuple]:
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                fire_at, task_id, version = heapq.heappop(self._heap)
+                entry = self._entries.get(task_id)
+                if entry is None or entry[2] != version:
+                    continue  # 任务已变更或移除，丢弃旧条目
+
+                cron, site_url, _ = entry
+                due.append(
+                    (task_id, site_url, fire_at, random.uniform(0, self.max_jitter))
+                )
+                heapq.heappush(self._heap, (cron.next_after(now), task_id, version))
+        return due
+
+    def _seconds_until_next(self, now: datetime) -> float:
+        with self._lock:
+            if not self._heap:
+                return self.max_wait
+            wait = (self._heap[0][0] - now).total_seconds()
+        return min(max(wait, 0), self.max_wait)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            now = datetime.now()
+            try:
+                if (
+                    self._last_resync is None
+                    or (now - self._last_resync).total_seconds() >= self.resync_interval
+                ):
+                    self.reload()
+
+                due = self._pending + self._pop_due(now)
+                self._pending = []
+                if due:
+                    try:
+                        enqueue_scheduled_crawls(due)
+                    except Exception:
+                        self._pending = due
+                        raise
+                    wake_dispatcher()
+            except Exception as error:
+                print(f"调度定时爬虫时发生错误: {error}")
+                self._stopping.wait(self.max_wait)
+                continue
+
+            self._wakeup.clear()
+            self._wakeup.wait(self._seconds_until_next(datetime.now()))
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_scheduler() -> CrawlScheduler:
+    """启动进程内的定时爬虫调度器"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = CrawlScheduler()
+        _scheduler.start()
+        return _scheduler
@@ -0,0 +1,141 @@
+"""
+接口响应的JSON序列化与压缩
+
+安装了orjson时使用orjson(C实现，直接输出bytes)，否则回退到标准库json；
+较大的响应按客户端的Accept-Encoding以gzip或deflate压缩。Flask接口与asgi.py共用。
+"""
+import gzip
+import json
+import zlib
+
+from flask import Response, request
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# 序列化配置
+SERIALIZATION_CONFIG = {
+    "backend": "auto",  # auto(有orjson时使用orjson)/orjson/json
+    "compress_min_size": 1024,  # 响应体超过该字节数时才压缩，小响应压缩得不偿失
+    "compress_level": 3,  # gzip/zlib压缩级别，3以上压缩率提升有限而耗时成倍增加
+}
+
+# 按优先级排列的可用压缩方式
+CONTENT_ENCODINGS = ("gzip", "deflate")
+
+
+def _json_dumps(value) -> bytes:
+    return json.dumps(value, ensure_ascii=False, default=str).encode()
+
+
+def _orjson_dumps(value) -> bytes:
+    # OPT_NON_STR_KEYS与标准库一致地接受整数等非字符串键
+    return orjson.dumps(value, default=str, option=orjson.OPT_NON_STR_KEYS)
+
+
+_BACKENDS = {"json": _json_dumps}
+if orjson is not None:
+    _BACKENDS["orjson"] = _orjson_dumps
+
+
+def register_backend(name: str, dumps):
+    """
+    注册序列化实现
+
+    Args:
+        name: 名称，设置 SERIALIZATION_CONFIG["backend"] 为该名称后生效
+        dumps: 将对象序列化为UTF-8编码bytes的函数，无法序列化的值按str处理
+    """
+    _BACKENDS[name] = dumps
+
+
+def backend_name() -> str:
+    """当前生效的序列化实现名称"""
+    backend = SERIALIZATION_CONFIG["backend"]
+    if backend == "auto":
+        return "orjson" if "orjson" in _BACKENDS else "json"
+    if backend not in _BACKENDS:
+        raise ValueError(f"未知的序列化实现: {backend}")
+    return backend
+
+
+def dumps(value) -> bytes:
+    """将对象序列化为JSON(bytes)"""
+    return _BACKENDS[backend_name()](value)
+
+
+def choose_encoding(accept_encoding: str) -> str:
+    """
+    按Accept-Encoding选择压缩方式
+
+    Args:
+        accept_encoding: 请求的Accept-Encoding头，可带q值
+
+    Returns:
+        str: gzip/deflate，客户端不接受压缩时返回None
+    """
+    if not accept_encoding:
+        return None
+
+    weights = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[coding] = weight
+
+    best, best_weight = None, 0.0
+    for coding in CONTENT_ENCODINGS:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    return best
+
+
+def compress(payload: bytes, accept_encoding: str) -> tuple[bytes, str]:
+    """
+    按客户端支持的压缩方式压缩响应体
+
+    Returns:
+        tuple: (响应体, Content-Encoding)，未压缩时Content-Encoding为None
+    """
+    if len(payload) < SERIALIZATION_CONFIG["compress_min_size"]:
+        return payload, None
+
+    encoding = choose_encoding(accept_encoding)
+    level = SERIALIZATION_CONFIG["compress_level"]
+    if encoding == "gzip":
+        return gzip.compress(payload, compresslevel=level, mtime=0), encoding
+    if encoding == "deflate":
+        # HTTP中的deflate指zlib格式
+        return zlib.compress(payload, level), encoding
+    return payload, None
+
+
+def json_response(body: dict, status: int = 200, headers: dict = None) -> Response:
+    """
+    构建Flask JSON响应，使用快速序列化并按请求协商压缩
+
+    Args:
+        body: 响应内容
+        status: HTTP状态码
+        headers: 额外的响应头
+
+    Returns:
+        Response: Flask响应对象
+    """
+    payload, encoding = compress(dumps(body), request.headers.get("Accept-Encoding"))
+    response = Response(payload, status=status, mimetype="application/json", headers=headers)
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
@@ -1,25 +1,56 @@
-from flask import Flask
+import time
+from flask import Flask, Response, g, request
 from flask_jwt_extended import JWTManager
 from user import user_bp  # 导入user蓝图
 from fcapi import fc_bp  # 导入fc蓝图
 from flask_cors import CORS
+import metrics
 from datetime import timedelta
 
 
+# 允许跨域访问的前端地址
+CORS_ORIGINS = ["http://localhost:5173"]
+
 app = Flask(__name__)
 app.config["JWT_SECRET_KEY"] = "0ct4710-v-c06nt9npozval"  # 实际应用中应该使用环境变量
 app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(days=3)  # 设置token过期时间为3天
 app.config["JWT_ERROR_MESSAGE_KEY"] = "message"  # 错误消息的key
+app.config["JWT_ROLE_CLAIM"] = False  # 登录时将角色写入token，鉴权不再查询数据库(角色变更需重新登录才生效)
 jwt = JWTManager(app)
 app.register_blueprint(user_bp)  # 注册user蓝图
 app.register_blueprint(fc_bp)  # 注册fc蓝图
 CORS(app, resources={
     r"/*": {
-        "origins": ["http://localhost:5173"],
+        "origins": CORS_ORIGINS,
         "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
         "allow_headers": ["Content-Type", "Authorization"]
     }
 })
 
+
+# 记录每个接口的耗时
+@app.before_request
+def start_timer():
+    g._metrics_started = time.perf_counter()
+
+
+@app.after_request
+def record_duration(response):
+    started = g.pop("_metrics_started", None)
+    if started is not None:
+        # 以路由规则而非实际路径作为标签，避免标签数量随参数增长
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - started, request.method, endpoint, response.status_code
+        )
+    return response
+
+
+# Prometheus文本格式的性能指标
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     app.run(debug=True)
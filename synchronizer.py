@@ -0,0 +1,145 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from database import claim_crawl_status_polls, store_crawl_results, update_crawl_statuses
+from fcmanager import get_crawl_progress, iter_crawl_results
+
+
+class StatusSynchronizer:
+    """
+    后台爬虫状态同步器：分批轮询进行中的爬虫任务，将进度和结果写入本地数据库
+
+    轮询间隔按任务自适应：有新进度时缩短，没有进度或查询失败时拉长；
+    任务进入终态后保存结果并停止跟踪。
+
+    Args:
+        batch_size: 每轮领取的任务数
+        max_workers: 同时进行的上游查询数
+        idle_interval: 没有到期任务时的等待时间(秒)
+        min_poll_interval: 单个任务的最短轮询间隔(秒)
+        max_poll_interval: 单个任务的最长轮询间隔(秒)
+        lease_seconds: 领取记录的租约时长(秒)
+    """
+
+    def __init__(
+        self,
+        batch_size: int = 50,
+        max_workers: int = 8,
+        idle_interval: float = 2.0,
+        min_poll_interval: float = 2.0,
+        max_poll_interval: float = 120.0,
+        lease_seconds: float = 300.0,
+    ):
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.idle_interval = idle_interval
+        self.min_poll_interval = min_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.lease_seconds = lease_seconds
+
+        self._stopping = threading.Event()
+        self._executor = None
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="crawl-sync"
+        )
+        self._thread = threading.Thread(
+            target=self._run, name="crawl-synchronizer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                synced = self.sync_once()
+            except Exception as error:
+                print(f"同步爬虫状态时发生错误: {error}")
+                synced = 0
+
+            # 本轮领满说明还有积压，立即进入下一轮
+            if synced < self.batch_size:
+                self._stopping.wait(self.idle_interval)
+
+    def sync_once(self) -> int:
+        """
+        执行一轮同步
+
+        Returns:
+            int: 本轮处理的任务数
+        """
+        items = claim_crawl_status_polls(self.batch_size, self.lease_seconds)
+        if not items:
+            return 0
+
+        updates = list(self._executor.map(lambda item: self._poll(*item), items))
+        update_crawl_statuses(updates)
+        return len(items)
+
+    def _next_interval(self, interval: float, progressed: bool) -> float:
+        if progressed:
+            return max(self.min_poll_interval, interval / 2)
+        return min(self.max_poll_interval, interval * 1.5)
+
+    def _poll(self, fc_task_id: str, completed: int, poll_interval: float, backend: str) -> dict:
+        try:
+            progress = get_crawl_progress(fc_task_id, backend)
+            status = progress.get("status") or "scraping"
+            new_completed = progress.get("completed") or 0
+
+            if status == "completed":
+                # 先保存结果再写入终态，保存失败时下一轮会重试
+                store_crawl_results(fc_task_id, iter_crawl_results(fc_task_id, backend))
+
+            return {
+                "fc_task_id": fc_task_id,
+                "status": status,
+                "completed": new_completed,
+                "total": progress.get("total") or 0,
+                "credits_used": progress.get("creditsUsed") or 0,
+                "expires_at": progress.get("expiresAt"),
+                "error": progress.get("error"),
+                "poll_interval": self._next_interval(
+                    poll_interval, new_completed > completed
+                ),
+            }
+
+        except Exception as error:
+            # 查询失败时保留已有进度，只记录错误并拉长轮询间隔
+            return {
+                "fc_task_id": fc_task_id,
+                "status": None,
+                "completed": None,
+                "total": None,
+                "credits_used": None,
+                "expires_at": None,
+                "error": str(error),
+                "poll_interval": self.max_poll_interval,
+            }
+
+
+_synchronizer = None
+_synchronizer_lock = threading.Lock()
+
+
+def start_synchronizer() -> StatusSynchronizer:
+    """启动进程内的爬虫状态同步器"""
+    global _synchronizer
+    with _synchronizer_lock:
+        if _synchronizer is None:
+            _synchronizer = StatusSynchronizer()
+        _synchronizer.start()
+        return _synchronizer
@@ -0,0 +1,99 @@
+import asyncio
+
+import httpx
+import pytest
+
+import asgi
+
+
+def _call(app, *requests):
+    """依次发送(method, url, headers)请求，返回响应列表；结束时关闭应用的连接池与客户端"""
+
+    async def run():
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return [await http.request(method, url, headers=headers) for method, url, headers in requests]
+        finally:
+            if app._pool is not None:
+                await app._pool.close()
+            for firecrawl in app._firecrawl.values():
+                await firecrawl.close()
+
+    return asyncio.run(run())
+
+
+def test_async_task_list_matches_flask(client, cursor, make_account, auth_headers):
+    user_id = make_account("async_get_user")
+    cursor.execute(
+        "INSERT INTO task (applicant_id, name, category) SELECT %s, 'task ' || n, 'news' FROM generate_series(1, 5) AS n",
+        (user_id,),
+    )
+    headers = auth_headers(user_id)
+    url = "/fctask/get?page_size=2&page=2"
+
+    (async_response,) = _call(asgi.AsyncApp(asgi.flask_app), ("GET", url, headers))
+    assert async_response.status_code == 200
+    assert async_response.json() == client.get(url, headers=headers).get_json()
+
+
+def test_async_task_list_rejects_bad_requests(db, make_account, auth_headers):
+    headers = auth_headers(make_account("async_bad_user"))
+    responses = _call(
+        asgi.AsyncApp(asgi.flask_app),
+        ("GET", "/fctask/get", {}),
+        ("GET", "/fctask/get?format=xml", headers),
+        ("GET", "/fctask/get?pagination=cursor&cursor=invalid", headers),
+        ("GET", "/fctask/info", headers),
+    )
+    assert [response.status_code for response in responses] == [401, 400, 400, 400]
+
+
+def test_other_routes_served_by_flask(db):
+    (response,) = _call(asgi.AsyncApp(asgi.flask_app), ("POST", "/user/login", {}))
+    assert response.status_code == 400
+    assert response.json()["message"] == "缺少用户名或密码"
+
+
+def test_concurrent_status_requests_coalesced():
+    app = asgi.AsyncApp(asgi.flask_app)
+    calls = []
+
+    async def check(fc_task_id):
+        calls.append(fc_task_id)
+        await asyncio.sleep(0.05)
+        return {"status": "scraping", "completed": 1, "total": 3, "data": [{"markdown": "x"}]}
+
+    app._check_crawl_status = check
+
+    async def run():
+        return await asyncio.gather(*(app._fetch_status("crawl-1") for _ in range(3)))
+
+    results = asyncio.run(run())
+    assert calls == ["crawl-1"]
+    assert sorted(state for _, state in results) == ["coalesced", "coalesced", "miss"]
+    assert all("data" not in status for status, _ in results)
+    assert app._status_cache.get("crawl-1")["completed"] == 1
+
+
+def test_cancelled_leader_releases_waiters():
+    app = asgi.AsyncApp(asgi.flask_app)
+
+    async def check(fc_task_id):
+        await asyncio.sleep(10)
+
+    app._check_crawl_status = check
+
+    async def run():
+        leader = asyncio.create_task(app._fetch_status("crawl-1"))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(app._fetch_status("crawl-1"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        with pytest.raises(Exception, match="已取消"):
+            await asyncio.wait_for(waiter, 1)
+        assert app._status_inflight == {}
+
+    asyncio.run(run())
@@ -0,0 +1,130 @@
+import time
+
+import pytest
+
+import fcmanager
+from fcmanager import BackendUnavailableError, FirecrawlBackend, FirecrawlError
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    monkeypatch.setitem(fcmanager.BACKEND_CONFIG, "failure_threshold", 2)
+    monkeypatch.setitem(fcmanager.BACKEND_CONFIG, "open_seconds", 60.0)
+    return FirecrawlBackend("a", "http://127.0.0.1:1/")
+
+
+def open_breaker(backend, monkeypatch):
+    """连续失败至熔断，再让冷却时间立即结束"""
+    backend.record_failure()
+    backend.record_failure()
+    assert backend.state == "open" and not backend.allow_request()
+    monkeypatch.setitem(fcmanager.BACKEND_CONFIG, "open_seconds", 0.0)
+
+
+def test_breaker_opens_after_consecutive_failures(backend):
+    backend.record_failure()
+    backend.record_success()
+    backend.record_failure()
+    assert backend.state == "closed" and backend.allow_request()
+    backend.record_failure()
+    assert backend.state == "open"
+    assert not backend.available()
+    with pytest.raises(BackendUnavailableError):
+        backend.call(lambda client: pytest.fail("熔断时不应调用后端"))
+
+
+def test_half_open_allows_one_trial(backend, monkeypatch):
+    open_breaker(backend, monkeypatch)
+    assert backend.available()
+    assert backend.allow_request()
+    assert backend.state == "half_open"
+    assert not backend.allow_request()
+    assert not backend.available()
+
+    backend.record_success()
+    assert backend.state == "closed" and backend.failures == 0
+
+
+def test_failed_trial_reopens(backend, monkeypatch):
+    open_breaker(backend, monkeypatch)
+    assert backend.allow_request()
+    monkeypatch.setitem(fcmanager.BACKEND_CONFIG, "open_seconds", 60.0)
+    backend.record_failure()
+    assert backend.state == "open" and not backend.allow_request()
+
+
+def test_cancelled_trial_released(backend, monkeypatch):
+    open_breaker(backend, monkeypatch)
+
+    def cancelled(client):
+        raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        backend.call(cancelled)
+    assert backend.state == "half_open"
+    assert backend.allow_request()
+
+
+@pytest.mark.parametrize("error, opened", [
+    (FirecrawlError(503, "unavailable"), True),
+    (FirecrawlError(400, "bad request"), False),
+])
+def test_only_backend_failures_counted(backend, error, opened):
+    def fail(client):
+        raise error
+
+    for _ in range(2):
+        with pytest.raises(FirecrawlError):
+            backend.call(fail)
+    assert (backend.state == "open") is opened
+
+
+def test_parse_backends():
+    assert fcmanager._parse_backends(" a=http://x:1*2, b=http://y:2 ,") == [
+        {"name": "a", "api_url": "http://x:1", "weight": 2.0},
+        {"name": "b", "api_url": "http://y:2", "weight": 1.0},
+    ]
+    with pytest.raises(ValueError):
+        fcmanager._parse_backends("http://x:1")
+    with pytest.raises(ValueError):
+        FirecrawlBackend("a", "http://x:1", weight=0)
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    """三个后端，不从数据库刷新负载"""
+    backends = [
+        FirecrawlBackend("light", "http://a"),
+        FirecrawlBackend("heavy", "http://b", weight=4),
+        FirecrawlBackend("down", "http://c"),
+    ]
+    monkeypatch.setattr(fcmanager, "get_backends", lambda: backends)
+    monkeypatch.setattr(fcmanager, "_loads_refreshed_at", time.monotonic())
+    monkeypatch.setitem(fcmanager.BACKEND_CONFIG, "load_refresh_interval", 3600.0)
+    return backends
+
+
+def test_choose_backends_by_weighted_load(backends):
+    light, heavy, down = backends
+    light.active, heavy.active = 2, 4
+    down.healthy = False
+    # 负载: light (2+1)/1=3, heavy (4+1)/4=1.25
+    assert fcmanager.choose_backends() == [heavy, light]
+    for _ in range(8):
+        heavy.add_crawl()
+    assert fcmanager.choose_backends() == [light, heavy]
+
+
+def test_create_crawl_fails_over_unreachable_backend(firecrawl_stub, monkeypatch):
+    monkeypatch.setattr(fcmanager, "FIRECRAWL_BACKENDS", [
+        {"name": "dead", "api_url": "http://127.0.0.1:1", "weight": 100},
+        {"name": "stub", "api_url": firecrawl_stub},
+    ])
+    monkeypatch.setattr(fcmanager, "_backends_pid", None)
+    monkeypatch.setattr(fcmanager, "_loads_refreshed_at", time.monotonic())
+    monkeypatch.setitem(fcmanager.BACKEND_CONFIG, "load_refresh_interval", 3600.0)
+
+    response = fcmanager.create_crawl_task("https://example.com")
+    assert response["backend"] == "stub"
+    assert fcmanager.get_backend("dead").failures == 1
+    assert fcmanager.get_backend("stub").active == 1
@@ -0,0 +1,58 @@
+import argparse
+import json
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks import compare
+from benchmarks.seed import parse_status_mix, seed_accounts, seed_tasks
+
+
+def test_parse_status_mix():
+    assert parse_status_mix("pending=1,approved=3") == {"pending": 0.25, "approved": 0.75}
+    for value in ("done=1", "pending=0"):
+        with pytest.raises(argparse.ArgumentTypeError):
+            parse_status_mix(value)
+
+
+def _seed(cursor, seed: float) -> list[tuple]:
+    user_ids = seed_accounts(cursor, "seed_user_", 5, "user", "x")
+    admin_ids = seed_accounts(cursor, "seed_admin_", 2, "admin", "x")
+    args = SimpleNamespace(user_skew=2.0, category_skew=1.0, categories=4, crawl_ratio=0.5, days=30)
+    cursor.execute("SELECT setseed(%s)", (seed,))
+    seed_tasks(cursor, 1, 200, user_ids, admin_ids, args, {"pending": 0.5, "approved": 0.5})
+    cursor.execute("SELECT applicant_id, category, status, fc_task_id IS NOT NULL FROM task ORDER BY id")
+    return cursor.fetchall()
+
+
+def test_seeded_tasks_reproducible(cursor):
+    first = _seed(cursor, 0.42)
+    cursor.execute("TRUNCATE task, task_id_map RESTART IDENTITY CASCADE")
+    assert _seed(cursor, 0.42) == first
+    assert {status for _, _, status, _ in first} == {"pending", "approved"}
+    # 带fc_task_id的任务同时写入已完成的爬虫进度
+    cursor.execute("SELECT COUNT(*) FROM crawl_status WHERE status = 'completed'")
+    assert cursor.fetchone()[0] == sum(crawled for *_, crawled in first) > 0
+    # 账户已存在时重复生成不新增账户
+    assert len(seed_accounts(cursor, "seed_user_", 5, "user", "x")) == 5
+    cursor.execute("SELECT COUNT(*) FROM account")
+    assert cursor.fetchone()[0] == 7
+
+
+def _report(path, **results):
+    path.write_text(json.dumps({
+        "meta": {"dataset": {"tasks": 100}},
+        "results": [{"name": name, "rps": rps, "p99_ms": p99} for name, (rps, p99) in results.items()],
+    }))
+    return str(path)
+
+
+def test_compare_flags_regressions(tmp_path, monkeypatch, capsys):
+    base = _report(tmp_path / "base.json", list=(100, 50), info=(200, 10))
+    head = _report(tmp_path / "head.json", list=(95, 52), info=(150, 10))
+    monkeypatch.setattr(sys, "argv", ["compare.py", base, head, "--threshold", "10"])
+    with pytest.raises(SystemExit) as exit_info:
+        compare.main()
+    assert exit_info.value.code == 1
+    assert "1 个场景退化超过 10.0%: info" in capsys.readouterr().out
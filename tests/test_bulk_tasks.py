@@ -0,0 +1,114 @@
+import pytest
+
+
+@pytest.fixture
+def admin_id(make_account):
+    return make_account("bulk_admin", role="admin")
+
+
+@pytest.fixture
+def user_id(make_account):
+    return make_account("bulk_user")
+
+
+def make_tasks(cursor, user_id: int, count: int) -> list[int]:
+    cursor.execute(
+        "INSERT INTO task (applicant_id, name, site_url) "
+        "SELECT %s, 'task ' || n, 'https://site' || n || '.example.com' FROM generate_series(1, %s) AS n RETURNING id",
+        (user_id, count),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def task_states(cursor) -> dict:
+    cursor.execute("SELECT id, status FROM task ORDER BY id")
+    return dict(cursor.fetchall())
+
+
+def outbox_task_ids(cursor) -> list[int]:
+    cursor.execute("SELECT task_id FROM crawl_outbox ORDER BY task_id")
+    return [row[0] for row in cursor.fetchall()]
+
+
+@pytest.mark.parametrize("value, status", [("false", "rejected"), ("0", "rejected"), ("True", "approved"), ("1", "approved")])
+def test_audit_parses_form_approval(client, cursor, auth_headers, admin_id, user_id, value, status):
+    (task_id,) = make_tasks(cursor, user_id, 1)
+    response = client.post(
+        "/fctask/audit", data={"task_id": task_id, "is_approved": value}, headers=auth_headers(admin_id)
+    )
+    assert response.status_code == 200
+    assert task_states(cursor) == {task_id: status}
+    assert outbox_task_ids(cursor) == ([task_id] if status == "approved" else [])
+
+
+def test_audit_rejects_invalid_approval(client, cursor, auth_headers, admin_id, user_id):
+    (task_id,) = make_tasks(cursor, user_id, 1)
+    response = client.post(
+        "/fctask/audit", data={"task_id": task_id, "is_approved": "no"}, headers=auth_headers(admin_id)
+    )
+    assert response.status_code == 400
+    assert task_states(cursor) == {task_id: "pending"}
+
+
+def test_bulk_create_reports_each_item(client, cursor, auth_headers, user_id):
+    response = client.post(
+        "/fctask/bulk_create",
+        json=[
+            {"name": "ok", "category": "news", "site_url": "https://a.example.com", "schedule": "@daily"},
+            {"name": "missing url", "category": "news"},
+            {"name": "bad schedule", "category": "news", "site_url": "https://b.example.com", "schedule": "daily"},
+            "not an object",
+            {"name": "ok too", "category": "blog", "site_url": "https://c.example.com"},
+        ],
+        headers=auth_headers(user_id),
+    )
+    data = response.get_json()["data"]
+    assert (data["created"], data["failed"]) == (2, 3)
+    assert [result["success"] for result in data["results"]] == [True, False, False, False, True]
+    assert list(task_states(cursor).values()) == ["pending", "pending"]
+    assert outbox_task_ids(cursor) == []
+
+
+def test_bulk_create_by_admin_enqueues_crawls(client, cursor, auth_headers, admin_id):
+    response = client.post(
+        "/fctask/bulk_create",
+        json=[{"name": f"task {n}", "category": "news", "site_url": f"https://{n}.example.com"} for n in range(3)],
+        headers=auth_headers(admin_id),
+    )
+    task_ids = [result["task_id"] for result in response.get_json()["data"]["results"]]
+    assert set(task_states(cursor).values()) == {"approved"}
+    assert outbox_task_ids(cursor) == task_ids
+
+
+@pytest.mark.parametrize("body", [None, [], {"name": "x"}, [{}] * 1001])
+def test_bulk_create_rejects_malformed_body(client, auth_headers, user_id, body):
+    response = client.post("/fctask/bulk_create", json=body, headers=auth_headers(user_id))
+    assert response.status_code == 400
+
+
+def test_bulk_audit(client, cursor, auth_headers, admin_id, user_id):
+    first, second, third = make_tasks(cursor, user_id, 3)
+    client.post("/fctask/audit", data={"task_id": third, "is_approved": "false"}, headers=auth_headers(admin_id))
+
+    response = client.post(
+        "/fctask/bulk_audit",
+        json=[
+            {"task_id": first, "is_approved": True},
+            {"task_id": second, "is_approved": "0"},
+            {"task_id": third, "is_approved": True},
+            {"task_id": first, "is_approved": False},
+            {"task_id": 999, "is_approved": True},
+            {"task_id": second, "is_approved": "maybe"},
+        ],
+        headers=auth_headers(admin_id),
+    )
+    data = response.get_json()["data"]
+    assert (data["reviewed"], data["failed"]) == (2, 4)
+    assert [result["success"] for result in data["results"]] == [True, True, False, False, False, False]
+    assert task_states(cursor) == {first: "approved", second: "rejected", third: "rejected"}
+    assert outbox_task_ids(cursor) == [first]
+
+
+def test_bulk_audit_requires_admin(client, auth_headers, user_id):
+    response = client.post("/fctask/bulk_audit", json=[{"task_id": 1, "is_approved": True}], headers=auth_headers(user_id))
+    assert response.status_code == 403
@@ -0,0 +1,77 @@
+import time
+
+import database
+from cache import TTLCache
+
+
+def test_get_returns_default_when_missing():
+    cache = TTLCache(max_size=2)
+    assert cache.get("a") is None
+    assert cache.get("a", "fallback") == "fallback"
+    assert cache.stats()["misses"] == 2
+
+
+def test_entries_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = TTLCache(max_size=10, ttl=5)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=None)
+    now[0] += 4.9
+    assert cache.get("a") == 1
+    now[0] += 0.2
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert len(cache) == 1
+
+
+def test_least_recently_used_evicted():
+    cache = TTLCache(max_size=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_invalidate_and_clear():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    cache.invalidate("missing")
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_role_cached_until_changed(db, make_account):
+    user_id = make_account("role_user")
+    assert database.get_user_role(user_id) == "user"
+
+    queries = []
+    original = database._query_user_role
+    database._query_user_role = lambda user_id: queries.append(user_id) or original(user_id)
+    try:
+        assert database.get_user_role(user_id) == "user"
+        assert queries == []
+        database.set_user_role(user_id, "admin")
+        assert database.get_user_role(user_id) == "admin"
+        assert queries == [user_id]
+    finally:
+        database._query_user_role = original
+
+
+def test_role_claim_skips_database(client, auth_headers, make_account, monkeypatch):
+    from server import app
+
+    user_id = make_account("claim_user")
+    monkeypatch.setitem(app.config, "JWT_ROLE_CLAIM", True)
+    monkeypatch.setattr(database, "_query_user_role", lambda user_id: "user")
+    form = {"task_id": 1, "is_approved": "true"}
+    assert client.post("/fctask/audit", data=form, headers=auth_headers(user_id)).status_code == 403
+    # token中的角色为admin，通过权限检查后才会因任务不存在而失败
+    response = client.post("/fctask/audit", data=form, headers=auth_headers(user_id, role="admin"))
+    assert response.status_code != 403
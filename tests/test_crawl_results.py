@@ -0,0 +1,103 @@
+import pytest
+
+import database
+import fcmanager
+
+
+@pytest.fixture
+def crawl(cursor):
+    """已登记的爬虫任务"""
+    cursor.execute("INSERT INTO crawl_status (fc_task_id, status) VALUES ('crawl-1', 'completed')")
+    return "crawl-1"
+
+
+def pages(start: int, count: int) -> list[dict]:
+    return [
+        {"markdown": f"# {n}\tline\nnext\\line", "metadata": {"sourceURL": f"https://a.example.com/{n}", "statusCode": 200}}
+        for n in range(start, start + count)
+    ]
+
+
+def test_results_streamed_in_batches_and_read_back_in_order(crawl, monkeypatch):
+    staged = []
+    original = database._stage_crawl_results
+    monkeypatch.setattr(database, "CRAWL_RESULT_COPY_BATCH", 3)
+    monkeypatch.setattr(database, "_stage_crawl_results", lambda *args: staged.append(len(args[2])) or original(*args))
+
+    stored = database.store_crawl_results(crawl, iter([pages(0, 2), pages(2, 2), pages(4, 1)]))
+    assert stored == 5
+    assert staged == [4, 1]
+    rows = list(database.iter_stored_crawl_results(crawl, chunk_size=2))
+    assert [row["source_url"] for row in rows] == [f"https://a.example.com/{n}" for n in range(5)]
+    assert rows[0]["markdown"] == "# 0\tline\nnext\\line"
+
+
+def test_results_paged_by_id(crawl):
+    database.store_crawl_results(crawl, [pages(0, 5)])
+    first = list(database.iter_stored_crawl_results(crawl, limit=2))
+    rest = list(database.iter_stored_crawl_results(crawl, after_id=first[-1]["id"]))
+    assert len(first) == 2 and len(rest) == 3
+
+
+def test_failed_download_keeps_previous_results(crawl, cursor):
+    database.store_crawl_results(crawl, [pages(0, 2)])
+
+    def broken():
+        yield pages(10, 2)
+        raise ConnectionError("download interrupted")
+
+    with pytest.raises(database.DatabaseError):
+        database.store_crawl_results(crawl, broken())
+    assert [row["source_url"] for row in database.iter_stored_crawl_results(crawl)] == [
+        "https://a.example.com/0",
+        "https://a.example.com/1",
+    ]
+    cursor.execute("SELECT COUNT(*) FROM crawl_result_staging")
+    assert cursor.fetchone()[0] == 0
+
+
+def test_info_returns_progress_and_results_link(client, auth_headers, make_account, firecrawl_stub, monkeypatch):
+    crawl_id = fcmanager.get_firecrawl_client(api_url=firecrawl_stub).async_crawl_url("https://example.com")["id"]
+    requests = []
+    original = fcmanager.FirecrawlClient._request
+    monkeypatch.setattr(
+        fcmanager.FirecrawlClient, "_request", lambda self, method, url, **kwargs: requests.append(url)
+        or original(self, method, url, **kwargs)
+    )
+    headers = auth_headers(make_account("info_user"))
+
+    data = client.get(f"/fctask/info?fc_task_id={crawl_id}", headers=headers).get_json()["data"]
+    assert data["status"] == "completed" and data["completed"] == 5
+    assert "data" not in data and "next" not in data
+    assert len(requests) == 1
+
+    response = client.get(data["results_url"], headers=headers)
+    assert response.mimetype == "application/x-ndjson"
+    assert len(response.get_data(as_text=True).splitlines()) == 5
+
+
+def test_async_info_returns_progress_only(db, auth_headers, make_account, firecrawl_stub):
+    import asyncio
+
+    import httpx
+
+    import asgi
+
+    crawl_id = fcmanager.get_firecrawl_client(api_url=firecrawl_stub).async_crawl_url("https://example.com")["id"]
+    app = asgi.AsyncApp(asgi.flask_app)
+    headers = auth_headers(make_account("async_info_user"))
+
+    async def request():
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await http.get(f"/fctask/info?fc_task_id={crawl_id}", headers=headers)
+        finally:
+            await app._pool.close()
+            for firecrawl in app._firecrawl.values():
+                await firecrawl.close()
+
+    data = asyncio.run(request()).json()["data"]
+    assert data["status"] == "completed" and data["completed"] == 5
+    assert "data" not in data
+    assert data["results_url"] == f"/fctask/results?fc_task_id={crawl_id}"
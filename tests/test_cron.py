@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pytest
+
+from cron import CronExpression
+
+
+def fire_times(expression: str, start: datetime, count: int) -> list[datetime]:
+    cron = CronExpression(expression)
+    times = []
+    moment = start
+    for _ in range(count):
+        moment = cron.next_after(moment)
+        times.append(moment)
+    return times
+
+
+@pytest.mark.parametrize(
+    "expression, start, expected",
+    [
+        ("*/15 * * * *", datetime(2025, 1, 1, 10, 7, 30), datetime(2025, 1, 1, 10, 15)),
+        ("0 9-17/4 * * *", datetime(2025, 1, 1, 14), datetime(2025, 1, 1, 17)),
+        ("30 2 * jan-mar *", datetime(2025, 3, 31, 3), datetime(2026, 1, 1, 2, 30)),
+        ("0 0 * * sun", datetime(2025, 1, 1), datetime(2025, 1, 5)),
+        ("0 0 * * 7", datetime(2025, 1, 1), datetime(2025, 1, 5)),
+        ("@monthly", datetime(2025, 1, 15), datetime(2025, 2, 1)),
+        ("0 0 29 2 *", datetime(2025, 1, 1), datetime(2028, 2, 29)),
+    ],
+)
+def test_next_after(expression, start, expected):
+    assert CronExpression(expression).next_after(start) == expected
+
+
+def test_next_after_is_strictly_later():
+    assert CronExpression("0 * * * *").next_after(datetime(2025, 1, 1, 10, 0)) == datetime(2025, 1, 1, 11, 0)
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["", "* * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "* * * 13 *", "* * * * 8", "*/0 * * * *",
+     "5-1 * * * *", "* * * foo *"],
+)
+def test_invalid_expressions_rejected(expression):
+    with pytest.raises(ValueError):
+        CronExpression(expression)
+
+
+def test_never_firing_expression_raises():
+    with pytest.raises(ValueError):
+        CronExpression("0 0 30 2 *").next_after(datetime(2025, 1, 1))
+
+
+# 2025年1月: 1日为周三，5日为周日
+def test_restricted_day_and_weekday_match_either():
+    # 日和周都受限时满足其一即可: 每月13日或每个周五
+    assert fire_times("0 0 13 * 5", datetime(2025, 1, 1), 3) == [
+        datetime(2025, 1, 3),
+        datetime(2025, 1, 10),
+        datetime(2025, 1, 13),
+    ]
+
+
+def test_unrestricted_weekday_uses_day_only():
+    assert fire_times("0 0 10,20 * *", datetime(2025, 1, 1), 2) == [datetime(2025, 1, 10), datetime(2025, 1, 20)]
+
+
+def test_unrestricted_day_uses_weekday_only():
+    assert fire_times("0 0 * * mon", datetime(2025, 1, 1), 2) == [datetime(2025, 1, 6), datetime(2025, 1, 13)]
+
+
+def test_starred_step_in_weekday_requires_both():
+    # 周字段以*开头时与标准cron一致，日和周需同时满足: 恰逢周日、周二、周四或周六的1日
+    assert fire_times("0 0 1 * */2", datetime(2025, 1, 1), 3) == [
+        datetime(2025, 2, 1),
+        datetime(2025, 3, 1),
+        datetime(2025, 4, 1),
+    ]
+
+
+def test_starred_step_in_day_requires_both():
+    # 日字段以*开头时日和周需同时满足: 奇数日的周一，而不是奇数日或周一
+    assert fire_times("0 0 */2 * 1", datetime(2025, 1, 1), 3) == [
+        datetime(2025, 1, 13),
+        datetime(2025, 1, 27),
+        datetime(2025, 2, 3),
+    ]
+
+
+def test_step_in_day_with_unrestricted_weekday():
+    assert fire_times("0 0 */10 * *", datetime(2025, 1, 1), 3) == [
+        datetime(2025, 1, 11),
+        datetime(2025, 1, 21),
+        datetime(2025, 1, 31),
+    ]
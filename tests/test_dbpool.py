@@ -0,0 +1,134 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+from psycopg2 import extensions
+
+import database
+from dbpool import ConnectionPool, PoolError, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+        self.info = SimpleNamespace(transaction_status=extensions.TRANSACTION_STATUS_IDLE)
+        self.commits = 0
+        self.rollbacks = 0
+
+    def commit(self):
+        self.commits += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class FakePool(ConnectionPool):
+    def __init__(self, **kwargs):
+        self.created = []
+        super().__init__({}, **kwargs)
+
+    def _connect(self):
+        connection = FakeConnection()
+        self.created.append(connection)
+        return connection
+
+
+def test_invalid_sizes_rejected():
+    with pytest.raises(ValueError):
+        FakePool(min_size=3, max_size=2)
+    with pytest.raises(ValueError):
+        FakePool(min_size=0, max_size=0)
+
+
+def test_connections_are_reused():
+    pool = FakePool(min_size=1, max_size=2)
+    first = pool.getconn()
+    pool.putconn(first)
+    assert pool.getconn() is first
+    assert len(pool.created) == 1
+
+
+def test_checkout_times_out_when_exhausted():
+    pool = FakePool(min_size=0, max_size=1, timeout=0.05)
+    pool.getconn()
+    with pytest.raises(PoolTimeoutError):
+        pool.getconn()
+    stats = pool.stats()
+    assert stats["timeouts"] == 1
+    assert stats["in_use"] == 1
+
+
+def test_waiting_checkout_gets_returned_connection():
+    pool = FakePool(min_size=0, max_size=1, timeout=5)
+    connection = pool.getconn()
+    timer = threading.Timer(0.05, pool.putconn, (connection,))
+    timer.start()
+    assert pool.getconn() is connection
+    timer.join()
+
+
+def test_context_manager_commits_or_rolls_back():
+    pool = FakePool(min_size=1, max_size=1)
+    with pool.connection() as connection:
+        pass
+    assert connection.commits == 1
+
+    with pytest.raises(RuntimeError):
+        with pool.connection() as connection:
+            raise RuntimeError
+    assert connection.rollbacks == 1
+    assert pool.stats()["idle"] == 1
+
+
+def test_open_transaction_rolled_back_on_return():
+    pool = FakePool(min_size=0, max_size=1)
+    connection = pool.getconn()
+    connection.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+    pool.putconn(connection)
+    assert connection.rollbacks == 1
+
+
+def test_closed_connection_replaced_on_checkout():
+    pool = FakePool(min_size=1, max_size=1)
+    broken = pool.created[0]
+    broken.closed = 1
+    connection = pool.getconn()
+    assert connection is not broken
+    assert pool.stats()["discarded"] == 1
+    assert pool.stats()["size"] == 1
+
+
+def test_closed_pool_rejects_checkout():
+    pool = FakePool(min_size=2, max_size=2)
+    pool.close()
+    assert all(connection.closed for connection in pool.created)
+    with pytest.raises(PoolError):
+        pool.getconn()
+
+
+def test_pooled_database_connection(db):
+    with database.get_database_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            assert cursor.fetchone() == (1,)
+    pool = database.get_connection_pool()
+    with database.get_database_connection() as again:
+        assert again is connection
+    assert pool.stats()["in_use"] == 0
+
+
+def test_failed_block_rolls_back(db):
+    with pytest.raises(RuntimeError):
+        with database.get_database_connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute("INSERT INTO account (username, password, role, status) VALUES ('x', 'x', 'user', 'pending')")
+            raise RuntimeError
+    with database.get_database_connection() as connection:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM account")
+            assert cursor.fetchone()[0] == 0
@@ -0,0 +1,39 @@
+import pytest
+
+import fcmanager
+from fcmanager import FirecrawlError, get_firecrawl_client
+
+
+def test_clients_reused_per_url_and_key():
+    first = get_firecrawl_client(api_url="http://127.0.0.1:1", api_key="a")
+    assert get_firecrawl_client(api_url="http://127.0.0.1:1", api_key="a") is first
+    assert get_firecrawl_client(api_url="http://127.0.0.1:1", api_key="b") is not first
+    assert get_firecrawl_client(api_url="http://127.0.0.1:2", api_key="a") is not first
+    fcmanager.close_firecrawl_clients()
+
+
+def test_forked_process_gets_new_clients(monkeypatch):
+    parent = get_firecrawl_client(api_url="http://127.0.0.1:1")
+    # 模拟fork后的子进程: 继承的客户端保留引用但不再使用
+    monkeypatch.setattr(fcmanager, "_clients_pid", -1)
+    child = get_firecrawl_client(api_url="http://127.0.0.1:1")
+    assert child is not parent
+    assert parent in fcmanager._inherited_clients
+    fcmanager.close_firecrawl_clients()
+
+
+def test_submit_and_page_through_results(firecrawl_stub):
+    client = get_firecrawl_client(api_url=firecrawl_stub)
+    crawl = client.async_crawl_url("https://example.com")
+    first = client.get_crawl_status_page(crawl["id"])
+    assert first["status"] == "completed"
+    assert len(first["data"]) == 2 and first["next"]
+    pages = [page for chunk in client.iter_crawl_pages(crawl["id"]) for page in chunk]
+    assert len(pages) == 5
+
+
+def test_error_response_raises(firecrawl_stub):
+    client = get_firecrawl_client(api_url=firecrawl_stub)
+    with pytest.raises(FirecrawlError) as error:
+        client.get_crawl_status_page("missing")
+    assert error.value.status_code == 404
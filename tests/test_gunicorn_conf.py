@@ -0,0 +1,63 @@
+import importlib.util
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+
+class FakeLog:
+    def __init__(self):
+        self.messages = []
+
+    def info(self, message, *args):
+        self.messages.append(("info", message % args))
+
+    def error(self, message, *args):
+        self.messages.append(("error", message % args))
+
+
+@pytest.fixture
+def gunicorn_conf(monkeypatch):
+    spec = importlib.util.spec_from_file_location(
+        "gunicorn_conf", os.path.join(os.path.dirname(os.path.dirname(__file__)), "gunicorn.conf.py")
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    monkeypatch.setenv("FCMANAGER_SERVICES", "1")
+    return module
+
+
+def test_exited_services_restarted(gunicorn_conf):
+    # 第一次启动的服务进程立即以退出码3退出，重启后的进程持续运行
+    commands = [["-c", "import sys; sys.exit(3)"], ["-c", "import time; time.sleep(60)"]]
+    started = []
+
+    def start(server):
+        process = subprocess.Popen([sys.executable, *commands[len(started)]])
+        started.append(process)
+        return process
+
+    gunicorn_conf._start_services = start
+    gunicorn_conf.SERVICES_RESTART_DELAY = 0.01
+    server = type("Server", (), {"log": FakeLog()})()
+
+    gunicorn_conf.when_ready(server)
+    deadline = time.monotonic() + 10
+    while len(started) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(started) == 2
+    assert ("error", f"后台服务已退出(pid: {started[0].pid}, 退出码: 3)，0.01秒后重启") in server.log.messages
+
+    gunicorn_conf.on_exit(server)
+    assert started[1].returncode is not None
+    time.sleep(0.05)
+    assert len(started) == 2
+
+
+def test_services_disabled(gunicorn_conf, monkeypatch):
+    monkeypatch.setenv("FCMANAGER_SERVICES", "0")
+    gunicorn_conf._start_services = lambda server: pytest.fail("不应启动后台服务")
+    gunicorn_conf.when_ready(None)
+    gunicorn_conf.on_exit(None)
@@ -0,0 +1,74 @@
+import pytest
+
+import metrics
+from metrics import Counter, Histogram
+
+
+def test_counter_render_escapes_labels():
+    counter = Counter("requests_total", "请求数", ("path",))
+    counter.inc('/a"b')
+    counter.inc('/a"b', amount=2)
+    counter.inc("c\\d")
+    assert counter.render() == [
+        "# HELP requests_total 请求数",
+        "# TYPE requests_total counter",
+        'requests_total{path="/a\\"b"} 3',
+        'requests_total{path="c\\\\d"} 1',
+    ]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("duration_seconds", "耗时", ("op",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "read")
+    assert histogram.render()[2:] == [
+        'duration_seconds_bucket{op="read",le="0.1"} 2',
+        'duration_seconds_bucket{op="read",le="1.0"} 3',
+        'duration_seconds_bucket{op="read",le="+Inf"} 4',
+        'duration_seconds_count{op="read"} 4',
+        'duration_seconds_sum{op="read"} 3.65',
+    ]
+
+
+def _samples(function: str, outcome: str) -> int:
+    state = metrics.DB_QUERY_DURATION._values.get((function, outcome))
+    return state[-2] if state else 0
+
+
+def test_timed_query_records_outcome(monkeypatch, capsys):
+    @metrics.timed_query
+    def lookup_for_test(fail=False):
+        if fail:
+            raise ValueError("失败")
+        return 1
+
+    monkeypatch.setitem(metrics.METRICS_CONFIG, "slow_query_ms", 0)
+    assert lookup_for_test() == 1
+    with pytest.raises(ValueError):
+        lookup_for_test(fail=True)
+    assert (_samples("lookup_for_test", "ok"), _samples("lookup_for_test", "error")) == (1, 1)
+    output = capsys.readouterr().out
+    assert "慢查询: lookup_for_test" in output and "(error)" in output
+
+
+def test_render_includes_collectors(monkeypatch, capsys):
+    def failing():
+        raise RuntimeError("不可用")
+
+    monkeypatch.setattr(metrics, "_collectors", [
+        lambda: [("pool_size", "gauge", "连接数", 3), ("pool_state", "gauge", "按状态", [({"state": "idle"}, 2)])],
+        failing,
+    ])
+    output = metrics.render()
+    assert "# TYPE pool_size gauge\npool_size 3\n" in output
+    assert 'pool_state{state="idle"} 2' in output
+    assert "收集指标时发生错误: 不可用" in capsys.readouterr().out
+
+
+def test_metrics_endpoint(client):
+    client.post("/user/login")
+    response = client.get("/metrics")
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert 'fcmanager_http_request_duration_seconds_count{method="POST",endpoint="/user/login",status="400"}' in body
+    assert "fcmanager_db_pool_" in body
@@ -0,0 +1,83 @@
+import psycopg2
+import pytest
+
+import migrate
+from migrate import MigrationError, _split_statements, get_migration_status, load_migrations
+
+
+def write(directory, name: str, sql: str):
+    (directory / name).write_text(sql, encoding="utf-8")
+
+
+def test_split_statements():
+    sql = """-- migrate: no-transaction
+-- 注释行被去掉
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_a ON t(a);
+
+CREATE FUNCTION f() RETURNS trigger AS $$
+BEGIN
+    NEW.a := 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+;
+SELECT 1"""
+    assert _split_statements(sql) == [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_a ON t(a);",
+        "CREATE FUNCTION f() RETURNS trigger AS $$\nBEGIN\n    NEW.a := 1;\n    RETURN NEW;\nEND;\n$$ LANGUAGE plpgsql;",
+        "SELECT 1",
+    ]
+
+
+def test_load_migrations_sorted_by_version(tmp_path):
+    write(tmp_path, "0010_later.sql", "-- migrate: no-transaction\nSELECT 1;")
+    write(tmp_path, "0002_first.sql", "SELECT 2;")
+    write(tmp_path, "readme.txt", "ignored")
+    migrations = load_migrations(str(tmp_path))
+    assert [(m["version"], m["name"], m["transactional"]) for m in migrations] == [
+        (2, "first", True),
+        (10, "later", False),
+    ]
+
+
+@pytest.mark.parametrize("names", [["first.sql"], ["0001_a.sql", "1_b.sql"]])
+def test_invalid_migration_files(tmp_path, names):
+    for name in names:
+        write(tmp_path, name, "SELECT 1;")
+    with pytest.raises(MigrationError):
+        load_migrations(str(tmp_path))
+
+
+def test_repository_migrations_apply_once(database_config):
+    # 共用测试数据库已由conftest迁移到最新版本
+    assert migrate.migrate(database_config) == []
+    status = get_migration_status(database_config)
+    assert [item["version"] for item in status] == [m["version"] for m in load_migrations()]
+    assert all(item["applied_at"] and not item["modified"] for item in status)
+
+
+# 临时目录中的迁移使用与仓库迁移不重叠的版本号
+def test_failed_migration_rolled_back(fresh_db, tmp_path):
+    write(tmp_path, "9001_create.sql", "CREATE TABLE migrate_a (id INT);")
+    write(tmp_path, "9002_broken.sql", "CREATE TABLE migrate_b (id INT);\nSELECT missing_column FROM migrate_a;")
+    with pytest.raises(MigrationError, match="9002_broken"):
+        migrate.migrate(fresh_db, str(tmp_path))
+
+    connection = psycopg2.connect(**fresh_db)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('migrate_a') IS NOT NULL, to_regclass('migrate_b') IS NOT NULL")
+            assert cursor.fetchone() == (True, False)
+    finally:
+        connection.close()
+
+    write(tmp_path, "9002_broken.sql", "CREATE TABLE migrate_b (id INT);")
+    assert [m["version"] for m in migrate.migrate(fresh_db, str(tmp_path))] == [9002]
+
+
+def test_modified_migration_reported(fresh_db, tmp_path):
+    write(tmp_path, "9001_create.sql", "CREATE TABLE migrate_a (id INT);")
+    migrate.migrate(fresh_db, str(tmp_path))
+    write(tmp_path, "9001_create.sql", "CREATE TABLE migrate_a (id BIGINT);")
+    (status,) = get_migration_status(fresh_db, str(tmp_path))
+    assert status["modified"]
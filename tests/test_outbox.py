@@ -0,0 +1,83 @@
+import pytest
+
+import database
+import dispatcher
+from dispatcher import CrawlDispatcher
+
+
+def outbox(cursor) -> list[tuple]:
+    cursor.execute("SELECT task_id, site_url, status, attempts FROM crawl_outbox ORDER BY id")
+    return cursor.fetchall()
+
+
+@pytest.fixture
+def admin_id(make_account):
+    return make_account("outbox_admin", role="admin")
+
+
+@pytest.fixture
+def pending_task(cursor, make_account):
+    cursor.execute(
+        "INSERT INTO task (applicant_id, name, site_url) VALUES (%s, 'pending', 'https://a.example.com') RETURNING id",
+        (make_account("outbox_user"),),
+    )
+    return cursor.fetchone()[0]
+
+
+def test_approve_writes_outbox_in_same_transaction(cursor, admin_id, pending_task):
+    database.approve_task(pending_task, admin_id, True)
+    assert outbox(cursor) == [(pending_task, "https://a.example.com", "pending", 0)]
+    cursor.execute("SELECT status, fc_task_id FROM task WHERE id = %s", (pending_task,))
+    assert cursor.fetchone() == ("approved", None)
+
+
+def test_reject_writes_no_outbox(cursor, admin_id, pending_task):
+    database.approve_task(pending_task, admin_id, False)
+    assert outbox(cursor) == []
+
+
+def test_admin_create_enqueues_crawl(client, cursor, auth_headers, admin_id, monkeypatch):
+    def unexpected(*args, **kwargs):
+        raise AssertionError("创建任务时不应调用Firecrawl")
+
+    monkeypatch.setattr(dispatcher, "create_crawl_task", unexpected)
+    response = client.post(
+        "/fctask/create",
+        data={"name": "admin task", "category": "news", "site_url": "https://b.example.com"},
+        headers=auth_headers(admin_id),
+    )
+    assert response.status_code == 200
+    cursor.execute("SELECT id, status, fc_task_id FROM task")
+    task_id, status, fc_task_id = cursor.fetchone()
+    assert (status, fc_task_id) == ("approved", None)
+    assert outbox(cursor) == [(task_id, "https://b.example.com", "pending", 0)]
+
+
+def test_failed_create_leaves_no_outbox(cursor, admin_id):
+    with pytest.raises(database.DatabaseError):
+        database.create_task(admin_id, "x" * 101, None, "news", "https://c.example.com", status="approved")
+    assert outbox(cursor) == []
+
+
+def test_dispatch_records_crawl_id(cursor, admin_id, pending_task, monkeypatch):
+    database.approve_task(pending_task, admin_id, True)
+    monkeypatch.setattr(dispatcher, "create_crawl_task", lambda url: {"id": "fc-1", "backend": "a"})
+    [item] = database.claim_crawl_outbox(10, 60)
+    CrawlDispatcher()._dispatch(*item)
+    assert outbox(cursor) == [(pending_task, "https://a.example.com", "done", 1)]
+    cursor.execute("SELECT t.fc_task_id, s.backend FROM task t JOIN crawl_status s USING (fc_task_id)")
+    assert cursor.fetchone() == ("fc-1", "a")
+
+
+def test_dispatch_failure_retries_then_fails(cursor, admin_id, pending_task, monkeypatch):
+    def failing(url):
+        raise ConnectionError("unreachable")
+
+    database.approve_task(pending_task, admin_id, True)
+    monkeypatch.setattr(dispatcher, "create_crawl_task", failing)
+    crawl_dispatcher = CrawlDispatcher(max_attempts=2, base_delay=0)
+    for _ in range(2):
+        [item] = database.claim_crawl_outbox(10, 0)
+        crawl_dispatcher._dispatch(*item)
+    assert outbox(cursor) == [(pending_task, "https://a.example.com", "failed", 2)]
+    assert database.claim_crawl_outbox(10, 0) == []
@@ -0,0 +1,92 @@
+import psycopg2
+import pytest
+
+import database
+from partitioning import RETIRED_TABLE, convert_task_table, is_partitioned
+
+
+@pytest.fixture
+def converted(fresh_db):
+    """在独占的数据库中写入跨月份的任务后转换为分区表，返回自动提交的游标"""
+    connection = psycopg2.connect(**fresh_db)
+    connection.autocommit = True
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                INSERT INTO account (username, password, status, created_at)
+                VALUES ('stale', 'x', 'pending', LOCALTIMESTAMP - INTERVAL '30 days'),
+                       ('active', 'x', 'approved', LOCALTIMESTAMP)
+                """
+            )
+            cursor.execute(
+                """
+                INSERT INTO task (applicant_id, created_at, name, status)
+                SELECT 1 + n % 2, date_trunc('month', LOCALTIMESTAMP) - (n % 3) * INTERVAL '1 month',
+                       'task ' || n, 'pending'
+                FROM generate_series(1, 30) AS n
+                """
+            )
+            convert_task_table(fresh_db, batch_size=7, progress=lambda message: None)
+            yield cursor
+    finally:
+        connection.close()
+
+
+def _foreign_keys(cursor, table: str) -> list[str]:
+    cursor.execute(
+        "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f' ORDER BY conname",
+        (table,),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def test_conversion_keeps_rows_and_foreign_keys(converted):
+    assert is_partitioned(converted)
+    converted.execute("SELECT COUNT(*) FROM task")
+    assert converted.fetchone()[0] == 30
+    assert _foreign_keys(converted, "task") == ["task_applicant_id_fkey", "task_reviewer_id_fkey"]
+    assert _foreign_keys(converted, RETIRED_TABLE) == []
+
+
+def test_purge_accounts_after_conversion(converted):
+    stats = database.purge_pending_accounts(7)
+    assert (stats["accounts"], stats["tasks"]) == (1, 15)
+    converted.execute("SELECT COUNT(*) FROM task")
+    assert converted.fetchone()[0] == 15
+
+
+def test_rerun_drops_leftover_foreign_keys(fresh_db, converted):
+    # 修复前转换的数据库中原表仍保留外键
+    converted.execute(
+        f"ALTER TABLE {RETIRED_TABLE} ADD CONSTRAINT task_applicant_id_fkey "
+        "FOREIGN KEY (applicant_id) REFERENCES account(id)"
+    )
+    convert_task_table(fresh_db, progress=lambda message: None)
+    assert _foreign_keys(converted, RETIRED_TABLE) == []
+
+
+
+def test_bulk_queries_skip_other_partitions(fresh_db, converted, monkeypatch):
+    # 规划时未被排除的分区都要加锁：另一个事务独占锁定最早月份的分区后，
+    # 只访问其余分区的查询不受影响，访问该分区的查询在lock_timeout后失败
+    converted.execute("SELECT tableoid::regclass::text FROM task ORDER BY created_at LIMIT 1")
+    partition = converted.fetchone()[0]
+    converted.execute(f"SELECT id FROM task WHERE tableoid <> '{partition}'::regclass ORDER BY id LIMIT 5")
+    task_ids = [row[0] for row in converted.fetchall()]
+    converted.execute("UPDATE task SET status = 'approved', schedule = '@daily' WHERE id = ANY(%s)", (task_ids[:3],))
+    converted.execute("UPDATE account SET role = 'admin' WHERE username = 'active' RETURNING id")
+    admin_id = converted.fetchone()[0]
+
+    database.close_connection_pool()
+    monkeypatch.setitem(database.DATABASE_CONFIG, "options", "-c lock_timeout=1s")
+    locker = psycopg2.connect(**fresh_db)
+    try:
+        with locker.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {partition} IN ACCESS EXCLUSIVE MODE")
+            assert sorted(row[0] for row in database.get_scheduled_tasks(task_ids)) == task_ids[:3]
+            reviewed = database.approve_tasks([(task_id, False) for task_id in task_ids] + [(999, True)], admin_id)
+            assert sorted(reviewed) == task_ids[3:]
+    finally:
+        locker.close()
+        database.close_connection_pool()
@@ -0,0 +1,65 @@
+import pytest
+
+import database
+import passwords
+from passwords import hash_password, needs_rehash, verify_password
+
+
+@pytest.fixture
+def fast_hashing(monkeypatch):
+    """测试中使用最低cost并在调用线程内计算"""
+    monkeypatch.setitem(passwords.PASSWORD_CONFIG, "rounds", 4)
+    monkeypatch.setitem(passwords.PASSWORD_CONFIG, "workers", 0)
+
+
+def test_hash_and_verify(fast_hashing):
+    hashed = hash_password("secret123")
+    assert hashed.startswith("$2b$04$")
+    assert verify_password("secret123", hashed)
+    assert not verify_password("secret124", hashed)
+
+
+def test_process_pool_hashing(monkeypatch):
+    monkeypatch.setitem(passwords.PASSWORD_CONFIG, "workers", 1)
+    try:
+        hashed = hash_password("secret123", rounds=4)
+        assert verify_password("secret123", hashed)
+    finally:
+        passwords.shutdown_password_pool()
+
+
+def test_needs_rehash(fast_hashing):
+    assert not needs_rehash(hash_password("secret123"))
+    assert needs_rehash(hash_password("secret123", rounds=5))
+    assert needs_rehash("plain text")
+
+
+def test_login_upgrades_hash_cost(fast_hashing, cursor):
+    cursor.execute(
+        "INSERT INTO account (username, password, status) VALUES ('rehash', %s, 'approved') RETURNING id",
+        (hash_password("secret123", rounds=5),),
+    )
+    user_id = cursor.fetchone()[0]
+
+    assert database.login("rehash", "secret123") == (user_id, "登录成功")
+    cursor.execute("SELECT password FROM account WHERE id = %s", (user_id,))
+    stored = cursor.fetchone()[0]
+    assert stored.startswith("$2b$04$")
+    assert verify_password("secret123", stored)
+
+
+def test_rehash_skips_concurrently_changed_password(fast_hashing, cursor, make_account):
+    user_id = make_account("changed")
+    assert not database.rehash_password(user_id, "stale hash", hash_password("secret123"))
+    cursor.execute("SELECT password FROM account WHERE id = %s", (user_id,))
+    assert cursor.fetchone()[0] == "x"
+
+
+def test_register_and_login_endpoints(fast_hashing, client):
+    response = client.post("/user/register", data={"username": "alice", "password": "secret123"})
+    assert response.status_code == 200
+    response = client.post("/user/login", data={"username": "alice", "password": "wrong1234"})
+    assert response.status_code == 500
+    response = client.post("/user/login", data={"username": "alice", "password": "secret123"})
+    assert response.status_code == 200
+    assert response.get_json()["access_token"]
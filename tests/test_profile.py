@@ -0,0 +1,51 @@
+import pytest
+
+import database
+
+
+def test_profile_created_on_first_read(cursor, make_account):
+    user_id = make_account("profile_user")
+    profile = database.get_or_create_profile(user_id, use_cache=False)
+    assert {key: profile[key] for key in ("nickname", "name", "department", "role")} == {
+        "nickname": "profile_user", "name": "", "department": "", "role": "user",
+    }
+    assert database.get_or_create_profile(user_id, use_cache=False) == profile
+    cursor.execute("SELECT COUNT(*) FROM profile WHERE user_id = %s", (user_id,))
+    assert cursor.fetchone()[0] == 1
+
+
+def test_unknown_user(db):
+    with pytest.raises(ValueError):
+        database.get_or_create_profile(999, use_cache=False)
+
+
+def test_cached_profile_invalidated_on_update(make_account, monkeypatch):
+    user_id = make_account("cached_profile")
+    first = database.get_or_create_profile(user_id)
+    # 缓存命中时不查询数据库，返回的字典可以修改而不影响缓存
+    monkeypatch.setattr(database, "_query_profile", lambda user_id: pytest.fail("不应查询数据库"))
+    cached = database.get_or_create_profile(user_id)
+    cached["nickname"] = "changed"
+    assert database.get_or_create_profile(user_id) == first
+    monkeypatch.undo()
+
+    database.update_or_create_profile(user_id, "nick", "Name", "Dept")
+    assert database.get_or_create_profile(user_id)["nickname"] == "nick"
+
+
+def test_profile_endpoint_etag(client, auth_headers, make_account):
+    headers = auth_headers(make_account("etag_user"))
+    response = client.get("/user/profile/get", headers=headers)
+    assert response.status_code == 200
+    assert response.get_json()["data"] == {"nickname": "etag_user", "name": "", "department": "", "role": "user"}
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    etag = response.headers["ETag"]
+
+    response = client.get("/user/profile/get", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.post("/user/profile/update", data={"nickname": "n", "name": "N", "department": "D"}, headers=headers)
+    response = client.get("/user/profile/get", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.get_json()["data"]["nickname"] == "n"
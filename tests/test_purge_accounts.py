@@ -0,0 +1,63 @@
+import database
+
+
+def _make_stale(cursor, count: int, days: int = 10) -> list[int]:
+    """插入count个创建于days天前的待审核账户，每个账户带profile和一个任务"""
+    cursor.execute(
+        """
+        INSERT INTO account (username, password, status, created_at)
+        SELECT 'stale_' || n, 'x', 'pending', LOCALTIMESTAMP - %s * INTERVAL '1 day'
+        FROM generate_series(1, %s) AS n
+        RETURNING id
+        """,
+        (days, count),
+    )
+    account_ids = [row[0] for row in cursor.fetchall()]
+    cursor.execute("INSERT INTO profile (user_id) SELECT unnest(%s::int[])", (account_ids,))
+    cursor.execute(
+        "INSERT INTO task (applicant_id, name) SELECT id, 'stale task' FROM unnest(%s::int[]) AS id",
+        (account_ids,),
+    )
+    return account_ids
+
+
+def _count(cursor, table: str) -> int:
+    cursor.execute(f"SELECT COUNT(*) FROM {table}")
+    return cursor.fetchone()[0]
+
+
+def test_purge_in_batches(cursor, make_account):
+    _make_stale(cursor, 7)
+    kept_pending = make_account("recent", status="pending")
+    kept_approved = make_account("approved")
+    batches = []
+
+    stats = database.purge_pending_accounts(7, batch_size=3, progress=batches.append)
+
+    assert (stats["accounts"], stats["profiles"], stats["tasks"], stats["batches"]) == (7, 7, 7, 3)
+    assert [batch["accounts"] for batch in batches] == [3, 6, 7]
+    cursor.execute("SELECT id FROM account ORDER BY id")
+    assert [row[0] for row in cursor.fetchall()] == [kept_pending, kept_approved]
+    assert _count(cursor, "profile") == _count(cursor, "task") == 0
+
+
+def test_dry_run_deletes_nothing(cursor):
+    _make_stale(cursor, 4)
+    stats = database.purge_pending_accounts(7, dry_run=True)
+    assert (stats["accounts"], stats["profiles"], stats["tasks"], stats["dry_run"]) == (4, 4, 4, True)
+    assert _count(cursor, "account") == 4
+
+
+def test_tasks_reviewed_by_stale_account_removed(cursor, make_account):
+    (stale_id,) = _make_stale(cursor, 1)
+    applicant_id = make_account("applicant")
+    cursor.execute("INSERT INTO task (applicant_id, reviewer_id, name) VALUES (%s, %s, 'reviewed')", (applicant_id, stale_id))
+    assert database.purge_pending_accounts(7)["tasks"] == 2
+    assert _count(cursor, "task") == 0
+
+
+def test_negative_days_is_noop(cursor):
+    _make_stale(cursor, 2)
+    assert database.purge_pending_accounts(-1)["accounts"] == 0
+    assert database.cleanup_pending_accounts(7) == 2
+    assert _count(cursor, "account") == 0
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+import database
+from scheduler import CrawlScheduler
+
+
+def test_due_tasks_popped_and_rescheduled():
+    scheduler = CrawlScheduler(max_jitter=0)
+    scheduler._load([(1, "*/5 * * * *", "https://a.example.com"), (2, "0 0 1 1 *", "https://b.example.com")])
+    first_fire = scheduler._heap[0][0]
+
+    assert scheduler._pop_due(first_fire - timedelta(seconds=1)) == []
+    assert scheduler._pop_due(first_fire) == [(1, "https://a.example.com", first_fire, 0)]
+    # 出堆后按下一次触发时间重新入堆
+    assert scheduler._heap[0][0] == first_fire + timedelta(minutes=5)
+
+
+def test_changed_task_drops_stale_heap_entry(monkeypatch):
+    import scheduler as scheduler_module
+
+    scheduler = CrawlScheduler(max_jitter=0)
+    scheduler._load([(1, "*/5 * * * *", "https://a.example.com")])
+    monkeypatch.setattr(scheduler_module, "get_scheduled_tasks", lambda task_ids: [])
+    scheduler.refresh_tasks([1])
+    assert scheduler._pop_due(datetime.now() + timedelta(days=1)) == []
+
+
+def test_invalid_schedule_skipped():
+    scheduler = CrawlScheduler()
+    scheduler._load([(1, "not a cron", "https://a.example.com"), (2, "@hourly", "https://b.example.com")])
+    assert list(scheduler._entries) == [2]
+
+
+def test_refresh_reads_only_scheduled_approved_tasks(cursor, make_account):
+    user_id = make_account("schedule_user")
+    cursor.execute(
+        """
+        INSERT INTO task (applicant_id, name, site_url, status, schedule) VALUES
+            (%s, 'scheduled', 'https://a.example.com', 'approved', '@hourly'),
+            (%s, 'pending', 'https://b.example.com', 'pending', '@hourly'),
+            (%s, 'once', 'https://c.example.com', 'approved', NULL)
+        """,
+        (user_id, user_id, user_id),
+    )
+    assert database.get_scheduled_tasks() == [(1, "@hourly", "https://a.example.com")]
+    assert database.get_scheduled_tasks([2, 3]) == []
+
+    scheduler = CrawlScheduler()
+    scheduler.refresh_tasks([1, 2, 3])
+    assert list(scheduler._entries) == [1]
+
+
+def test_each_firing_enqueued_once(cursor, make_account):
+    cursor.execute(
+        "INSERT INTO task (applicant_id, name, site_url, status, schedule) "
+        "VALUES (%s, 'scheduled', 'https://a.example.com', 'approved', '@hourly')",
+        (make_account("enqueue_user"),),
+    )
+    fire_at = datetime(2025, 1, 1, 10)
+    assert database.enqueue_scheduled_crawls([(1, "https://a.example.com", fire_at, 0)]) == 1
+    assert database.enqueue_scheduled_crawls([(1, "https://a.example.com", fire_at, 0)]) == 0
+    cursor.execute("SELECT task_id, scheduled_for FROM crawl_outbox")
+    assert cursor.fetchall() == [(1, fire_at)]
@@ -0,0 +1,78 @@
+import gzip
+import json
+import zlib
+from datetime import datetime
+
+import pytest
+
+import database
+import serialization
+from serialization import choose_encoding, compress, dumps
+
+
+@pytest.mark.parametrize("backend", ["json", "orjson"])
+def test_backends_produce_same_json(monkeypatch, backend):
+    if backend not in serialization._BACKENDS:
+        pytest.skip("未安装orjson")
+    monkeypatch.setitem(serialization.SERIALIZATION_CONFIG, "backend", backend)
+    value = {"name": "中文", "ids": [1, 2], 3: None, "ok": True}
+    assert json.loads(dumps(value)) == {"name": "中文", "ids": [1, 2], "3": None, "ok": True}
+
+
+def test_unknown_backend(monkeypatch):
+    monkeypatch.setitem(serialization.SERIALIZATION_CONFIG, "backend", "missing")
+    with pytest.raises(ValueError):
+        dumps({})
+
+
+@pytest.mark.parametrize("header, encoding", [
+    (None, None),
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0.5, deflate", "deflate"),
+    ("gzip;q=0", None),
+    ("br", None),
+    ("*", "gzip"),
+    ("gzip;q=bad, deflate;q=0.1", "deflate"),
+])
+def test_choose_encoding(header, encoding):
+    assert choose_encoding(header) == encoding
+
+
+def test_compress_large_payloads_only():
+    small = b"{}"
+    assert compress(small, "gzip") == (small, None)
+    payload = b'{"tasks": [' + b",".join(b'{"id": 1}' for _ in range(200)) + b"]}"
+    body, encoding = compress(payload, "gzip")
+    assert encoding == "gzip" and gzip.decompress(body) == payload
+    body, encoding = compress(payload, "deflate")
+    assert encoding == "deflate" and zlib.decompress(body) == payload
+
+
+def test_columnar_matches_rows():
+    row = (1, "task", None, "news", "https://a.example.com", None, "approved",
+           datetime(2025, 1, 2, 3, 4, 5, 678), None, "fc-1", "alice", "admin",
+           "completed", 3, 3, datetime(2025, 1, 3))
+    tasks = database._format_task_rows([row, row], "rows")
+    columns = database._format_task_rows([row, row], "columnar")
+    assert tasks[0]["created_at"] == "2025-01-02 03:04:05"
+    assert columns["created_at"] == ["2025-01-02 03:04:05"] * 2
+    for field, values in columns.items():
+        if field.startswith("crawl_"):
+            assert values == [tasks[0]["crawl"][field[len("crawl_"):]]] * 2
+        else:
+            assert values == [tasks[0][field]] * 2
+    assert database._format_task_rows([], "columnar")["id"] == []
+
+
+def test_task_list_endpoint_compresses(client, cursor, make_account, auth_headers):
+    user_id = make_account("compress_user")
+    cursor.execute(
+        "INSERT INTO task (applicant_id, name) SELECT %s, 'task ' || n FROM generate_series(1, 50) AS n",
+        (user_id,),
+    )
+    response = client.get("/fctask/get?page_size=50&format=columnar",
+                          headers={**auth_headers(user_id), "Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    data = json.loads(gzip.decompress(response.get_data()))["data"]
+    assert len(data["tasks"]["id"]) == 50
@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+import fcmanager
+from fcmanager import get_crawl_status_cached
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """替换上游查询，记录调用次数；status为返回的爬虫状态"""
+    calls = []
+    state = {"status": "completed", "delay": 0.0, "error": None}
+
+    def get_crawl_progress(task_id, backend=None):
+        calls.append(task_id)
+        time.sleep(state["delay"])
+        if state["error"]:
+            raise state["error"]
+        return {"status": state["status"], "completed": 3, "total": 3}
+
+    monkeypatch.setattr(fcmanager, "get_crawl_progress", get_crawl_progress)
+    fcmanager._status_cache.clear()
+    yield state, calls
+    fcmanager._status_cache.clear()
+
+
+def test_terminal_status_cached_permanently(upstream):
+    state, calls = upstream
+    status, cache_state = get_crawl_status_cached("done")
+    assert cache_state == "miss"
+    assert get_crawl_status_cached("done") == (status, "hit")
+    assert calls == ["done"]
+    assert fcmanager._status_cache._data["done"][1] is None
+
+
+def test_status_read_from_first_page_without_data(firecrawl_stub, monkeypatch):
+    client = fcmanager.get_firecrawl_client(api_url=firecrawl_stub)
+    crawl_id = client.async_crawl_url("https://example.com")["id"]
+    requests = []
+    original = fcmanager.FirecrawlClient._request
+    monkeypatch.setattr(
+        fcmanager.FirecrawlClient, "_request", lambda self, method, url, **kwargs: requests.append(url)
+        or original(self, method, url, **kwargs)
+    )
+    status, _ = get_crawl_status_cached(crawl_id)
+    assert status["status"] == "completed" and status["completed"] == 5
+    assert "data" not in status and "next" not in status
+    assert len(requests) == 1
+    assert "data" not in fcmanager._status_cache._data[crawl_id][0]
+
+
+def test_running_status_expires(upstream, monkeypatch):
+    state, calls = upstream
+    state["status"] = "scraping"
+    monkeypatch.setattr(fcmanager._status_cache, "ttl", 0.01)
+    get_crawl_status_cached("running")
+    time.sleep(0.02)
+    assert get_crawl_status_cached("running")[1] == "miss"
+    assert calls == ["running", "running"]
+
+
+def test_concurrent_requests_coalesced(upstream):
+    state, calls = upstream
+    state["delay"] = 0.2
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(get_crawl_status_cached("shared")[1])) for _ in range(5)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert calls == ["shared"]
+    assert sorted(results) == ["coalesced"] * 4 + ["miss"]
+
+
+def test_upstream_error_reaches_waiters_and_is_not_cached(upstream):
+    state, calls = upstream
+    state["delay"] = 0.1
+    state["error"] = RuntimeError("upstream down")
+    errors = []
+
+    def request():
+        try:
+            get_crawl_status_cached("failing")
+        except RuntimeError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=request) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(errors) == 3 and len(calls) == 1
+    state["error"] = None
+    state["delay"] = 0
+    assert get_crawl_status_cached("failing")[1] == "miss"
@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import database
+import fcmanager
+from synchronizer import StatusSynchronizer
+
+
+@pytest.fixture
+def synchronizer():
+    synchronizer = StatusSynchronizer(batch_size=10, min_poll_interval=2, max_poll_interval=120)
+    synchronizer._executor = ThreadPoolExecutor(max_workers=2)
+    yield synchronizer
+    synchronizer._executor.shutdown()
+
+
+def track(cursor, fc_task_id: str, task_id: int = None):
+    cursor.execute(
+        "INSERT INTO crawl_status (fc_task_id, task_id, backend) VALUES (%s, %s, 'stub')", (fc_task_id, task_id)
+    )
+
+
+def test_poll_interval_adapts_to_progress(synchronizer):
+    assert synchronizer._next_interval(10, True) == 5
+    assert synchronizer._next_interval(3, True) == 2
+    assert synchronizer._next_interval(10, False) == 15
+    assert synchronizer._next_interval(100, False) == 120
+
+
+def test_completed_crawl_synced_with_results(synchronizer, cursor, make_account, firecrawl_stub):
+    crawl_id = fcmanager.get_firecrawl_client(api_url=firecrawl_stub).async_crawl_url("https://example.com")["id"]
+    user_id = make_account("sync_user")
+    cursor.execute(
+        "INSERT INTO task (applicant_id, name, status, fc_task_id) VALUES (%s, 'synced', 'approved', %s) RETURNING id",
+        (user_id, crawl_id),
+    )
+    track(cursor, crawl_id, cursor.fetchone()[0])
+
+    assert synchronizer.sync_once() == 1
+    cursor.execute("SELECT status, completed, total, error FROM crawl_status WHERE fc_task_id = %s", (crawl_id,))
+    assert cursor.fetchone() == ("completed", 5, 5, None)
+    assert len(list(database.iter_stored_crawl_results(crawl_id))) == 5
+    # 终态的任务不再领取
+    assert synchronizer.sync_once() == 0
+
+    [task] = database.get_tasks(user_id=user_id)["tasks"]
+    assert task["crawl"]["status"] == "completed" and task["crawl"]["completed"] == 5
+
+
+def test_failed_poll_keeps_progress_and_backs_off(synchronizer, cursor, firecrawl_stub):
+    track(cursor, "missing")
+    cursor.execute("UPDATE crawl_status SET completed = 3 WHERE fc_task_id = 'missing'")
+
+    assert synchronizer.sync_once() == 1
+    cursor.execute("SELECT status, completed, poll_interval, error IS NOT NULL FROM crawl_status")
+    assert cursor.fetchone() == ("scraping", 3, 120, True)
+    assert synchronizer.sync_once() == 0
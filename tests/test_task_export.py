@@ -0,0 +1,65 @@
+import csv
+import io
+import json
+
+import pytest
+
+import database
+from fcapi import _csv_cell
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("=HYPERLINK(\"http://x\")", "'=HYPERLINK(\"http://x\")"),
+    ("+1", "'+1"),
+    ("-1", "'-1"),
+    ("@SUM(A1)", "'@SUM(A1)"),
+    ("\tcmd", "'\tcmd"),
+    ("plain", "plain"),
+    (-1, -1),
+    (None, None),
+])
+def test_csv_cell(value, expected):
+    assert _csv_cell(value) == expected
+
+
+@pytest.fixture
+def admin_headers(cursor, make_account, auth_headers):
+    user_id = make_account("export_user")
+    cursor.execute(
+        """
+        INSERT INTO task (applicant_id, name, description, category) VALUES
+            (%s, '=1+2', '-desc', 'news'),
+            (%s, 'normal', '中文描述', 'blog')
+        """,
+        (user_id, user_id),
+    )
+    return auth_headers(make_account("export_admin", role="admin"))
+
+
+def test_csv_export_neutralizes_formulas(client, admin_headers):
+    response = client.get("/fctask/export", headers=admin_headers)
+    assert response.mimetype == "text/csv"
+    assert response.headers["Content-Disposition"].startswith('attachment; filename="tasks-')
+    text = response.get_data(as_text=True)
+    assert text.startswith("﻿")
+    rows = list(csv.DictReader(io.StringIO(text[1:])))
+    assert [(row["name"], row["description"]) for row in rows] == [("'=1+2", "'-desc"), ("normal", "中文描述")]
+    assert list(rows[0]) == list(database.TASK_COLUMNAR_FIELDS)
+
+
+def test_ndjson_export_keeps_raw_values(client, admin_headers):
+    response = client.get("/fctask/export?format=ndjson&category=news", headers=admin_headers)
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["name"] for line in lines] == ["=1+2"]
+
+
+def test_export_in_chunks(admin_headers):
+    chunks = list(database.iter_task_export(chunk_size=1))
+    assert [len(chunk) for chunk in chunks] == [1, 1]
+    assert isinstance(chunks[0][0][7], str)
+
+
+def test_export_rejects_invalid_requests(client, auth_headers, make_account, admin_headers):
+    assert client.get("/fctask/export?format=xlsx", headers=admin_headers).status_code == 400
+    assert client.get("/fctask/export?start_date=bad", headers=admin_headers).status_code == 400
+    assert client.get("/fctask/export", headers=auth_headers(make_account("not_admin"))).status_code == 403
@@ -0,0 +1,23 @@
+import database
+
+
+def test_index_check_covers_every_filter_combination(db):
+    report = database.check_task_indexes()
+    assert len(report) == 16
+    assert {tuple(item["filters"]) for item in report} >= {(), ("user_id", "status", "category", "date_range")}
+
+
+def test_filtered_queries_use_indexes(cursor, make_account):
+    user_ids = [make_account(f"index_user_{n}") for n in range(20)]
+    cursor.execute(
+        """
+        INSERT INTO task (applicant_id, created_at, name, category, status)
+        SELECT (%s::int[])[1 + n %% 20], LOCALTIMESTAMP - n * INTERVAL '1 minute', 'task ' || n,
+               'category_' || (n %% 50), CASE WHEN n %% 100 = 0 THEN 'pending' ELSE 'approved' END
+        FROM generate_series(1, 50000) AS n
+        """,
+        (user_ids,),
+    )
+    cursor.execute("ANALYZE task")
+    report = database.check_task_indexes()
+    assert [item["filters"] for item in report if item["seq_scan"]] == []
@@ -0,0 +1,85 @@
+from datetime import datetime
+
+import pytest
+
+import database
+from database import decode_task_cursor, encode_task_cursor
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 3, 1, 12, 30, 45, 123456)
+    cursor = encode_task_cursor(created_at, 42)
+    assert "=" not in cursor
+    assert decode_task_cursor(cursor) == (created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_task_cursor(datetime(2025, 1, 1), 1)[:-3]])
+def test_invalid_cursor_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_task_cursor(cursor)
+
+
+@pytest.mark.parametrize(
+    "arguments",
+    [
+        {"page_size": 0},
+        {"page_size": database.TASK_PAGE_SIZE_MAX + 1},
+        {"page": 0},
+        {"pagination": "keyset"},
+        {"count_mode": "approximate"},
+    ],
+)
+def test_invalid_arguments_rejected(arguments):
+    with pytest.raises(ValueError):
+        database.build_task_queries(**arguments)
+
+
+@pytest.fixture
+def tasks(cursor, make_account):
+    """25个任务，其中10个的创建时间相同，用于检查游标按id区分"""
+    user_id = make_account("page_user")
+    cursor.execute(
+        """
+        INSERT INTO task (applicant_id, created_at, name, status)
+        SELECT %s, TIMESTAMP '2025-01-01' + LEAST(n, 15) * INTERVAL '1 minute', 'task ' || n, 'pending'
+        FROM generate_series(1, 25) AS n
+        """,
+        (user_id,),
+    )
+    return user_id
+
+
+def test_cursor_pages_cover_all_tasks_once(tasks):
+    seen = []
+    cursor = None
+    while True:
+        page = database.get_tasks(user_id=tasks, page_size=7, pagination="cursor", cursor=cursor, count_mode="none")
+        seen += [task["id"] for task in page["tasks"]]
+        if not page["has_more"]:
+            assert page["next_cursor"] is None
+            break
+        cursor = page["next_cursor"]
+    assert sorted(seen) == list(range(1, 26))
+    assert len(seen) == len(set(seen))
+
+
+def test_offset_and_cursor_pages_agree(tasks):
+    offset = database.get_tasks(user_id=tasks, page=2, page_size=10)
+    first = database.get_tasks(user_id=tasks, page_size=10, pagination="cursor")
+    second = database.get_tasks(user_id=tasks, page_size=10, pagination="cursor", cursor=first["next_cursor"])
+    assert offset["total"] == 25
+    assert offset["total_pages"] == 3
+    assert [task["id"] for task in offset["tasks"]] == [task["id"] for task in second["tasks"]]
+
+
+def test_count_modes(tasks):
+    assert database.get_tasks(user_id=tasks, count_mode="none")["total"] is None
+    assert database.get_tasks(user_id=tasks, count_mode="capped")["total"] == 25
+
+
+def test_endpoint_rejects_invalid_page_size(client, auth_headers, make_account):
+    headers = auth_headers(make_account("page_client"))
+    assert client.get("/fctask/get?page_size=0", headers=headers).status_code == 400
+    assert client.get("/fctask/get?page=-1", headers=headers).status_code == 400
+    assert client.get("/fctask/get?pagination=cursor&cursor=bad", headers=headers).status_code == 400
+    assert client.get("/fctask/get?page_size=5", headers=headers).status_code == 200
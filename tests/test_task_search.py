@@ -0,0 +1,67 @@
+import pytest
+
+import database
+from database import decode_search_cursor, encode_search_cursor, parse_task_search
+
+
+def test_parse_task_search():
+    assert parse_task_search("Python crawler") == ("python:* & crawler:*", "%Python crawler%")
+    assert parse_task_search("go") == ("go:*", None)
+    assert parse_task_search("50%_off") == ("50:* & _off:*", "%50\\%\\_off%")
+    with pytest.raises(ValueError):
+        parse_task_search(" - ")
+
+
+def test_search_cursor_round_trip():
+    assert decode_search_cursor(encode_search_cursor(0.123456789, 42)) == (0.123456789, 42)
+    with pytest.raises(ValueError):
+        decode_search_cursor("invalid")
+
+
+@pytest.fixture
+def user_id(cursor, make_account):
+    user_id = make_account("search_user")
+    other_id = make_account("search_other")
+    cursor.execute(
+        """
+        INSERT INTO task (applicant_id, name, description, category, site_url) VALUES
+            (%(user)s, 'python crawler', 'news site', 'news', 'https://news.example.com'),
+            (%(user)s, 'weather', 'python scripts for weather', 'weather', 'https://weather.example.com'),
+            (%(user)s, 'shop', NULL, 'shop', 'https://pythonshop.example.com'),
+            (%(user)s, 'unrelated', 'nothing here', 'misc', 'https://misc.example.com'),
+            (%(other)s, 'python other user', NULL, 'news', 'https://other.example.com')
+        """,
+        {"user": user_id, "other": other_id},
+    )
+    return user_id
+
+
+def test_search_ranks_name_matches_first(user_id):
+    result = database.search_tasks("python", user_id=user_id)
+    names = [task["name"] for task in result["tasks"]]
+    assert names[0] == "python crawler"
+    assert set(names) == {"python crawler", "weather", "shop"}
+    ranks = [task["rank"] for task in result["tasks"]]
+    assert ranks == sorted(ranks, reverse=True)
+    assert database.search_tasks("python", user_id=user_id, category="weather")["tasks"][0]["name"] == "weather"
+
+
+def test_search_cursor_pages(user_id):
+    seen = []
+    cursor = None
+    while True:
+        page = database.search_tasks("python", user_id=user_id, page_size=1, cursor=cursor)
+        seen.extend(task["id"] for task in page["tasks"])
+        if not page["has_more"]:
+            assert page["next_cursor"] is None
+            break
+        cursor = page["next_cursor"]
+    assert seen == [task["id"] for task in database.search_tasks("python", user_id=user_id)["tasks"]]
+
+
+def test_search_endpoint(client, auth_headers, user_id):
+    headers = auth_headers(user_id)
+    response = client.get("/fctask/search?q=weather", headers=headers)
+    assert [task["name"] for task in response.get_json()["data"]["tasks"]] == ["weather"]
+    for query in ("", "?q=python&page_size=0", "?q=python&cursor=invalid"):
+        assert client.get(f"/fctask/search{query}", headers=headers).status_code == 400
@@ -0,0 +1,99 @@
+import pytest
+
+import database
+
+
+def stats(**kwargs) -> tuple:
+    result = database.get_task_stats(**kwargs)
+    return result["total"], result["status"]
+
+
+@pytest.fixture
+def users(make_account):
+    return make_account("stats_a"), make_account("stats_b")
+
+
+@pytest.fixture
+def tasks(cursor, users):
+    first, second = users
+    cursor.execute(
+        """
+        INSERT INTO task (applicant_id, name, category, status) VALUES
+            (%s, 'a1', 'news', 'pending'),
+            (%s, 'a2', 'news', 'approved'),
+            (%s, 'b1', 'blog', 'rejected'),
+            (%s, 'b2', NULL, 'pending')
+        RETURNING id
+        """,
+        (first, first, second, second),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def test_triggers_maintain_counts(cursor, users, tasks):
+    first, second = users
+    assert stats() == (4, {"pending": 2, "approved": 1, "rejected": 1})
+    assert stats(user_id=first) == (2, {"pending": 1, "approved": 1, "rejected": 0})
+    assert stats(category="news")[0] == 2
+
+    cursor.execute("UPDATE task SET status = 'approved', category = 'blog' WHERE id = %s", (tasks[0],))
+    cursor.execute("UPDATE task SET applicant_id = %s WHERE id = %s", (second, tasks[1]))
+    cursor.execute("DELETE FROM task WHERE id = %s", (tasks[2],))
+    assert stats() == (3, {"pending": 1, "approved": 2, "rejected": 0})
+    assert stats(user_id=first) == (1, {"pending": 0, "approved": 1, "rejected": 0})
+    assert stats(category="blog") == (1, {"pending": 0, "approved": 1, "rejected": 0})
+    assert database.reconcile_task_stats() == 0
+
+
+def test_fold_keeps_totals(cursor, tasks):
+    before = database.get_task_stats(group_by="category")
+    assert database.fold_task_stats() > 0
+    cursor.execute("SELECT COUNT(*) FROM task_stats_delta")
+    assert cursor.fetchone()[0] == 0
+    assert database.get_task_stats(group_by="category") == before
+    assert database.fold_task_stats() == 0
+
+
+def test_reconcile_fixes_drift(cursor, users, tasks):
+    # 禁用触发器后直接修改数据，统计与task表不一致
+    cursor.execute("ALTER TABLE task DISABLE TRIGGER USER")
+    try:
+        cursor.execute("DELETE FROM task WHERE id = %s", (tasks[0],))
+        cursor.execute("INSERT INTO task (applicant_id, name, category, status) VALUES (%s, 'c', 'docs', 'rejected')", (users[0],))
+    finally:
+        cursor.execute("ALTER TABLE task ENABLE TRIGGER USER")
+    database.fold_task_stats()
+
+    assert database.reconcile_task_stats() > 0
+    assert stats() == (4, {"pending": 1, "approved": 1, "rejected": 2})
+    assert stats(category="docs")[0] == 1
+    cursor.execute("SELECT COUNT(*) FROM task_stats WHERE count = 0")
+    assert cursor.fetchone()[0] == 0
+    assert database.reconcile_task_stats() == 0
+
+
+def test_grouped_stats(users, tasks):
+    first, second = users
+    groups = database.get_task_stats(group_by="user")["groups"]
+    assert {group["key"]: group["total"] for group in groups} == {first: 2, second: 2}
+    categories = {group["key"]: group["total"] for group in database.get_task_stats(group_by="category")["groups"]}
+    assert categories == {"news": 2, "blog": 1, None: 1}
+
+
+def test_invalid_stats_arguments(db):
+    with pytest.raises(ValueError):
+        database.get_task_stats(user_id=1, category="news")
+    with pytest.raises(ValueError):
+        database.get_task_stats(group_by="status")
+
+
+def test_stats_endpoint_permissions(client, auth_headers, make_account, users, tasks):
+    first, second = users
+    response = client.get("/fctask/stats", headers=auth_headers(first))
+    assert response.get_json()["data"]["total"] == 2
+    assert client.get(f"/fctask/stats?user_id={second}", headers=auth_headers(first)).status_code == 403
+    assert client.get("/fctask/stats?group_by=category", headers=auth_headers(first)).status_code == 403
+
+    admin_headers = auth_headers(make_account("stats_admin", role="admin"))
+    assert client.get(f"/fctask/stats?user_id={second}", headers=admin_headers).get_json()["data"]["total"] == 2
+    assert client.get("/fctask/stats?group_by=status", headers=admin_headers).status_code == 400
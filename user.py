@@ -1,39 +1,53 @@
-from flask import Blueprint, request, jsonify
+import hashlib
+import json
+
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity, create_access_token
 from database import (
     login as db_login,
     create_user,
-    get_profile,
+    get_or_create_profile,
     update_or_create_profile,
-    get_username,
+    get_user_role,
 )
 
 # 创建蓝图实例
 user_bp = Blueprint("user", __name__, url_prefix="/user")
 
 
+def profile_etag(profile_data: dict) -> str:
+    """按档案内容计算ETag，档案或角色变化后随之改变"""
+    body = json.dumps(profile_data, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(body.encode("utf-8")).hexdigest()
+
+
 # 定义路由
 @user_bp.route("/profile/get", methods=["GET"])
 @jwt_required()
 def profile():
+    """
+    获取当前用户的档案，不存在时自动创建
+
+    响应带ETag，客户端以If-None-Match重新验证，档案未变化时返回304
+
+    Returns:
+        JSON响应，包含档案信息
+    """
     try:
-        # user_id = request.args.get("user_id", type=int)
-        # if user_id and isadmin
-        # if not user_id:
         user_id = int(get_jwt_identity())
-            
-        try:
-            profile_data = get_profile(user_id)
-        except ValueError:  # 捕获用户档案不存在的错误
-            username = get_username(user_id)  # 使用新函数获取用户名
-            # 使用已有的update_or_create_profile函数创建默认档案
-            update_or_create_profile(user_id, username, "", "")
-            profile_data = get_profile(user_id)
-            
-        return jsonify({
+        profile_data = get_or_create_profile(user_id)
+        # updated_at只用于计算ETag，响应内容与原接口保持一致
+        etag = profile_etag(profile_data)
+        profile_data.pop("updated_at", None)
+
+        response = jsonify({
             "success": True,
             "data": profile_data
-        }), 200
+        })
+        response.set_etag(etag)
+        # 档案因用户而异，只允许客户端缓存，每次使用前重新验证
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response.make_conditional(request)
         
     except Exception as e:
         return jsonify({
@@ -93,7 +107,12 @@ def login():
         user_id, message = db_login(username, password)
 
         # 将user_id转换为字符串
-        access_token = create_access_token(identity=str(user_id))
+        additional_claims = None
+        if current_app.config.get("JWT_ROLE_CLAIM"):
+            additional_claims = {"role": get_user_role(user_id)}
+        access_token = create_access_token(
+            identity=str(user_id), additional_claims=additional_claims
+        )
 
         return jsonify(
             {"success": True, "message": message, "access_token": access_token}